@@ -0,0 +1,113 @@
+"""
+Script benchmarks price ingestion throughput offline, with the deterministic fake market data provider.
+"""
+
+__version__ = "1.0.0"
+__author__ = "Szabo Cristian"
+
+import argparse
+import time
+
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.fetcher.price_fetcher import PriceFetcher
+from util.logger.logger import Logger
+from util.market_data.fake_provider import FakeProvider
+from util.utils import DEFAULT_LAST_PRICE_DATE, get_stock_price_id
+from webserver.daemons.stock_prices_daemon import update_stock_prices
+
+
+def benchmark_ingestion(
+    tickers, end_date, latency, requests_per_second, workers, batch_size, index
+) -> dict:
+    """
+    Fetch synthetic price history of tickers (from DEFAULT_LAST_PRICE_DATE) and build bulk actions, or index them
+    to stock_prices index (same path as the stock prices daemon).
+    @param tickers: int, number of synthetic tickers
+    @param end_date: string "YYYY-MM-DD"
+    @param latency: float, provider seconds per call
+    @param requests_per_second: float
+    @param workers: int
+    @param batch_size: int, tickers per provider call
+    @param index: boolean, index prices to Elasticsearch
+    @return: dict
+    """
+    price_fetcher = PriceFetcher(
+        FakeProvider(latency=latency, seed=config.FAKE_PROVIDER_SEED).get_batch_history,
+        workers=workers,
+        requests_per_second=requests_per_second,
+        burst=config.YF_BURST,
+        retries=0,
+        backoff=0,
+        batch_size=batch_size,
+    )
+    ticker_last_price_dates = {
+        "BENCH{}".format(i): DEFAULT_LAST_PRICE_DATE for i in range(tickers)
+    }
+
+    start_time = time.time()
+    prices = 0
+    if index:
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        _, indexed_prices = update_stock_prices(
+            es_dbi, price_fetcher, ticker_last_price_dates, end_date
+        )
+        prices = sum(indexed_prices.values())
+    else:
+        requests = [
+            (ticker, last_price_date, end_date)
+            for ticker, last_price_date in ticker_last_price_dates.items()
+        ]
+        for ticker, ticker_prices in price_fetcher.fetch(requests):
+            actions = [
+                {
+                    "_id": get_stock_price_id(ticker, price["date"]),
+                    "_index": config.ES_INDEX_STOCK_PRICES,
+                    "_source": price,
+                }
+                for price in ticker_prices or []
+            ]
+            prices += len(actions)
+
+    elapsed = time.time() - start_time
+    return {
+        "tickers": tickers,
+        "prices": prices,
+        "seconds": round(elapsed, 2),
+        "tickers_per_second": round(tickers / elapsed, 2) if elapsed else 0,
+        "prices_per_second": round(prices / elapsed) if elapsed else 0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark price ingestion with the fake market data provider."
+    )
+    parser.add_argument("--tickers", type=int, default=1000)
+    parser.add_argument("--end-date", default=time.strftime("%Y-%m-%d"))
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument(
+        "--requests-per-second", type=float, default=config.YF_REQUESTS_PER_SECOND
+    )
+    parser.add_argument("--workers", type=int, default=config.YF_FETCH_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=config.YF_BATCH_SIZE)
+    parser.add_argument(
+        "--index", action="store_true", help="index prices to Elasticsearch"
+    )
+    args = parser.parse_args()
+
+    Logger.info(
+        "Benchmark results: {}".format(
+            benchmark_ingestion(
+                args.tickers,
+                args.end_date,
+                args.latency,
+                args.requests_per_second,
+                args.workers,
+                args.batch_size,
+                args.index,
+            )
+        )
+    )
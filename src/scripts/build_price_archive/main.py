@@ -0,0 +1,98 @@
+"""
+Script converts stock prices dataset file (json lines) to a memory-mapped binary price archive.
+"""
+
+__version__ = "1.0.0"
+__author__ = "Szabo Cristian"
+
+import json
+import os
+import sys
+import time
+from array import array
+
+import numpy
+
+from util import config
+from util.logger.logger import Logger
+from util.price_store.price_archive import TOMBSTONES_SUFFIX, PriceArchive
+from util.price_store.price_store import PRICE_COLUMNS
+
+
+def build_price_archive(
+    dataset_path=config.DATASET_STOCK_PRICES, archive_path=config.PRICE_ARCHIVE
+) -> bool:
+    """
+    Parse dataset file once and write price archive. Tombstones of the previous archive are cleared.
+    @param dataset_path: string
+    @param archive_path: string
+    @return: boolean
+    """
+    if not os.path.isfile(dataset_path):
+        Logger.error("File {} does not exist".format(dataset_path))
+        return False
+
+    start_time = time.time()
+    ticker_code_map = {}
+    ticker_codes = array("i")
+    columns = {column: array("d") for column in PRICE_COLUMNS}
+    int_columns = set(PRICE_COLUMNS)
+    skipped = 0
+
+    with open(dataset_path, "r") as ds_file:
+        for stock_price_entry in ds_file:
+            try:
+                stock_price_entry = json.loads(stock_price_entry)
+                ticker = stock_price_entry["ticker"]
+                ticker_key = ticker.upper()
+                raw_values = [stock_price_entry.get(column) for column in PRICE_COLUMNS]
+                values = [float(value or 0) for value in raw_values]
+            except (ValueError, KeyError, AttributeError, TypeError):
+                skipped += 1
+                continue
+
+            # value types and first ticker spelling are kept to index archived prices unchanged
+            int_columns.difference_update(
+                column
+                for column, value in zip(PRICE_COLUMNS, raw_values)
+                if type(value) is not int
+            )
+            ticker_code = ticker_code_map.setdefault(
+                ticker_key, (len(ticker_code_map), ticker)
+            )[0]
+            ticker_codes.append(ticker_code)
+            for column, value in zip(PRICE_COLUMNS, values):
+                columns[column].append(value)
+
+    rows = PriceArchive.write(
+        archive_path,
+        tickers=[ticker for _, ticker in ticker_code_map.values()],
+        ticker_codes=numpy.frombuffer(ticker_codes, dtype=numpy.int32),
+        columns={
+            column: numpy.frombuffer(values, dtype=numpy.float64)
+            for column, values in columns.items()
+        },
+        int_columns=int_columns,
+    )
+
+    # tickers deleted from the previous archive are hidden by tombstones; new archive is built from the dataset
+    try:
+        os.remove(archive_path + TOMBSTONES_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+    Logger.info(
+        "Done building price archive {}. Tickers: {}; Rows: {}; Skipped: {}; Time {} seconds.".format(
+            archive_path,
+            len(ticker_code_map),
+            rows,
+            skipped,
+            round(time.time() - start_time, 2),
+        )
+    )
+    return True
+
+
+if __name__ == "__main__":
+    if not build_price_archive():
+        sys.exit(-1)
@@ -0,0 +1,362 @@
+"""
+Parallel bulk ingestion of json lines dataset files.
+"""
+
+import json
+import multiprocessing
+import os
+import threading
+import time
+
+from scripts.populate_es_database.checkpoint import IngestCheckpoint
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.logger.logger import Logger
+
+REPORT_INTERVAL = 10
+
+
+def get_byte_ranges(path, parts) -> list:
+    """
+    Split file in byte ranges of similar size. Range bounds are line starts.
+    @param path: string
+    @param parts: int
+    @return: list of tuples (start, end)
+    """
+    size = os.path.getsize(path)
+    offsets = [0]
+    with open(path, "rb") as file:
+        for part in range(1, parts):
+            # first line start at or after part offset
+            file.seek(max(size * part // parts - 1, offsets[-1]))
+            file.readline()
+            offsets.append(min(file.tell(), size))
+    offsets.append(size)
+
+    return [(start, end) for start, end in zip(offsets, offsets[1:]) if start < end]
+
+
+def identity(action) -> object:
+    """
+    Expand callback for actions already in (action line, source) form.
+    @param action: tuple
+    @return: tuple
+    """
+    return action
+
+
+def is_retryable(item) -> bool:
+    """
+    Check if failed bulk item may succeed if sent again (rejected, server/connection error).
+    @param item: dict {op_type: info}
+    @return: boolean
+    """
+    status = next(iter(item.values()), {}).get("status", None)
+    return not isinstance(status, int) or status == 429 or status >= 500
+
+
+def parse_byte_range(
+    path, range_index, start, end, build_action, batch_size, batches
+) -> None:
+    """
+    Parser process. Read lines starting in [start, end) byte range, build bulk actions and put them in batches queue.
+    Blocks when queue is full. Each batch holds the byte range of its lines.
+    @param path: string
+    @param range_index: int
+    @param start: int
+    @param end: int
+    @param build_action: function (document dict, line string) -> (action dict, source), module level
+    @param batch_size: int
+    @param batches: multiprocessing.Queue
+    @return: None
+    """
+    actions, failed = [], 0
+    offset = batch_start = start
+    with open(path, "rb") as file:
+        file.seek(start)
+        while offset < end:
+            line = file.readline()
+            if not line:
+                break
+            offset += len(line)
+
+            line = line.decode("utf-8").strip()
+            if line:
+                try:
+                    actions.append(build_action(json.loads(line), line))
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    failed += 1
+
+            if len(actions) >= batch_size:
+                batches.put(
+                    {
+                        "range": range_index,
+                        "start": batch_start,
+                        "end": offset,
+                        "actions": actions,
+                        "failed": failed,
+                    }
+                )
+                actions, failed, batch_start = [], 0, offset
+
+    if offset > batch_start:
+        batches.put(
+            {
+                "range": range_index,
+                "start": batch_start,
+                "end": offset,
+                "actions": actions,
+                "failed": failed,
+            }
+        )
+
+
+class BulkPipeline:
+    """
+    Staged bulk ingestion of a json lines file. The file is split in line aligned byte ranges, each parsed by a parser
+    process into batches of bulk actions. Sender threads index batches concurrently with streaming bulk requests.
+    The batches queue is bounded, so parsers wait when senders (Elasticsearch) fall behind.
+
+    Progress is tracked per byte range as the offset up to which all lines were acknowledged by Elasticsearch (batches
+    may complete out of order) and saved in a checkpoint, so an interrupted run can be resumed from these offsets.
+    Documents must have deterministic ids: lines sent again after the last checkpoint overwrite the same documents.
+    """
+
+    def __init__(
+        self,
+        es_dbi: ElasticsearchDBI,
+        build_action,
+        parsers,
+        senders,
+        batch_size=1000,
+        queue_size=16,
+        max_retries=3,
+        checkpoint: IngestCheckpoint = None,
+    ):
+        """
+        @param es_dbi: ElasticsearchDBI
+        @param build_action: function (document dict, line string) -> (action dict, source), module level
+        @param parsers: int, number of parser processes
+        @param senders: int, number of concurrent bulk senders
+        @param batch_size: int, documents per bulk request
+        @param queue_size: int, max parsed batches waiting to be sent
+        @param max_retries: int, retries of rejected (429) documents in each bulk request
+        @param checkpoint: IngestCheckpoint, progress is not saved if None
+        """
+        self.__es_dbi = es_dbi
+        self.__build_action = build_action
+        self.__parsers = max(1, parsers)
+        self.__senders = max(1, senders)
+        self.__batch_size = batch_size
+        self.__queue_size = queue_size
+        self.__max_retries = max_retries
+        self.__checkpoint = checkpoint
+
+        self.__lock = threading.Lock()
+        self.__done = threading.Event()
+        self.__success = 0
+        self.__failed = 0
+        self.__state = None
+        self.__acked_batches = None
+
+    def run(self, path, resume=False) -> tuple:
+        """
+        Index all documents of file.
+        @param path: string
+        @param resume: boolean, skip byte ranges acknowledged in previous run (checkpoint)
+        @return: tuple (success, failed)
+        """
+        start_time = time.time()
+        self.__state = self.__load_state(path, resume)
+        self.__acked_batches = [{} for _ in self.__state["ranges"]]
+        batches = multiprocessing.Queue(maxsize=self.__queue_size)
+
+        # parser processes are forked before sender threads start
+        parsers = [
+            multiprocessing.Process(
+                target=parse_byte_range,
+                args=(
+                    path,
+                    range_index,
+                    acked,
+                    end,
+                    self.__build_action,
+                    self.__batch_size,
+                    batches,
+                ),
+                daemon=True,
+            )
+            for range_index, (_, end, acked) in enumerate(self.__state["ranges"])
+            if acked < end
+        ]
+        for parser in parsers:
+            parser.start()
+
+        senders = [
+            threading.Thread(target=self.__send, args=(batches,), daemon=True)
+            for _ in range(self.__senders)
+        ]
+        for sender in senders:
+            sender.start()
+
+        reporter = threading.Thread(
+            target=self.__report, args=(start_time,), daemon=True
+        )
+        reporter.start()
+
+        for parser in parsers:
+            parser.join()
+            if parser.exitcode:
+                Logger.error(
+                    "Parser process {} exited with code {}".format(
+                        parser.pid, parser.exitcode
+                    )
+                )
+        for _ in senders:
+            batches.put(None)
+        for sender in senders:
+            sender.join()
+        self.__done.set()
+        reporter.join()
+        self.__save_state()
+
+        elapsed = time.time() - start_time
+        Logger.info(
+            "Indexed {} documents ({} failed) in {} seconds, {} docs/s.".format(
+                self.__success,
+                self.__failed,
+                round(elapsed, 2),
+                round(self.__success / elapsed) if elapsed else 0,
+            )
+        )
+        return self.__success, self.__failed
+
+    def __send(self, batches) -> None:
+        """
+        Sender thread. Index batches until stop marker (None) is received.
+        @param batches: multiprocessing.Queue
+        @return: None
+        """
+        while True:
+            batch = batches.get()
+            if batch is None:
+                return
+
+            success, failed, acknowledged = self.__send_batch(batch)
+            with self.__lock:
+                self.__success += success
+                self.__failed += failed + batch["failed"]
+                if acknowledged:
+                    self.__acknowledge(batch)
+
+    def __send_batch(self, batch) -> tuple:
+        """
+        Index batch in one bulk request (rejected documents are retried). Batch is acknowledged if it does not have
+        to be sent again: all documents indexed or failed with a non retryable error.
+        @param batch: dict
+        @return: tuple (success, failed, acknowledged)
+        """
+        success, failed, acknowledged = 0, 0, True
+        try:
+            for ok, item in self.__es_dbi.streaming_bulk(
+                batch["actions"],
+                chunk_size=len(batch["actions"]) or 1,
+                max_retries=self.__max_retries,
+                expand_action_callback=identity,
+            ):
+                if ok:
+                    success += 1
+                else:
+                    failed += 1
+                    acknowledged = acknowledged and not is_retryable(item)
+        except Exception as exception:
+            Logger.error(
+                "Bulk failed for bytes [{}, {}). {}".format(
+                    batch["start"], batch["end"], exception
+                )
+            )
+            failed = len(batch["actions"]) - success
+            acknowledged = False
+
+        return success, failed, acknowledged
+
+    def __acknowledge(self, batch) -> None:
+        """
+        Mark batch byte range as indexed and advance its range acknowledged offset over contiguous batches.
+        Must be called with lock held.
+        @param batch: dict
+        @return: None
+        """
+        byte_range = self.__state["ranges"][batch["range"]]
+        acked_batches = self.__acked_batches[batch["range"]]
+        acked_batches[batch["start"]] = batch["end"]
+        while byte_range[2] in acked_batches:
+            byte_range[2] = acked_batches.pop(byte_range[2])
+
+    def __load_state(self, path, resume) -> dict:
+        """
+        Byte ranges of file and their acknowledged offsets, from checkpoint if resuming.
+        @param path: string
+        @param resume: boolean
+        @return: dict {file, size, ranges: [[start, end, acknowledged offset]]}
+        """
+        size = os.path.getsize(path)
+        state = self.__checkpoint.load() if resume and self.__checkpoint else None
+        if state and state.get("size", None) != size:
+            Logger.warning(
+                "Checkpoint for {} does not match file size. Starting over.".format(
+                    path
+                )
+            )
+            state = None
+
+        if state is None:
+            return {
+                "file": os.path.basename(path),
+                "size": size,
+                "ranges": [
+                    [start, end, start]
+                    for start, end in get_byte_ranges(path, self.__parsers)
+                ],
+            }
+
+        Logger.info(
+            "Resuming {}: {} of {} bytes already indexed.".format(
+                path,
+                sum(acked - start for start, _, acked in state["ranges"]),
+                size,
+            )
+        )
+        return state
+
+    def __save_state(self) -> None:
+        """
+        Save ranges acknowledged offsets to checkpoint.
+        @return: None
+        """
+        if self.__checkpoint is None:
+            return
+        with self.__lock:
+            state = json.loads(json.dumps(self.__state))
+        self.__checkpoint.save(state)
+
+    def __report(self, start_time) -> None:
+        """
+        Log indexing throughput every REPORT_INTERVAL seconds until all batches are sent.
+        @param start_time: float
+        @return: None
+        """
+        last_success, last_time = 0, start_time
+        while not self.__done.wait(REPORT_INTERVAL):
+            now = time.time()
+            with self.__lock:
+                success, failed = self.__success, self.__failed
+            Logger.info(
+                "Indexed {} documents ({} failed), {} docs/s (average {} docs/s).".format(
+                    success,
+                    failed,
+                    round((success - last_success) / (now - last_time)),
+                    round(success / (now - start_time)),
+                )
+            )
+            last_success, last_time = success, now
+            self.__save_state()
@@ -0,0 +1,59 @@
+"""
+Persisted ingestion progress, used to resume interrupted populate runs.
+"""
+
+import json
+import os
+
+from util import config
+from util.logger.logger import Logger
+
+
+class IngestCheckpoint:
+    """
+    Progress of one ingestion source (dataset file, price archive), saved as json in config.INGEST_CHECKPOINT_DIR.
+    Saves are atomic (write + rename), so an interrupted run leaves the previous checkpoint intact.
+    """
+
+    def __init__(self, name, checkpoint_dir=None):
+        """
+        @param name: string, ingestion source name (ex. dataset file name)
+        @param checkpoint_dir: string (default config.INGEST_CHECKPOINT_DIR)
+        """
+        self.path = os.path.join(
+            checkpoint_dir or config.INGEST_CHECKPOINT_DIR, "{}.checkpoint".format(name)
+        )
+
+    def load(self) -> object:
+        """
+        Load saved progress.
+        @return: dict/None (no checkpoint)
+        """
+        if not os.path.isfile(self.path):
+            return None
+
+        try:
+            with open(self.path, "r") as checkpoint_file:
+                return json.load(checkpoint_file)
+        except (OSError, ValueError) as exception:
+            Logger.error(
+                "Could not load checkpoint {}. {}".format(self.path, exception)
+            )
+            return None
+
+    def save(self, state) -> None:
+        """
+        Save progress.
+        @param state: dict
+        @return: None
+        """
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            temporary_path = "{}.tmp".format(self.path)
+            with open(temporary_path, "w") as checkpoint_file:
+                json.dump(state, checkpoint_file)
+            os.replace(temporary_path, self.path)
+        except OSError as exception:
+            Logger.error(
+                "Could not save checkpoint {}. {}".format(self.path, exception)
+            )
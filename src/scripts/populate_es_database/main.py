@@ -5,65 +5,75 @@ Script populates stocks and stock_prices Elasticsearch indices.
 __version__ = "1.0.0"
 __author__ = "Szabo Cristian"
 
-import json
+import argparse
 import os
 import sys
 import time
 
+from scripts.populate_es_database.bulk_pipeline import BulkPipeline
+from scripts.populate_es_database.checkpoint import IngestCheckpoint
 from util import config
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
 from util.logger.logger import Logger
-from util.utils import yf_get_historical_price_data_for_ticker
+from util.market_data.market_data_provider import MarketDataProvider
+from util.price_store.price_archive import PriceArchive
+from util.utils import DEFAULT_LAST_PRICE_DATE, get_stock_price_id
 
 ES_BATCH_SIZE = 1000
 
 
-def populate_stocks_from_dataset_file(es_dbi: ElasticsearchDBI) -> bool:
+def send_es_actions(es_dbi: ElasticsearchDBI, es_actions) -> tuple:
+    """
+    Bulk index actions in one request. A failed request counts all actions as failed.
+    @param es_dbi: ElasticsearchDBI
+    @param es_actions: list
+    @return: tuple (success, failed)
+    """
+    batch_success, batch_failed = es_dbi.bulk(
+        es_actions, chunk_size=len(es_actions), max_retries=3
+    )
+    if batch_success < 0:
+        return 0, len(es_actions)
+    return (
+        batch_success,
+        len(batch_failed) if isinstance(batch_failed, list) else len(es_actions),
+    )
+
+
+def build_stock_action(stock, line) -> tuple:
+    """
+    Bulk action for stocks dataset line. Ticker is the document id.
+    @param stock: dict
+    @param line: string
+    @return: tuple (action, source)
+    """
+    return (
+        {"index": {"_index": config.ES_INDEX_STOCKS, "_id": stock["ticker"]}},
+        {k: v for k, v in stock.items() if k != "ticker"},
+    )
+
+
+def populate_stocks_from_dataset_file(es_dbi: ElasticsearchDBI, resume=False) -> bool:
     """
     Read dataset file and index to stocks index
     @param es_dbi: ElasticsearchDBI object
+    @param resume: boolean, skip lines indexed by previous run (checkpoint)
     @return: boolean
     """
     if not os.path.isfile(config.DATASET_STOCKS):
         Logger.error("File {} does not exist".format(config.DATASET_STOCKS))
         return False
 
-    es_actions = []
-    success, failed = 0, 0
     start_time = time.time()
-    with open(config.DATASET_STOCKS, "r") as ds_file:
-        stock_entry = ds_file.readline()
-        while stock_entry:
-            stock_entry = json.loads(stock_entry)
-            es_actions.append(
-                {
-                    "_id": stock_entry["ticker"],
-                    "_index": config.ES_INDEX_STOCKS,
-                    "_source": {k: v for k, v in stock_entry.items() if k != "ticker"},
-                }
-            )
-            if len(es_actions) >= ES_BATCH_SIZE:
-                batch_success, batch_failed = es_dbi.bulk(
-                    es_actions, chunk_size=len(es_actions), max_retries=3
-                )
-                success += batch_success
-                failed += (
-                    len(batch_failed)
-                    if isinstance(batch_failed, list)
-                    else len(es_actions)
-                )
-                es_actions = []
-
-            stock_entry = ds_file.readline()
-
-    if es_actions:
-        batch_success, batch_failed = es_dbi.bulk(
-            es_actions, chunk_size=len(es_actions), max_retries=3
-        )
-        success += batch_success
-        failed += (
-            len(batch_failed) if isinstance(batch_failed, list) else len(es_actions)
-        )
+    success, failed = BulkPipeline(
+        es_dbi,
+        build_action=build_stock_action,
+        parsers=1,
+        senders=1,
+        batch_size=ES_BATCH_SIZE,
+        max_retries=config.INGEST_BULK_MAX_RETRIES,
+        checkpoint=IngestCheckpoint(os.path.basename(config.DATASET_STOCKS)),
+    ).run(config.DATASET_STOCKS, resume=resume)
 
     Logger.info(
         "Done populated index {}. Success: {}; Failed: {}; Time {} seconds.".format(
@@ -73,50 +83,127 @@ def populate_stocks_from_dataset_file(es_dbi: ElasticsearchDBI) -> bool:
     return True
 
 
-def populate_stock_prices_from_dataset_file(es_dbi: ElasticsearchDBI) -> bool:
+def build_stock_price_action(stock_price, line) -> tuple:
+    """
+    Bulk action for stock prices dataset line. Parsed line is indexed as is, with deterministic id.
+    @param stock_price: dict
+    @param line: string
+    @return: tuple (action, source)
     """
-    Read dataset file and index to stock prices index. (faster)
+    return (
+        {
+            "index": {
+                "_index": config.ES_INDEX_STOCK_PRICES,
+                "_id": get_stock_price_id(stock_price["ticker"], stock_price["date"]),
+            }
+        },
+        line,
+    )
+
+
+def populate_stock_prices_from_dataset_file(
+    es_dbi: ElasticsearchDBI, resume=False
+) -> bool:
+    """
+    Read dataset file and index to stock prices index. File byte ranges are parsed by parallel processes and sent by
+    concurrent bulk senders (see BulkPipeline).
     @param es_dbi: ElasticsearchDBI
+    @param resume: boolean, skip lines indexed by previous run (checkpoint)
     @return: boolean
     """
     if not os.path.isfile(config.DATASET_STOCK_PRICES):
         Logger.error("File {} does not exist".format(config.DATASET_STOCK_PRICES))
         return False
 
+    start_time = time.time()
+    success, failed = BulkPipeline(
+        es_dbi,
+        build_action=build_stock_price_action,
+        parsers=config.INGEST_PARSERS,
+        senders=config.INGEST_SENDERS,
+        batch_size=ES_BATCH_SIZE,
+        queue_size=config.INGEST_QUEUE_SIZE,
+        max_retries=config.INGEST_BULK_MAX_RETRIES,
+        checkpoint=IngestCheckpoint(os.path.basename(config.DATASET_STOCK_PRICES)),
+    ).run(config.DATASET_STOCK_PRICES, resume=resume)
+
+    Logger.info(
+        "Done populated index {}. Success: {}; Failed: {}; Time {} seconds.".format(
+            config.ES_INDEX_STOCK_PRICES,
+            success,
+            failed,
+            round(time.time() - start_time, 2),
+        )
+    )
+    return True
+
+
+def populate_stock_prices_from_archive(es_dbi: ElasticsearchDBI, resume=False) -> bool:
+    """
+    Read price archive (see scripts/build_price_archive) and index to stock prices index. (fastest, no json parsing)
+    Tickers whose prices were all indexed are saved in a checkpoint. Deleted tickers (archive tombstones) are skipped.
+    @param es_dbi: ElasticsearchDBI
+    @param resume: boolean, skip tickers indexed by previous run (checkpoint)
+    @return: boolean
+    """
+    price_archive = PriceArchive.open(config.PRICE_ARCHIVE)
+    if not price_archive:
+        Logger.info("Price archive {} not built".format(config.PRICE_ARCHIVE))
+        return False
+
+    checkpoint = IngestCheckpoint(os.path.basename(config.PRICE_ARCHIVE))
+    state = (checkpoint.load() if resume else None) or {"tickers": []}
+    indexed_tickers = set(state["tickers"])
+    if indexed_tickers:
+        Logger.info(
+            "Resuming {}: {} tickers already indexed.".format(
+                config.PRICE_ARCHIVE, len(indexed_tickers)
+            )
+        )
+
+    # tickers with all prices in es_actions or sent; checkpointed after next successful bulk
+    finished_tickers = []
+    checkpoint_valid = True
+
     es_actions = []
     success, failed = 0, 0
     start_time = time.time()
-    with open(config.DATASET_STOCK_PRICES, "r") as ds_file:
-        stock_entry = ds_file.readline()
-        while stock_entry:
+    for ticker in price_archive.get_tickers():
+        if ticker in indexed_tickers:
+            continue
+
+        for price in price_archive.iter_rows(ticker):
             es_actions.append(
                 {
+                    "_id": get_stock_price_id(ticker, price["date"]),
                     "_index": config.ES_INDEX_STOCK_PRICES,
-                    "_source": json.loads(stock_entry),
+                    "_source": price,
                 }
             )
             if len(es_actions) >= ES_BATCH_SIZE:
-                batch_success, batch_failed = es_dbi.bulk(
-                    es_actions, chunk_size=len(es_actions), max_retries=3
-                )
+                batch_success, batch_failed = send_es_actions(es_dbi, es_actions)
                 success += batch_success
-                failed += (
-                    len(batch_failed)
-                    if isinstance(batch_failed, list)
-                    else len(es_actions)
-                )
+                failed += batch_failed
+
+                # prices of finished tickers sent; stop checkpointing after first failure
+                checkpoint_valid = checkpoint_valid and batch_success == len(es_actions)
+                if checkpoint_valid and finished_tickers:
+                    state["tickers"].extend(finished_tickers)
+                    checkpoint.save(state)
+                finished_tickers = []
                 es_actions = []
 
-            stock_entry = ds_file.readline()
+        finished_tickers.append(ticker)
 
     if es_actions:
-        batch_success, batch_failed = es_dbi.bulk(
-            es_actions, chunk_size=len(es_actions), max_retries=3
-        )
+        batch_success, batch_failed = send_es_actions(es_dbi, es_actions)
         success += batch_success
-        failed += (
-            len(batch_failed) if isinstance(batch_failed, list) else len(es_actions)
-        )
+        failed += batch_failed
+        checkpoint_valid = checkpoint_valid and batch_success == len(es_actions)
+
+    if checkpoint_valid and finished_tickers:
+        state["tickers"].extend(finished_tickers)
+        checkpoint.save(state)
 
     Logger.info(
         "Done populated index {}. Success: {}; Failed: {}; Time {} seconds.".format(
@@ -129,9 +216,10 @@ def populate_stock_prices_from_dataset_file(es_dbi: ElasticsearchDBI) -> bool:
     return True
 
 
-def yf_populate_stock_prices(es_dbi: ElasticsearchDBI) -> bool:
+def populate_stock_prices_from_provider(es_dbi: ElasticsearchDBI) -> bool:
     """
-    Read stocks index and get historical price data for each ticker using yfinance library.
+    Read stocks index and get historical price data for each ticker from market data provider
+    (see config.MARKET_DATA_PROVIDER).
     Results are indexed in stock_prices index. (slow)
     @param es_dbi: ElasticsearchDBI
     @return: boolean
@@ -141,37 +229,44 @@ def yf_populate_stock_prices(es_dbi: ElasticsearchDBI) -> bool:
     success, failed = 0, 0
     start_time = time.time()
 
-    for es_doc in es_dbi.scroll_search_documents_generator(config.ES_INDEX_STOCKS):
-        ticker = es_doc["_id"].upper()
-        prices = yf_get_historical_price_data_for_ticker(ticker)
-        if not prices:
-            Logger.warning("No prices for ticker {}".format(ticker))
-            continue
+    tickers = [
+        es_doc["_id"].upper()
+        for es_doc in es_dbi.scroll_search_documents_generator(config.ES_INDEX_STOCKS)
+    ]
 
-        for price in prices:
-            es_actions.append(
-                {"_index": config.ES_INDEX_STOCK_PRICES, "_source": price}
-            )
-            if len(es_actions) >= ES_BATCH_SIZE:
-                batch_success, batch_failed = es_dbi.bulk(
-                    es_actions, chunk_size=len(es_actions), max_retries=3
-                )
-                success += batch_success
-                failed += (
-                    len(batch_failed)
-                    if isinstance(batch_failed, list)
-                    else len(es_actions)
+    # several tickers per provider call
+    provider = MarketDataProvider.get_instance()
+    end_date = time.strftime("%Y-%m-%d")
+    batch_size = provider.get_batch_size(config.YF_BATCH_SIZE)
+    for batch_start in range(0, len(tickers), batch_size):
+        tickers_prices = provider.get_batch_history(
+            tickers[batch_start : batch_start + batch_size],
+            DEFAULT_LAST_PRICE_DATE,
+            end_date,
+        )
+        for ticker, prices in tickers_prices.items():
+            if not prices:
+                Logger.warning("No prices for ticker {}".format(ticker))
+                continue
+
+            for price in prices:
+                es_actions.append(
+                    {
+                        "_id": get_stock_price_id(ticker, price["date"]),
+                        "_index": config.ES_INDEX_STOCK_PRICES,
+                        "_source": price,
+                    }
                 )
-                es_actions = []
+                if len(es_actions) >= ES_BATCH_SIZE:
+                    batch_success, batch_failed = send_es_actions(es_dbi, es_actions)
+                    success += batch_success
+                    failed += batch_failed
+                    es_actions = []
 
     if es_actions:
-        batch_success, batch_failed = es_dbi.bulk(
-            es_actions, chunk_size=len(es_actions), max_retries=3
-        )
+        batch_success, batch_failed = send_es_actions(es_dbi, es_actions)
         success += batch_success
-        failed += (
-            len(batch_failed) if isinstance(batch_failed, list) else len(es_actions)
-        )
+        failed += batch_failed
 
     Logger.info(
         "Done populated index {}. Success: {}; Failed: {}; Time {} seconds.".format(
@@ -184,10 +279,11 @@ def yf_populate_stock_prices(es_dbi: ElasticsearchDBI) -> bool:
     return True
 
 
-def populate_es_indices():
+def populate_es_indices(resume=False):
     """
     Main function. Populates elasticsearch index "stocks" from dataset file. Index "stock_prices" is then populated
-    from dataset file or using yahoofinancials library if dataset is missing.
+    from price archive, dataset file or market data provider if both are missing.
+    @param resume: boolean, resume previous run from checkpoints
     @return: None
     """
     elasticsearch_dbi = ElasticsearchDBI.get_instance(
@@ -195,26 +291,34 @@ def populate_es_indices():
     )
 
     # populate from dataset
-    success_stocks = populate_stocks_from_dataset_file(elasticsearch_dbi)
+    success_stocks = populate_stocks_from_dataset_file(elasticsearch_dbi, resume)
     if not success_stocks:
         Logger.error("Indexing {} failed".format(config.ES_INDEX_STOCKS))
         sys.exit(-1)
 
-    # populate from dataset
-    success_stock_prices = populate_stock_prices_from_dataset_file(elasticsearch_dbi)
+    # populate from price archive, fallback to dataset
+    success_stock_prices = populate_stock_prices_from_archive(
+        elasticsearch_dbi, resume
+    ) or populate_stock_prices_from_dataset_file(elasticsearch_dbi, resume)
     if not success_stock_prices:
         Logger.error(
-            "Indexing {} from dataset failed. Indexing using yahoofinancials...".format(
+            "Indexing {} from dataset failed. Indexing from market data provider...".format(
                 config.ES_INDEX_STOCK_PRICES
             )
         )
 
-        # try using yahoofinancials
-        success_stock_prices = yf_populate_stock_prices(elasticsearch_dbi)
+        # try using market data provider
+        success_stock_prices = populate_stock_prices_from_provider(elasticsearch_dbi)
         if not success_stock_prices:
             Logger.error("Indexing {} failed.".format(config.ES_INDEX_STOCK_PRICES))
             sys.exit(-1)
 
 
 if __name__ == "__main__":
-    populate_es_indices()
+    parser = argparse.ArgumentParser(description="Populate Elasticsearch indices.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="skip documents indexed by previous (interrupted) run",
+    )
+    populate_es_indices(resume=parser.parse_args().resume)
@@ -69,3 +69,156 @@ class TestInvestmentCalculatorAPI(unittest.TestCase, InterfaceTestAPI):
         self.assertTrue(data)
         self.assertEqual(data, expected_result)
         self.assertEqual(msg, "OK")
+
+
+class TestInvestmentCalculatorGridAPI(unittest.TestCase, InterfaceTestAPI):
+    def test_missing_params(self) -> None:
+        """
+        Test missing parameters.
+        """
+        status, data, msg = InvestmentCalculatorAPI.compute_compound_interest_grid()
+        self.assertEqual(status, 500)
+        self.assertFalse(data)
+        self.assertEqual(msg, "Server error. Please contact administrator.")
+
+        status, data, msg = InvestmentCalculatorAPI.compute_compound_interest_grid(
+            starting_amounts=[],
+            yearly_return_rates=[10],
+            investment_lengths_in_years=[5],
+        )
+        self.assertEqual(status, 400)
+        self.assertEqual(msg, "Param starting_amounts must be a list of numbers.")
+
+    def test_bad_params(self) -> None:
+        """
+        Test bad parameters.
+        """
+        status, data, msg = InvestmentCalculatorAPI.compute_compound_interest_grid(
+            starting_amounts=[10000],
+            yearly_return_rates=["100%"],
+            investment_lengths_in_years=[5],
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(data)
+        self.assertEqual(msg, "Param yearly_return_rates must be a list of numbers.")
+
+        status, data, msg = InvestmentCalculatorAPI.compute_compound_interest_grid(
+            starting_amounts=[10000],
+            yearly_return_rates=[10],
+            investment_lengths_in_years=[2.5],
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(data)
+
+    def test_valid_params(self) -> None:
+        """
+        Test grid scenarios match single scenario calculations.
+        """
+        status, data, msg = InvestmentCalculatorAPI.compute_compound_interest_grid(
+            starting_amounts=[10000],
+            yearly_return_rates=[10, -2, 0],
+            investment_lengths_in_years=[10, 5],
+            additional_yearly_contributions=[1000],
+            include_schedule=True,
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(msg, "OK")
+        self.assertEqual(data["count"], 6)
+
+        for scenario in data["scenarios"]:
+            _, expected, _ = InvestmentCalculatorAPI.compute_compound_interest(
+                starting_amount=10000,
+                yearly_return_rate=scenario["yearly_return_rate"],
+                investment_length_in_years=scenario["investment_length_in_years"],
+                additional_yearly_contribution=1000,
+            )
+            self.assertAlmostEqual(scenario["final_amount"], expected["final_amount"])
+            self.assertAlmostEqual(
+                scenario["compound_interest"], expected["compound_interest"]
+            )
+            self.assertEqual(
+                len(scenario["schedule"]), scenario["investment_length_in_years"]
+            )
+            self.assertAlmostEqual(scenario["schedule"][-1], scenario["final_amount"])
+
+
+class TestInvestmentCalculatorMonteCarloAPI(unittest.TestCase, InterfaceTestAPI):
+    def test_missing_params(self) -> None:
+        """
+        Test missing parameters.
+        """
+        status, data, msg = InvestmentCalculatorAPI.simulate_compound_interest(
+            starting_amount=10000, investment_length_in_years=10
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(data)
+        self.assertEqual(
+            msg,
+            "Yearly return rate and volatility are required for parametric simulation.",
+        )
+
+        status, data, msg = InvestmentCalculatorAPI.simulate_compound_interest(
+            starting_amount=10000, investment_length_in_years=10, method="bootstrap"
+        )
+        self.assertEqual(status, 400)
+        self.assertEqual(msg, "Ticker is required for bootstrap simulation.")
+
+    def test_bad_params(self) -> None:
+        """
+        Test bad parameters.
+        """
+        status, data, msg = InvestmentCalculatorAPI.simulate_compound_interest(
+            starting_amount=10000,
+            investment_length_in_years=10,
+            method="random",
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(data)
+        self.assertEqual(msg, "Invalid simulation method random.")
+
+        status, data, msg = InvestmentCalculatorAPI.simulate_compound_interest(
+            starting_amount=10000,
+            investment_length_in_years=10,
+            yearly_return_rate=10,
+            yearly_volatility=15,
+            paths=0,
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(data)
+
+    def test_valid_params(self) -> None:
+        """
+        Test valid parameters; without volatility all paths match compound interest.
+        """
+        status, data, msg = InvestmentCalculatorAPI.simulate_compound_interest(
+            starting_amount=10000,
+            investment_length_in_years=10,
+            additional_yearly_contribution=1000,
+            yearly_return_rate=10,
+            yearly_volatility=0,
+            paths=1000,
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(msg, "OK")
+        self.assertEqual(data["paths"], 1000)
+        self.assertEqual(len(data["yearly_percentiles"]), 10)
+        self.assertAlmostEqual(data["final_amount"]["p5"], 41874.85, delta=0.1)
+        self.assertAlmostEqual(data["final_amount"]["p95"], 41874.85, delta=0.1)
+        self.assertEqual(data["loss_probability"], 0)
+
+        # same seed, same result
+        results = [
+            InvestmentCalculatorAPI.simulate_compound_interest(
+                starting_amount=10000,
+                investment_length_in_years=5,
+                yearly_return_rate=7,
+                yearly_volatility=15,
+                paths=5000,
+                seed=42,
+            )[1]
+            for _ in range(2)
+        ]
+        self.assertEqual(results[0], results[1])
+        self.assertLess(
+            results[0]["final_amount"]["p5"], results[0]["final_amount"]["p95"]
+        )
@@ -1,7 +1,17 @@
+import json
 import unittest
+from unittest import mock
+
+import numpy
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
 
 from tests.unit.base import InterfaceTestAPI
-from webserver.constants import TIME_RANGES
+from util.price_store.price_store import TickerPrices
+from webserver.constants import PRICE_STREAM_CHUNK_SIZE, TIME_RANGES
 from webserver.core.stock_prices_management import StockPricesManagementAPI
 
 
@@ -83,6 +93,38 @@ class TestStockPricesAPI(unittest.TestCase, InterfaceTestAPI):
         self.assertTrue(data)
         self.assertEqual(msg, "OK")
 
+        # streamed formats hold same prices
+        status, chunks, msg = StockPricesManagementAPI.stream_price_history_for_ticker(
+            ticker=self.test_ticker,
+            start_ts=TIME_RANGES["LAST_YEAR"],
+            output_format="json-stream",
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads("".join(chunks)), {"data": data, "message": "OK"})
+
+        status, chunks, msg = StockPricesManagementAPI.stream_price_history_for_ticker(
+            ticker=self.test_ticker,
+            start_ts=TIME_RANGES["LAST_YEAR"],
+            output_format="ndjson",
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(
+            [json.loads(line) for line in "".join(chunks).splitlines()],
+            list(data.values()),
+        )
+
+        # columnar format, oldest first
+        status, columns, msg = (
+            StockPricesManagementAPI.get_price_history_columns_for_ticker(
+                ticker=self.test_ticker, start_ts=TIME_RANGES["LAST_YEAR"]
+            )
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(columns["dates"], list(reversed(list(data.keys()))))
+        self.assertEqual(
+            columns["close"], [price["close"] for price in reversed(data.values())]
+        )
+
     def __test_valid_params_add_stock_prices(self) -> None:
         status, data, msg = StockPricesManagementAPI.add_price_history_for_stock(
             ticker=self.test_ticker
@@ -128,3 +170,94 @@ class TestStockPricesAPI(unittest.TestCase, InterfaceTestAPI):
         self.assertEqual(status, 200)
         self.assertTrue(data)
         self.assertEqual(msg, "OK")
+
+
+class TestPriceHistoryFormats(unittest.TestCase):
+    """
+    Unit test case for price history response formats, served from a mocked price store.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup price store holding exactly one stream chunk of daily prices.
+        @return: None
+        """
+        self.ticker_prices = TickerPrices.from_rows(
+            "TEST",
+            [
+                {
+                    "ticker": "test",
+                    "date": day * 86400,
+                    "open": 1.0,
+                    "high": 2.0,
+                    "low": 0.5,
+                    "close": 1.5,
+                    "volume": 100 + day,
+                }
+                for day in range(PRICE_STREAM_CHUNK_SIZE)
+            ],
+        )
+        patcher = mock.patch(
+            "webserver.core.stock_prices_management.PriceStore.get_instance"
+        )
+        patcher.start().return_value.get_ticker_prices.return_value = self.ticker_prices
+        self.addCleanup(patcher.stop)
+        self.end_ts = PRICE_STREAM_CHUNK_SIZE * 86400
+
+    def test_json_stream_full_chunks(self) -> None:
+        """
+        Test streamed JSON document is valid when price count is a multiple of chunk size.
+        @return: None
+        """
+        status, data, msg = StockPricesManagementAPI.get_price_history_for_ticker(
+            "TEST", start_ts=0, end_ts=self.end_ts
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(len(data), PRICE_STREAM_CHUNK_SIZE)
+
+        status, chunks, msg = StockPricesManagementAPI.stream_price_history_for_ticker(
+            "TEST", start_ts=0, end_ts=self.end_ts, output_format="json-stream"
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads("".join(chunks)), {"data": data, "message": "OK"})
+
+    def test_columnar(self) -> None:
+        """
+        Test columnar format keeps integer columns as integers, like JSON rows.
+        @return: None
+        """
+        status, data, msg = (
+            StockPricesManagementAPI.get_price_history_columns_for_ticker(
+                "TEST", start_ts=0, end_ts=self.end_ts, output_format="columnar"
+            )
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(data["volume"][:2], [100, 101])
+        self.assertIs(type(data["volume"][0]), int)
+        self.assertIs(type(data["date"][0]), int)
+        self.assertIs(type(data["close"][0]), float)
+
+    @unittest.skipIf(msgpack is None, "msgpack package not installed")
+    def test_msgpack(self) -> None:
+        """
+        Test msgpack format packs integer columns as int64 and price columns as float64.
+        @return: None
+        """
+        status, data, msg = (
+            StockPricesManagementAPI.get_price_history_columns_for_ticker(
+                "TEST", start_ts=0, end_ts=self.end_ts, output_format="msgpack"
+            )
+        )
+        self.assertEqual(status, 200)
+
+        message = msgpack.unpackb(data)
+        self.assertEqual(message["length"], PRICE_STREAM_CHUNK_SIZE)
+        self.assertEqual(message["dtypes"]["volume"], "<i8")
+        self.assertEqual(message["dtypes"]["close"], "<f8")
+        columns = {
+            column: numpy.frombuffer(values, dtype=message["dtypes"][column])
+            for column, values in message["columns"].items()
+        }
+        self.assertEqual(columns["volume"].tolist()[:2], [100, 101])
+        self.assertEqual(columns["date"].tolist()[:2], [0, 86400])
+        self.assertEqual(columns["close"].tolist()[:2], [1.5, 1.5])
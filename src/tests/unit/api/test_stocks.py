@@ -97,6 +97,22 @@ class TestStocksAPI(unittest.TestCase, InterfaceTestAPI):
         self.assertFalse(data)
         self.assertEqual(msg, "No stocks found for specified filter.")
 
+        # paginated, projected
+        status, data, msg = StocksManagementAPI.get_stocks(
+            fields=["names"], size=1, include_total=True
+        )
+        self.assertEqual(status, 200)
+        self.assertEqual(len(data["stocks"]), 1)
+        self.assertEqual(list(list(data["stocks"].values())[0].keys()), ["names"])
+        self.assertTrue(data["total"])
+        if data["total"] > 1:
+            status, next_data, msg = StocksManagementAPI.get_stocks(
+                fields=["names"], size=1, search_after=data["next"]
+            )
+            self.assertEqual(status, 200)
+            self.assertNotIn("total", next_data)
+            self.assertGreater(list(next_data["stocks"])[0], data["next"])
+
     def __test_valid_params_add_stock(self) -> None:
         status, data, msg = StocksManagementAPI.add_stock(ticker=self.test_ticker)
         self.assertEqual(status, 200)
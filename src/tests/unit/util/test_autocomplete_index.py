@@ -0,0 +1,111 @@
+"""
+AutocompleteIndex test case.
+"""
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from util.autocomplete.autocomplete_index import AutocompleteIndex
+
+
+class TestAutocompleteIndex(unittest.TestCase):
+    """
+    Unit test case for in-memory stocks prefix index - AutocompleteIndex class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup index with a few stocks.
+        @return: None
+        """
+        self.index = AutocompleteIndex(ttl=3600)
+        self.index.build(
+            stocks=[
+                ("AAPL", {"names": ["Apple Inc."], "tags": ["Technology"]}),
+                ("APPS", {"names": ["Digital Turbine, Inc."], "tags": []}),
+                ("AMAT", {"names": ["Applied Materials, Inc."], "tags": []}),
+                ("TSLA", {"names": ["Tesla, Inc."], "tags": ["Auto Manufacturers"]}),
+            ]
+        )
+
+    def test_suggest(self) -> None:
+        """
+        Test ranking: ticker matches first, then full names, name words and tags.
+        @return: None
+        """
+        suggestions = self.index.suggest("app")
+        self.assertEqual(
+            [suggestion["ticker"] for suggestion in suggestions],
+            ["APPS", "AAPL", "AMAT"],
+        )
+        self.assertEqual(suggestions[0]["match"], "ticker")
+        self.assertEqual(suggestions[1]["value"], "Apple Inc.")
+
+        self.assertEqual(
+            [suggestion["ticker"] for suggestion in self.index.suggest("Mat")],
+            ["AMAT"],
+        )
+        self.assertEqual(self.index.suggest("auto")[0]["match"], "tag")
+        self.assertEqual(len(self.index.suggest("a", top_k=2)), 2)
+        self.assertEqual(self.index.suggest(" "), [])
+
+    def test_add_remove(self) -> None:
+        """
+        Test incremental updates.
+        @return: None
+        """
+        self.index.add("aapl", {"names": ["Apricot Inc."], "tags": []})
+        self.assertEqual(self.index.suggest("apple"), [])
+        self.assertEqual(self.index.suggest("apri")[0]["ticker"], "AAPL")
+
+        self.index.remove("TSLA")
+        self.assertEqual(self.index.suggest("tes"), [])
+        self.assertEqual(len(self.index), 3)
+
+    def test_build_failure(self) -> None:
+        """
+        Test failed build keeps current index and is retried later.
+        @return: None
+        """
+
+        def failing_stocks():
+            yield "MSFT", {"names": ["Microsoft Corporation"], "tags": []}
+            raise ConnectionError("stocks index unavailable")
+
+        self.assertFalse(self.index.build(stocks=failing_stocks()))
+        self.assertEqual(len(self.index), 4)
+        self.assertEqual(self.index.suggest("tsla")[0]["ticker"], "TSLA")
+        self.assertEqual(self.index.suggest("msft"), [])
+
+    def test_background_rebuild(self) -> None:
+        """
+        Test expired index keeps serving requests while a single rebuild runs in background.
+        @return: None
+        """
+        index = AutocompleteIndex(ttl=0)
+        index.build(stocks=[("AAPL", {"names": ["Apple Inc."], "tags": []})])
+
+        scanning = threading.Event()
+        release = threading.Event()
+
+        def scroll_stocks():
+            scanning.set()
+            release.wait(5)
+            yield "AAPL", {"names": ["Apple Inc."], "tags": []}
+            yield "MSFT", {"names": ["Microsoft Corporation"], "tags": []}
+
+        with mock.patch.object(
+            AutocompleteIndex, "scroll_stocks", side_effect=scroll_stocks
+        ) as scroll_mock:
+            self.assertEqual(index.suggest("aapl")[0]["ticker"], "AAPL")
+            self.assertTrue(scanning.wait(5))
+            self.assertEqual(index.suggest("aapl")[0]["ticker"], "AAPL")
+            self.assertEqual(scroll_mock.call_count, 1)
+
+            release.set()
+            deadline = time.time() + 5
+            while len(index) != 2 and time.time() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(len(index), 2)
@@ -2,10 +2,24 @@
 ElasticsearchDBI test case.
 """
 
+import copy
+import os
 import unittest
+from datetime import datetime
+from unittest import mock
 
 from util import config
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.utils import (
+    DEFAULT_LAST_PRICE_DATE,
+    get_last_price_date_for_all_tickers,
+    get_last_price_date_for_tickers,
+)
+
+TIMESTAMP_1 = 1600000000
+TIMESTAMP_2 = TIMESTAMP_1 + 2 * 86400
+DATE_1 = datetime.fromtimestamp(TIMESTAMP_1).strftime("%Y-%m-%d")
+DATE_2 = datetime.fromtimestamp(TIMESTAMP_2).strftime("%Y-%m-%d")
 
 
 class TestElasticsearchDBI(unittest.TestCase):
@@ -350,5 +364,139 @@ class TestElasticsearchDBI(unittest.TestCase):
         self.assertFalse(failed)
 
 
+class TestElasticsearchDBIRequests(unittest.TestCase):
+    """
+    Unit test case for requests sent by ElasticsearchDBI class, against a mocked Elasticsearch client.
+    """
+
+    def setUp(self) -> None:
+        """
+        Create ElasticsearchDBI instance of current process with a mocked Elasticsearch client.
+        @return: None
+        """
+        patcher = mock.patch("util.elasticsearch.elasticsearch_dbi.Elasticsearch")
+        self.es = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+        previous_instance = ElasticsearchDBI.instance
+        ElasticsearchDBI.instance = None
+        self.addCleanup(setattr, ElasticsearchDBI, "instance", previous_instance)
+
+        self.es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+
+    def test_get_instance_after_fork(self) -> None:
+        """
+        Test instance inherited from parent process is replaced without closing parent connections.
+        @return: None
+        """
+        parent_instance = self.es_dbi
+        self.assertIs(
+            ElasticsearchDBI.get_instance(
+                config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+            ),
+            parent_instance,
+        )
+
+        child_pid = os.getpid() + 1
+        with mock.patch("os.getpid", return_value=child_pid):
+            child_instance = ElasticsearchDBI.get_instance(
+                config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+            )
+            self.assertIsNot(child_instance, parent_instance)
+            self.assertEqual(child_instance.pid, child_pid)
+            self.assertIs(
+                ElasticsearchDBI.get_instance(
+                    config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+                ),
+                child_instance,
+            )
+        self.es.transport.close.assert_not_called()
+
+    def test_close_instance_after_fork(self) -> None:
+        """
+        Test closing instance inherited from parent process only drops it, closing own instance closes connections.
+        @return: None
+        """
+        with mock.patch("os.getpid", return_value=os.getpid() + 1):
+            ElasticsearchDBI.close_instance()
+        self.assertIsNone(ElasticsearchDBI.instance)
+        self.es.transport.close.assert_not_called()
+
+        ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        ElasticsearchDBI.close_instance()
+        self.assertIsNone(ElasticsearchDBI.instance)
+        self.es.transport.close.assert_called_once_with()
+
+    def test_last_price_date_for_all_tickers(self) -> None:
+        """
+        Test composite aggregation pages are requested after previous page after_key until an empty page.
+        @return: None
+        """
+        pages = [
+            {
+                "buckets": [
+                    {"key": {"ticker": "AAPL"}, "last_date": {"value": TIMESTAMP_2}},
+                    {"key": {"ticker": "EMPTY"}, "last_date": {"value": None}},
+                ],
+                "after_key": {"ticker": "EMPTY"},
+            },
+            {
+                "buckets": [
+                    {"key": {"ticker": "aapl"}, "last_date": {"value": TIMESTAMP_1}},
+                    {"key": {"ticker": "msft"}, "last_date": {"value": TIMESTAMP_1}},
+                ],
+                "after_key": {"ticker": "msft"},
+            },
+            {"buckets": []},
+        ]
+        after_keys = []
+
+        def search(index, body, **kwargs):
+            composite = body["aggs"]["buckets"]["composite"]
+            after_keys.append(copy.deepcopy(composite.get("after", None)))
+            return {"aggregations": {"buckets": pages[len(after_keys) - 1]}}
+
+        self.es.search.side_effect = search
+        self.assertEqual(
+            get_last_price_date_for_all_tickers(self.es_dbi),
+            {"AAPL": DATE_2, "MSFT": DATE_1},
+        )
+        self.assertEqual(after_keys, [None, {"ticker": "EMPTY"}, {"ticker": "msft"}])
+
+    def test_last_price_date_for_tickers_fallback(self) -> None:
+        """
+        Test one search for each ticker when composite aggregation fails.
+        @return: None
+        """
+        last_prices = {"aapl": TIMESTAMP_1}
+
+        def search(index, body, **kwargs):
+            if "aggs" in body:
+                raise ConnectionError("Elasticsearch unavailable")
+            ticker = body["query"]["bool"]["must"][0]["term"]["ticker"]
+            if ticker not in last_prices:
+                return {"hits": {"hits": []}}
+            return {
+                "hits": {
+                    "hits": [
+                        {"_source": {"ticker": ticker, "date": last_prices[ticker]}}
+                    ]
+                }
+            }
+
+        self.es.search.side_effect = search
+        self.assertIsNone(get_last_price_date_for_all_tickers(self.es_dbi))
+        self.assertEqual(
+            get_last_price_date_for_tickers(["AAPL", "MISSING"], self.es_dbi),
+            {"AAPL": DATE_1, "MISSING": DEFAULT_LAST_PRICE_DATE},
+        )
+        # failed aggregation + one search for each ticker
+        self.assertEqual(self.es.search.call_count, 4)
+
+
 if __name__ == "__main__":
     unittest.main()
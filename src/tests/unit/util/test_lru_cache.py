@@ -0,0 +1,49 @@
+"""
+LRUCache test case.
+"""
+
+import time
+import unittest
+
+from util.cache.lru_cache import LRUCache
+
+
+class TestLRUCache(unittest.TestCase):
+    """
+    Unit test case for in-process cache - LRUCache class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup cache with 2 entries max.
+        @return: None
+        """
+        self.cache = LRUCache(max_size=2, ttl=60)
+
+    def test_get_set(self) -> None:
+        """
+        Test hit/miss counters and least recently used eviction.
+        @return: None
+        """
+        self.cache.set("a", 1)
+        self.cache.set("b", 2)
+        self.assertEqual(self.cache.get("a"), 1)
+        self.cache.set("c", 3)
+
+        self.assertIsNone(self.cache.get("b"))
+        self.assertEqual(self.cache.get("c"), 3)
+        stats = self.cache.get_stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["size"], 2)
+
+    def test_ttl(self) -> None:
+        """
+        Test entries expire.
+        @return: None
+        """
+        cache = LRUCache(max_size=2, ttl=0.01)
+        cache.set("a", 1)
+        time.sleep(0.02)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(len(cache), 0)
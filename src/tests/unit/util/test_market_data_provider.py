@@ -0,0 +1,148 @@
+"""
+Market data providers test case.
+"""
+
+import math
+import unittest
+from unittest import mock
+
+from util.market_data.fake_provider import FakeProvider
+from util.market_data.market_data_provider import (
+    MarketDataException,
+    MarketDataProvider,
+)
+from util.market_data.yahoo_provider import YahooProvider, yf_prices_to_rows
+
+
+class TestMarketDataProvider(unittest.TestCase):
+    """
+    Unit test case for market data providers - YahooProvider conversion and FakeProvider class.
+    """
+
+    def test_yf_prices_to_rows(self) -> None:
+        """
+        Test yahoofinancials prices conversion to stock_prices documents, missing values converted to nan.
+        @return: None
+        """
+        prices = [
+            {
+                "date": 1577923200,
+                "high": 3,
+                "low": 1,
+                "open": 2,
+                "close": 2.5,
+                "volume": 100,
+                "adjclose": 2.4,
+                "formatted_date": "2020-01-02",
+            },
+            {"date": 1578009600, "open": None, "close": 2, "high": 2, "low": 2},
+        ]
+        rows = yf_prices_to_rows("AAPL", prices)
+
+        self.assertEqual(
+            rows[0],
+            {
+                "ticker": "AAPL",
+                "date": 1577923200.0,
+                "open": 2.0,
+                "close": 2.5,
+                "high": 3.0,
+                "low": 1.0,
+                "volume": 100.0,
+            },
+        )
+        self.assertIsInstance(rows[0]["date"], float)
+        self.assertTrue(math.isnan(rows[1]["open"]))
+        self.assertTrue(math.isnan(rows[1]["volume"]))
+        self.assertEqual(yf_prices_to_rows("AAPL", []), [])
+
+    def test_provider_interface(self) -> None:
+        """
+        Test providers must implement info and batch history methods.
+        @return: None
+        """
+
+        class IncompleteProvider(MarketDataProvider):
+            def get_info(self, ticker) -> dict:
+                return {}
+
+        with self.assertRaises(TypeError):
+            IncompleteProvider()
+        self.assertIsInstance(FakeProvider(), MarketDataProvider)
+
+    def test_yahoo_provider_history(self) -> None:
+        """
+        Test one yahoofinancials request per ticker; tickers missing from the response raise to be retried.
+        @return: None
+        """
+        responses = {
+            "AAPL": {"AAPL": {"prices": [{"date": 1577923200, "close": 2}]}},
+            "MSFT": {"MSFT": {"eventsData": []}},
+            "FAIL": {},
+        }
+        with mock.patch(
+            "util.market_data.yahoo_provider.YahooFinancials"
+        ) as yahoo_financials:
+            yahoo_financials.side_effect = lambda ticker: mock.Mock(
+                get_historical_price_data=lambda **kwargs: responses[ticker]
+            )
+            history = YahooProvider().get_batch_history(
+                ["AAPL", "MSFT"], "2020-01-01", "2020-01-03"
+            )
+            self.assertEqual(
+                [call.args for call in yahoo_financials.call_args_list],
+                [("AAPL",), ("MSFT",)],
+            )
+            self.assertEqual(history["AAPL"][0]["close"], 2.0)
+            self.assertEqual(history["MSFT"], [])
+
+            with self.assertRaises(MarketDataException):
+                YahooProvider().get_history("FAIL", "2020-01-01", "2020-01-03")
+
+        self.assertEqual(YahooProvider().get_batch_size(10), 1)
+        self.assertEqual(FakeProvider().get_batch_size(10), 10)
+
+    def test_fake_provider_history(self) -> None:
+        """
+        Test synthetic prices are deterministic, on week days only and independent of window.
+        @return: None
+        """
+        provider = FakeProvider(seed=1)
+        history = provider.get_batch_history(["AAA", "BBB"], "2020-01-01", "2020-02-01")
+
+        self.assertEqual(len(history["AAA"]), 23)
+        self.assertNotEqual(history["AAA"][0]["close"], history["BBB"][0]["close"])
+        self.assertEqual(
+            FakeProvider(seed=1).get_history("AAA", "2020-01-01", "2020-02-01"),
+            history["AAA"],
+        )
+        self.assertEqual(
+            provider.get_history("AAA", "2020-01-15", "2020-01-16"),
+            [price for price in history["AAA"] if price["date"] == 1579098600.0],
+        )
+        for price in history["AAA"]:
+            self.assertEqual(
+                set(price), {"ticker", "date", "open", "close", "high", "low", "volume"}
+            )
+            self.assertLessEqual(price["low"], min(price["open"], price["close"]))
+            self.assertGreaterEqual(price["high"], max(price["open"], price["close"]))
+
+        self.assertEqual(provider.get_history("AAA", "2020-01-04", "2020-01-06"), [])
+        self.assertNotEqual(
+            FakeProvider(seed=2).get_history("AAA", "2020-01-01", "2020-02-01"),
+            history["AAA"],
+        )
+
+    def test_fake_provider_info(self) -> None:
+        """
+        Test synthetic stock info.
+        @return: None
+        """
+        info = FakeProvider().get_info("AAA")
+        self.assertEqual(info["ticker"], "AAA")
+        self.assertEqual(info, FakeProvider().get_info("AAA"))
+        self.assertTrue(info["names"] and info["exchanges"] and info["tags"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+MarketSchedule and FileLock test case.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+
+import pytz
+
+from util.scheduler.file_lock import FileLock
+from util.scheduler.market_schedule import MarketSchedule
+
+
+class TestMarketSchedule(unittest.TestCase):
+    """
+    Unit test case for price scheduler - MarketSchedule and FileLock classes.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup US market schedule.
+        @return: None
+        """
+        self.timezone = pytz.timezone("America/New_York")
+        self.market_schedule = MarketSchedule(
+            "US",
+            timezone="America/New_York",
+            close="16:00",
+            days=[0, 1, 2, 3, 4],
+            exchanges=["New York Stock Exchange"],
+        )
+
+    def get_ts(self, *args) -> float:
+        """
+        Timestamp of market local time.
+        @return: float
+        """
+        return self.timezone.localize(datetime.datetime(*args)).timestamp()
+
+    def test_get_next_close(self) -> None:
+        """
+        Test next close is on same day before close + delay, skips weekends.
+        @return: None
+        """
+        # Friday 2020-01-03
+        close = self.market_schedule.get_next_close(self.get_ts(2020, 1, 3, 12))
+        self.assertEqual(close.timestamp(), self.get_ts(2020, 1, 3, 16))
+
+        close = self.market_schedule.get_next_close(
+            self.get_ts(2020, 1, 3, 16, 30), delay=3600
+        )
+        self.assertEqual(close.date(), datetime.date(2020, 1, 3))
+
+        close = self.market_schedule.get_next_close(self.get_ts(2020, 1, 3, 18))
+        self.assertEqual(close.date(), datetime.date(2020, 1, 6))
+
+    def test_get_last_close(self) -> None:
+        """
+        Test last close is previous trading day before close + delay, skips weekends.
+        @return: None
+        """
+        # Monday 2020-01-06
+        close = self.market_schedule.get_last_close(
+            self.get_ts(2020, 1, 6, 16, 30), delay=3600
+        )
+        self.assertEqual(close.date(), datetime.date(2020, 1, 3))
+
+        close = self.market_schedule.get_last_close(self.get_ts(2020, 1, 6, 18))
+        self.assertEqual(close.date(), datetime.date(2020, 1, 6))
+
+    def test_has_exchange(self) -> None:
+        """
+        Test exchange names match case insensitive.
+        @return: None
+        """
+        self.assertTrue(self.market_schedule.has_exchange(["new york stock exchange"]))
+        self.assertFalse(self.market_schedule.has_exchange(["Nordic Growth Market"]))
+        self.assertFalse(self.market_schedule.has_exchange([]))
+
+    def test_file_lock(self) -> None:
+        """
+        Test lock is held by one holder until released.
+        @return: None
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "scheduler.lock")
+            leader, follower = FileLock(path), FileLock(path)
+
+            self.assertTrue(leader.try_acquire())
+            self.assertFalse(follower.try_acquire())
+            leader.release()
+            self.assertTrue(follower.try_acquire())
+            follower.release()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+"""
+NavAnalytics test case.
+"""
+
+import unittest
+
+import numpy
+
+from webserver.model.analytics import NavAnalytics, ReturnsAnalytics
+
+
+class TestNavAnalytics(unittest.TestCase):
+    """
+    Unit test case for NAV analytics - NavAnalytics class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup 3 years of daily NAV growing 10% in first year, dropping 10% in second and flat in third.
+        @return: None
+        """
+        self.days = numpy.arange(0, 3 * 365 + 2)
+        self.nav = numpy.ones(len(self.days))
+        self.nav[365:] = 1.1
+        self.nav[731:] = 0.99
+
+    def test_rolling_returns(self) -> None:
+        """
+        Test best, worst and median 1 year windows.
+        @return: None
+        """
+        rolling_info = NavAnalytics.rolling_returns(self.days, self.nav, 1)
+        self.assertEqual(rolling_info["count"], len(self.days) - 365)
+        self.assertEqual(rolling_info["best"]["return_percentage"], 10.0)
+        self.assertEqual(rolling_info["best"]["end_date"], "1971-01-01")
+        self.assertEqual(rolling_info["worst"]["return_percentage"], -10.0)
+        self.assertEqual(rolling_info["worst"]["end_date"], "1972-01-02")
+
+    def test_rolling_returns_short_history(self) -> None:
+        """
+        Test no windows when history is shorter than window.
+        @return: None
+        """
+        rolling_info = NavAnalytics.rolling_returns(self.days, self.nav, 5)
+        self.assertEqual(rolling_info, {"window_years": 5, "count": 0})
+
+    def test_rolling_returns_portfolio(self) -> None:
+        """
+        Test portfolio windows buy holdings with allocation weights at window start instead of using drifted NAV.
+        @return: None
+        """
+        days = numpy.arange(0, 2 * 365 + 1)
+        relative_prices = numpy.ones((len(days), 2))
+        relative_prices[365:, 0] = 2.0
+        relative_prices[730:, 1] = 2.0
+        weights = numpy.array([0.5, 0.5])
+        start_rows, end_rows, returns = NavAnalytics.rolling_window_returns(
+            days, relative_prices, 1, weights=weights
+        )
+        self.assertEqual(days[start_rows[-1]], 365)
+        self.assertEqual(days[end_rows[-1]], 730)
+        # Drifted NAV grows from 1.5 to 2 (33%), holdings bought at window start return 0% and 100%
+        self.assertAlmostEqual(returns[-1], 0.5)
+
+        rolling_info = NavAnalytics.rolling_returns(
+            days, relative_prices, 1, weights=weights
+        )
+        self.assertEqual(rolling_info["worst"]["return_percentage"], 50.0)
+        self.assertEqual(rolling_info["best"]["return_percentage"], 50.0)
+
+    def test_risk_metrics(self) -> None:
+        """
+        Test max drawdown dates and ratios.
+        @return: None
+        """
+        days = numpy.arange(0, 5)
+        nav = numpy.array([1.0, 1.2, 0.9, 1.08, 1.2])
+        risk_metrics = NavAnalytics.risk_metrics(days, nav)
+        self.assertEqual(risk_metrics["max_drawdown"]["percentage"], -25.0)
+        self.assertEqual(risk_metrics["max_drawdown"]["start_date"], "1970-01-02")
+        self.assertEqual(risk_metrics["max_drawdown"]["end_date"], "1970-01-03")
+        self.assertEqual(risk_metrics["max_drawdown"]["recovery_date"], "1970-01-05")
+
+        returns = nav[1:] / nav[:-1] - 1
+        self.assertAlmostEqual(
+            risk_metrics["sharpe_ratio"],
+            returns.mean() / returns.std(ddof=1) * numpy.sqrt(252),
+            places=3,
+        )
+        self.assertGreater(risk_metrics["sortino_ratio"], risk_metrics["sharpe_ratio"])
+
+    def test_risk_metrics_flat_nav(self) -> None:
+        """
+        Test undefined ratios for constant NAV.
+        @return: None
+        """
+        risk_metrics = NavAnalytics.risk_metrics(numpy.arange(3), numpy.ones(3))
+        self.assertEqual(risk_metrics["max_drawdown"]["percentage"], 0.0)
+        self.assertIsNone(risk_metrics["max_drawdown"]["recovery_date"])
+        self.assertIsNone(risk_metrics["sharpe_ratio"])
+        self.assertIsNone(risk_metrics["calmar_ratio"])
+
+
+class TestReturnsAnalytics(unittest.TestCase):
+    """
+    Unit test case for returns analytics - ReturnsAnalytics class.
+    """
+
+    def test_pairwise_covariance(self) -> None:
+        """
+        Test pairwise masked statistics match statistics over common rows.
+        @return: None
+        """
+        returns = numpy.array(
+            [
+                [0.01, 0.02, numpy.nan],
+                [-0.02, numpy.nan, 0.01],
+                [0.03, 0.01, 0.02],
+                [0.00, -0.01, -0.01],
+                [0.01, 0.03, numpy.nan],
+            ]
+        )
+        covariance, correlation, observations = ReturnsAnalytics.pairwise_covariance(
+            returns
+        )
+        self.assertEqual(observations.tolist(), [[5, 4, 3], [4, 4, 2], [3, 2, 3]])
+
+        common = ~numpy.isnan(returns[:, 0]) & ~numpy.isnan(returns[:, 1])
+        self.assertAlmostEqual(
+            covariance[0, 1], numpy.cov(returns[common, 0], returns[common, 1])[0, 1]
+        )
+        self.assertAlmostEqual(
+            correlation[0, 1],
+            numpy.corrcoef(returns[common, 0], returns[common, 1])[0, 1],
+        )
+        self.assertAlmostEqual(covariance[0, 0], numpy.var(returns[:, 0], ddof=1))
+        self.assertAlmostEqual(correlation[2, 2], 1.0)
+        self.assertTrue(numpy.allclose(covariance, covariance.T, equal_nan=True))
@@ -0,0 +1,90 @@
+"""
+PriceArchive test case.
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy
+
+from util.price_store.price_archive import TOMBSTONES_SUFFIX, PriceArchive
+
+
+class TestPriceArchive(unittest.TestCase):
+    """
+    Unit test case for memory-mapped price archive - PriceArchive class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Write test archive with two tickers and a duplicate row.
+        @return: None
+        """
+        self.test_dir = tempfile.mkdtemp()
+        self.test_archive_path = os.path.join(self.test_dir, "test_prices.bin")
+        PriceArchive.write(
+            self.test_archive_path,
+            tickers=["aapl", "msft"],
+            ticker_codes=numpy.array([0, 1, 0, 0]),
+            columns={
+                "date": numpy.array([300.0, 200.0, 100.0, 300.0]),
+                "close": numpy.array([1.0, 2.0, 3.0, 4.0]),
+            },
+            int_columns=["date"],
+        )
+
+    def tearDown(self) -> None:
+        """
+        Delete test archive.
+        @return: None
+        """
+        for path in [
+            self.test_archive_path,
+            self.test_archive_path + TOMBSTONES_SUFFIX,
+        ]:
+            if os.path.isfile(path):
+                os.remove(path)
+        os.rmdir(self.test_dir)
+
+    def test_open(self) -> None:
+        """
+        Test open existing/missing archive.
+        @return: None
+        """
+        price_archive = PriceArchive.open(self.test_archive_path)
+        self.assertTrue(price_archive)
+        self.assertEqual(price_archive.get_tickers(), ["AAPL", "MSFT"])
+        self.assertEqual(len(price_archive), 3)
+        self.assertIsNone(PriceArchive.open(self.test_archive_path + ".missing"))
+
+    def test_get_columns(self) -> None:
+        """
+        Test columns are sorted by date and last duplicate row wins. Rows keep dataset types and ticker spelling.
+        @return: None
+        """
+        price_archive = PriceArchive(self.test_archive_path)
+        columns = price_archive.get_columns("aapl")
+        self.assertEqual(columns["date"].tolist(), [100.0, 300.0])
+        self.assertEqual(columns["close"].tolist(), [3.0, 4.0])
+        self.assertIsNone(price_archive.get_columns("TSLA"))
+        self.assertEqual(
+            list(price_archive.iter_rows("MSFT")),
+            [{"date": 200, "close": 2.0, "ticker": "msft"}],
+        )
+
+    def test_delete_ticker(self) -> None:
+        """
+        Test deleted tickers are hidden, also in archives opened by other processes.
+        @return: None
+        """
+        price_archive = PriceArchive(self.test_archive_path)
+        price_archive.delete_ticker("msft")
+        price_archive.delete_ticker("TSLA")
+
+        for archive in [price_archive, PriceArchive(self.test_archive_path)]:
+            self.assertEqual(archive.get_tickers(), ["AAPL"])
+            self.assertEqual(archive.get_deleted_tickers(), frozenset(["MSFT"]))
+            self.assertNotIn("MSFT", archive)
+            self.assertIsNone(archive.get_columns("MSFT"))
+            self.assertEqual(list(archive.iter_rows("MSFT")), [])
@@ -0,0 +1,164 @@
+"""
+PriceFetcher test case.
+"""
+
+import unittest
+from unittest import mock
+
+from util.fetcher.price_fetcher import PriceFetcher
+from util.fetcher.token_bucket import TokenBucket
+
+
+class TestPriceFetcher(unittest.TestCase):
+    """
+    Unit test case for rate limited concurrent fetcher - PriceFetcher and TokenBucket classes.
+    """
+
+    def test_token_bucket(self) -> None:
+        """
+        Test burst tokens are available at once, then wait time until next token.
+        @return: None
+        """
+        token_bucket = TokenBucket(rate=1, capacity=2)
+        self.assertEqual(token_bucket.try_acquire(), 0)
+        self.assertEqual(token_bucket.try_acquire(), 0)
+        self.assertGreater(token_bucket.try_acquire(), 0.9)
+
+    def test_fetch(self) -> None:
+        """
+        Test all tickers are fetched one by one, failed requests retried, failures after last retry returned as None.
+        @return: None
+        """
+        attempts = {}
+
+        def fetch_function(tickers, start_date, end_date):
+            for ticker in tickers:
+                attempts[ticker] = attempts.get(ticker, 0) + 1
+            if "FAIL" in tickers or ("RETRY" in tickers and attempts["RETRY"] == 1):
+                raise ConnectionError(tickers)
+            return {
+                ticker: [{"ticker": ticker, "date": start_date}] for ticker in tickers
+            }
+
+        price_fetcher = PriceFetcher(
+            fetch_function,
+            workers=4,
+            requests_per_second=1000,
+            burst=10,
+            retries=2,
+            backoff=0.01,
+        )
+        tickers = ["T{}".format(i) for i in range(20)] + ["RETRY", "FAIL"]
+        results = dict(
+            price_fetcher.fetch(
+                (ticker, "2020-01-01", "2020-01-02") for ticker in tickers
+            )
+        )
+
+        self.assertEqual(sorted(results), sorted(tickers))
+        self.assertEqual(results["T0"], [{"ticker": "T0", "date": "2020-01-01"}])
+        self.assertIsNotNone(results["RETRY"])
+        self.assertEqual(attempts["RETRY"], 2)
+        self.assertIsNone(results["FAIL"])
+        self.assertEqual(attempts["FAIL"], 3)
+
+    def test_fetch_batches(self) -> None:
+        """
+        Test tickers with same date window are fetched in batches.
+        @return: None
+        """
+        calls = []
+
+        def fetch_function(tickers, start_date, end_date):
+            calls.append((tuple(tickers), start_date))
+            return {
+                ticker: [{"ticker": ticker}] if index else []
+                for index, ticker in enumerate(tickers)
+            }
+
+        price_fetcher = PriceFetcher(
+            fetch_function,
+            workers=2,
+            requests_per_second=1000,
+            burst=10,
+            retries=0,
+            backoff=0,
+            batch_size=3,
+        )
+        requests = [
+            ("A", "2020-01-01", "2020-01-02"),
+            ("B", "2020-01-01", "2020-01-02"),
+        ]
+        requests += [("C", "2019-01-01", "2020-01-02")]
+        requests += [(ticker, "2020-01-01", "2020-01-02") for ticker in "DEF"]
+        results = dict(price_fetcher.fetch(requests))
+
+        self.assertEqual(
+            sorted(calls),
+            [
+                (("A", "B", "D"), "2020-01-01"),
+                (("C",), "2019-01-01"),
+                (("E", "F"), "2020-01-01"),
+            ],
+        )
+        self.assertEqual(results["A"], [])
+        self.assertEqual(results["B"], [{"ticker": "B"}])
+        self.assertEqual(len(results), 6)
+
+    def test_fetch_missing_tickers(self) -> None:
+        """
+        Test only tickers missing from the provider response are retried, taking one token per ticker.
+        @return: None
+        """
+        calls = []
+
+        def fetch_function(tickers, start_date, end_date):
+            calls.append(tuple(tickers))
+            return {ticker: [] for ticker in tickers[len(calls) == 1 :]}
+
+        price_fetcher = PriceFetcher(
+            fetch_function,
+            workers=1,
+            requests_per_second=1000,
+            burst=10,
+            retries=1,
+            backoff=0,
+            batch_size=2,
+        )
+        results = dict(
+            price_fetcher.fetch(
+                [(ticker, "2020-01-01", "2020-01-02") for ticker in "AB"]
+            )
+        )
+
+        self.assertEqual(calls, [("A", "B"), ("A",)])
+        self.assertEqual(results, {"A": [], "B": []})
+
+    def test_fetch_batch_tokens(self) -> None:
+        """
+        Test a batch larger than burst takes one token per ticker, without waiting for more tokens than the bucket
+        capacity.
+        @return: None
+        """
+        price_fetcher = PriceFetcher(
+            lambda tickers, start_date, end_date: {ticker: [] for ticker in tickers},
+            workers=1,
+            requests_per_second=1,
+            burst=2,
+            retries=0,
+            backoff=0,
+            batch_size=4,
+        )
+        acquire = mock.patch.object(
+            TokenBucket, "acquire", autospec=True, side_effect=TokenBucket.acquire
+        ).start()
+        self.addCleanup(mock.patch.stopall)
+
+        results = price_fetcher.fetch_batch(list("ABCD"), "2020-01-01", "2020-01-02")
+
+        self.assertEqual(results, [(ticker, []) for ticker in "ABCD"])
+        acquire.assert_called_once_with(mock.ANY, 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
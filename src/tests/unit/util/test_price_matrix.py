@@ -0,0 +1,197 @@
+"""
+PriceMatrix test case.
+"""
+
+import unittest
+
+import numpy
+
+from util.price_store.price_matrix import PriceMatrix
+from util.price_store.price_store import TickerPrices
+from webserver.model.backtest import BacktestEngine
+
+NAN = numpy.nan
+
+
+class TestPriceMatrix(unittest.TestCase):
+    """
+    Unit test case for aligned close price matrix - PriceMatrix class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup matrix with gaps and a ticker listed later.
+        @return: None
+        """
+        self.price_matrix = PriceMatrix(
+            tickers=["AAA", "BBB", "CCC"],
+            days=numpy.arange(18000, 18004),
+            closes=numpy.array(
+                [
+                    [10.0, NAN, NAN],
+                    [NAN, 20.0, NAN],
+                    [12.0, NAN, NAN],
+                    [15.0, 30.0, NAN],
+                ]
+            ),
+        )
+
+    def test_get_dates(self) -> None:
+        """
+        Test days to date strings.
+        @return: None
+        """
+        self.assertEqual(
+            self.price_matrix.get_dates(),
+            ["2019-04-14", "2019-04-15", "2019-04-16", "2019-04-17"],
+        )
+
+    def test_forward_fill(self) -> None:
+        """
+        Test gaps are forward filled; leading gaps are not.
+        @return: None
+        """
+        filled = self.price_matrix.forward_fill()
+        self.assertEqual(filled[:, 0].tolist(), [10.0, 10.0, 12.0, 15.0])
+        self.assertTrue(numpy.isnan(filled[0, 1]))
+        self.assertEqual(filled[1:, 1].tolist(), [20.0, 20.0, 30.0])
+        self.assertTrue(numpy.isnan(filled[:, 2]).all())
+
+    def test_relative_prices(self) -> None:
+        """
+        Test relative prices are 1 before first known price.
+        @return: None
+        """
+        relative_prices = self.price_matrix.relative_prices()
+        self.assertEqual(relative_prices[:, 0].tolist(), [1.0, 1.0, 1.2, 1.5])
+        self.assertEqual(relative_prices[:, 1].tolist(), [1.0, 1.0, 1.0, 1.5])
+        self.assertEqual(relative_prices[:, 2].tolist(), [1.0, 1.0, 1.0, 1.0])
+
+    def test_backtest(self) -> None:
+        """
+        Test daily NAV and returns of buy and hold backtest.
+        @return: None
+        """
+        backtest_info = BacktestEngine.backtest(
+            tickers=self.price_matrix.tickers,
+            percentages=[50, 25, 25],
+            start_ts=0,
+            end_ts=0,
+            price_matrix=self.price_matrix,
+        )
+        self.assertEqual(backtest_info["nav"], [1.0, 1.0, 1.1, 1.375])
+        self.assertEqual(backtest_info["daily_returns"], [0.0, 0.0, 0.1, 0.25])
+        self.assertEqual(backtest_info["cumulative_returns"], [0.0, 0.0, 0.1, 0.375])
+        self.assertEqual(backtest_info["total_return_percentage"], 37.5)
+        self.assertEqual(
+            backtest_info["portfolio_data"]["AAA"]["return_percentage"], 50.0
+        )
+
+    def test_backtest_batch(self) -> None:
+        """
+        Test portfolios backtested on shared matrix match individual backtests.
+        @return: None
+        """
+        backtests = BacktestEngine.backtest_batch(
+            {
+                "p1": (["AAA", "BBB", "CCC"], [50, 25, 25]),
+                "p2": (["BBB"], [100]),
+            },
+            start_ts=0,
+            end_ts=0,
+            price_matrix=self.price_matrix,
+            include_timeseries=False,
+        )
+        self.assertEqual(backtests["p1"]["total_return_percentage"], 37.5)
+        self.assertNotIn("nav", backtests["p1"])
+        self.assertEqual(backtests["p2"]["total_return_percentage"], 50.0)
+        self.assertEqual(list(backtests["p2"]["portfolio_data"].keys()), ["BBB"])
+
+        backtests = BacktestEngine.backtest_batch(
+            {"p2": (["BBB"], [100])},
+            start_ts=0,
+            end_ts=0,
+            price_matrix=self.price_matrix,
+        )
+        self.assertEqual(backtests["p2"]["dates"], ["2019-04-15", "2019-04-17"])
+        self.assertEqual(backtests["p2"]["nav"], [1.0, 1.5])
+
+    def test_backtest_summary_batch(self) -> None:
+        """
+        Test summary backtests of a batch match single portfolio backtests (first/last price returns).
+        @return: None
+        """
+
+        class FakePriceStore:
+            ticker_prices = {
+                "AAA": TickerPrices.from_rows(
+                    "AAA",
+                    [
+                        {"date": 86400 * day, "close": close}
+                        for day, close in [(1, 10), (2, 12.5), (3, 15)]
+                    ],
+                ),
+            }
+
+            def get_ticker_prices(self, ticker):
+                return self.ticker_prices.get(ticker.upper(), None)
+
+            def get_range(self, ticker, start_ts, end_ts):
+                ticker_prices = self.get_ticker_prices(ticker)
+                if ticker_prices is None:
+                    return None
+                return ticker_prices.get_range(start_ts, end_ts)
+
+        portfolios = {"p1": (["AAA", "BBB"], [50, 50]), "p2": (["aaa"], [100])}
+        backtests = BacktestEngine.backtest_summary_batch(
+            portfolios, 0, 86400 * 10, price_store=FakePriceStore()
+        )
+        self.assertEqual(
+            backtests["p1"]["portfolio_data"]["AAA"],
+            {
+                86400: 10,
+                259200: 15,
+                "return_value_per_share": 5,
+                "return_percentage": 50.0,
+            },
+        )
+        self.assertEqual(
+            backtests["p1"]["portfolio_data"]["BBB"]["return_percentage"], 0
+        )
+        self.assertEqual(backtests["p1"]["total_return_percentage"], 25.0)
+        self.assertEqual(backtests["p2"]["total_return_percentage"], 50.0)
+        for key, portfolio in portfolios.items():
+            self.assertEqual(
+                BacktestEngine.backtest_summary_batch(
+                    {key: portfolio}, 0, 86400 * 10, price_store=FakePriceStore()
+                ),
+                {key: backtests[key]},
+            )
+
+        backtests = BacktestEngine.backtest_summary_batch(
+            portfolios,
+            0,
+            86400 * 10,
+            price_store=FakePriceStore(),
+            include_risk_metrics=True,
+        )
+        self.assertIn("sharpe_ratio", backtests["p2"]["risk_metrics"])
+        self.assertNotIn("nav", backtests["p2"])
+
+    def test_backtest_risk_metrics(self) -> None:
+        """
+        Test risk metrics are computed from backtest NAV.
+        @return: None
+        """
+        backtest_info = BacktestEngine.backtest(
+            tickers=["AAA"],
+            percentages=[100],
+            start_ts=0,
+            end_ts=0,
+            price_matrix=self.price_matrix,
+            include_risk_metrics=True,
+        )
+        self.assertEqual(
+            backtest_info["risk_metrics"]["max_drawdown"]["percentage"], 0.0
+        )
+        self.assertIn("sortino_ratio", backtest_info["risk_metrics"])
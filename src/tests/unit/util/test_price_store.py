@@ -0,0 +1,392 @@
+"""
+TickerPrices and PriceStore test case.
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+import numpy
+
+from util.price_store.price_archive import TOMBSTONES_SUFFIX, PriceArchive
+from util.price_store.price_store import PRICE_COLUMNS, PriceStore, TickerPrices
+
+
+class FakeElasticsearchDBI:
+    """
+    Minimal stock_prices index used by PriceStore: documents by date, stats aggregations (optionally filtered by a
+    date range) and scrolls filtered by a date range.
+    """
+
+    def __init__(self):
+        self.documents = {}
+        self.scrolled_documents = 0
+
+    @staticmethod
+    def in_range(source, date_range) -> bool:
+        return ("gt" not in date_range or source["date"] > date_range["gt"]) and (
+            "lte" not in date_range or source["date"] <= date_range["lte"]
+        )
+
+    def get_aggregations(self, sources, aggregations) -> dict:
+        results = {}
+        for name, aggregation in aggregations.items():
+            if "filter" in aggregation:
+                date_range = aggregation["filter"]["range"]["date"]
+                results[name] = self.get_aggregations(
+                    [source for source in sources if self.in_range(source, date_range)],
+                    aggregation["aggs"],
+                )
+                continue
+
+            values = [source[aggregation["stats"]["field"]] for source in sources]
+            results[name] = {
+                "count": len(values),
+                "min": min(values, default=None),
+                "max": max(values, default=None),
+                "sum": sum(values),
+            }
+        return results
+
+    def search_documents(self, index, query_body=None, size=10000) -> dict:
+        return {
+            "aggregations": self.get_aggregations(
+                list(self.documents.values()), query_body["aggs"]
+            )
+        }
+
+    def scroll_search_documents_generator(
+        self, index, query_body=None, raise_on_error=False
+    ) -> object:
+        date_range = {}
+        for clause in query_body["query"]["bool"]["must"]:
+            if "range" in clause:
+                date_range = clause["range"]["date"]
+        for source in list(self.documents.values()):
+            if self.in_range(source, date_range):
+                self.scrolled_documents += 1
+                yield {"_source": source}
+
+
+class TestTickerPrices(unittest.TestCase):
+    """
+    Unit test case for columnar ticker price history - TickerPrices class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup unsorted price rows with a duplicate date.
+        @return: None
+        """
+        self.rows = [
+            {"date": 300, "open": 3, "high": 3, "low": 3, "close": 3, "volume": 30},
+            {"date": 100, "open": 1, "high": 1, "low": 1, "close": 1, "volume": 10},
+            {"date": 200, "open": 2, "high": 2, "low": 2, "close": 2, "volume": 20},
+            {"date": 100, "open": 4, "high": 4, "low": 4, "close": 4, "volume": 40},
+        ]
+        self.ticker_prices = TickerPrices.from_rows("TEST", self.rows)
+
+    def test_from_rows(self) -> None:
+        """
+        Test rows are sorted by date and last duplicate date wins.
+        @return: None
+        """
+        self.assertEqual(len(self.ticker_prices), 3)
+        self.assertEqual(self.ticker_prices.columns["date"].tolist(), [100, 200, 300])
+        self.assertEqual(self.ticker_prices.columns["close"].tolist(), [4, 2, 3])
+        self.assertEqual(self.ticker_prices.get_last_date(), 300)
+
+    def test_source_types(self) -> None:
+        """
+        Test integer columns and ticker spelling of source rows are kept across merges.
+        @return: None
+        """
+        self.assertEqual(self.ticker_prices.int_columns, frozenset(PRICE_COLUMNS))
+        self.assertEqual(self.ticker_prices.source_ticker, "TEST")
+
+        merged = self.ticker_prices.merge(
+            TickerPrices.from_rows(
+                "TEST", [{"ticker": "test", "date": 400, "close": 6.5, "volume": 60}]
+            )
+        )
+        self.assertEqual(merged.int_columns, frozenset(["date", "volume"]))
+        self.assertEqual(merged.source_ticker, "test")
+
+    def test_get_range(self) -> None:
+        """
+        Test range bounds are inclusive.
+        @return: None
+        """
+        self.assertEqual(self.ticker_prices.get_range_indices(100, 200), (0, 2))
+        self.assertEqual(self.ticker_prices.get_range_indices(101, 299), (1, 2))
+        self.assertEqual(self.ticker_prices.get_range_indices(400, 500), (3, 3))
+        self.assertEqual(
+            self.ticker_prices.get_range(150, 300)["volume"].tolist(), [20, 30]
+        )
+
+    def test_merge(self) -> None:
+        """
+        Test merged rows overwrite existing dates.
+        @return: None
+        """
+        merged = self.ticker_prices.merge(
+            TickerPrices.from_rows(
+                "TEST",
+                [
+                    {"date": 300, "close": 5},
+                    {"date": 400, "close": 6},
+                ],
+            )
+        )
+        self.assertEqual(merged.columns["date"].tolist(), [100, 200, 300, 400])
+        self.assertEqual(merged.columns["close"].tolist(), [4, 2, 5, 6])
+
+    def test_get_range_digest(self) -> None:
+        """
+        Test range digest only changes when rows in range change.
+        @return: None
+        """
+        digest = self.ticker_prices.get_range_digest(0, 2)
+        self.assertEqual(
+            digest, TickerPrices.from_rows("TEST", self.rows).get_range_digest(0, 2)
+        )
+        self.assertNotEqual(digest, self.ticker_prices.get_range_digest(0, 3))
+
+        appended = self.ticker_prices.merge(
+            TickerPrices.from_rows("TEST", [{"date": 400, "close": 6}])
+        )
+        self.assertEqual(appended.get_range_digest(0, 2), digest)
+
+        overwritten = self.ticker_prices.merge(
+            TickerPrices.from_rows("TEST", [{"date": 200, "close": 6}])
+        )
+        self.assertNotEqual(overwritten.get_range_digest(0, 2), digest)
+
+
+class TestPriceStore(unittest.TestCase):
+    """
+    Unit test case for in-process price store - PriceStore class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup price store backed by a fake stock_prices index.
+        @return: None
+        """
+        self.es_dbi = FakeElasticsearchDBI()
+        for date in [100, 200, 300]:
+            self.index_price(date, date / 100)
+
+        patcher = mock.patch(
+            "util.price_store.price_store.ElasticsearchDBI.get_instance",
+            return_value=self.es_dbi,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # test price stores are created directly, whatever singleton other tests created
+        patcher = mock.patch.object(PriceStore, "instance", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.price_store = PriceStore(max_tickers=10, ttl=60)
+
+    def index_price(self, date, close) -> None:
+        """
+        Index (or overwrite) a price document as another process would.
+        @param date: int
+        @param close: float
+        @return: None
+        """
+        self.es_dbi.documents[date] = {
+            "ticker": "TEST",
+            "date": date,
+            "open": close,
+            "high": close,
+            "low": close,
+            "close": close,
+            "volume": 10,
+        }
+
+    def expire(self) -> None:
+        """
+        Age loaded price history past the TTL.
+        @return: None
+        """
+        self.price_store.get_ticker_prices("TEST").loaded_ts = time.time() - 120
+
+    def test_unchanged_index(self) -> None:
+        """
+        Test expired price history is kept when stock_prices documents did not change.
+        @return: None
+        """
+        ticker_prices = self.price_store.get_ticker_prices("TEST")
+        self.expire()
+        self.assertIs(self.price_store.get_ticker_prices("TEST"), ticker_prices)
+
+    def test_reload_on_external_changes(self) -> None:
+        """
+        Test overwrites and deletes of older documents by other processes are picked up after the TTL.
+        @return: None
+        """
+        self.price_store.get_ticker_prices("TEST")
+        self.index_price(200, 5)
+        del self.es_dbi.documents[100]
+
+        self.assertEqual(
+            self.price_store.get_ticker_prices("TEST").columns["close"].tolist(),
+            [1, 2, 3],
+        )
+
+        self.expire()
+        ticker_prices = self.price_store.get_ticker_prices("TEST")
+        self.assertEqual(ticker_prices.columns["date"].tolist(), [200, 300])
+        self.assertEqual(ticker_prices.columns["close"].tolist(), [5, 3])
+
+
+class TestPriceStoreArchive(unittest.TestCase):
+    """
+    Unit test case for price store backed by a price archive - PriceStore class.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup archive with 3 prices and a fake stock_prices index overwriting the last one.
+        @return: None
+        """
+        self.test_dir = tempfile.mkdtemp()
+        self.test_archive_path = os.path.join(self.test_dir, "test_prices.bin")
+        PriceArchive.write(
+            self.test_archive_path,
+            tickers=["TEST"],
+            ticker_codes=numpy.zeros(3, dtype=numpy.int32),
+            columns={
+                column: (
+                    numpy.array([100.0, 200.0, 300.0])
+                    if column == "date"
+                    else (
+                        numpy.array([10.0, 20.0, 30.0])
+                        if column == "volume"
+                        else numpy.array([1.1, 2.2, 3.3])
+                    )
+                )
+                for column in PRICE_COLUMNS
+            },
+            int_columns=["date", "volume"],
+        )
+
+        self.es_dbi = FakeElasticsearchDBI()
+        self.es_dbi.documents[300] = {
+            "ticker": "TEST",
+            **{column: 5.0 for column in PRICE_COLUMNS},
+            "date": 300,
+        }
+
+        patcher = mock.patch(
+            "util.price_store.price_store.ElasticsearchDBI.get_instance",
+            return_value=self.es_dbi,
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        # test price stores are created directly, whatever singleton other tests created
+        patcher = mock.patch.object(PriceStore, "instance", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self) -> None:
+        """
+        Delete test archive and tombstones.
+        @return: None
+        """
+        for path in [
+            self.test_archive_path,
+            self.test_archive_path + TOMBSTONES_SUFFIX,
+        ]:
+            if os.path.isfile(path):
+                os.remove(path)
+        os.rmdir(self.test_dir)
+
+    def get_price_store(self) -> PriceStore:
+        """
+        New price store, as in another process.
+        @return: PriceStore
+        """
+        return PriceStore(
+            max_tickers=10, ttl=60, archive=PriceArchive(self.test_archive_path)
+        )
+
+    def test_indexed_prices_overwrite_archive(self) -> None:
+        """
+        Test indexed prices overwrite archived prices of the same date.
+        @return: None
+        """
+        ticker_prices = self.get_price_store().get_ticker_prices("TEST")
+        self.assertEqual(ticker_prices.columns["date"].tolist(), [100, 200, 300])
+        self.assertEqual(ticker_prices.columns["close"].tolist(), [1.1, 2.2, 5])
+
+    def index_archived_prices(self) -> None:
+        """
+        Index archived prices as populate script does. Price fields are mapped as float in stock_prices index.
+        @return: None
+        """
+        self.es_dbi.documents.clear()
+        for price in PriceArchive(self.test_archive_path).iter_rows("TEST"):
+            self.es_dbi.documents[price["date"]] = {
+                column: (float(numpy.float32(value)) if type(value) is float else value)
+                for column, value in price.items()
+            }
+
+    def test_load_newer_indexed_prices(self) -> None:
+        """
+        Test only indexed prices newer than archived ones are loaded when indexed prices of archived dates match the
+        archive, and overwrites of archived dates are detected by the marker.
+        @return: None
+        """
+        self.index_archived_prices()
+        self.es_dbi.documents[400] = {
+            "ticker": "TEST",
+            **{column: 4.4 for column in PRICE_COLUMNS},
+            "date": 400,
+            "volume": 40,
+        }
+
+        price_store = self.get_price_store()
+        ticker_prices = price_store.get_ticker_prices("TEST")
+        self.assertEqual(ticker_prices.columns["date"].tolist(), [100, 200, 300, 400])
+        self.assertEqual(ticker_prices.columns["close"].tolist(), [1.1, 2.2, 3.3, 4.4])
+        self.assertEqual(self.es_dbi.scrolled_documents, 1)
+
+        # unchanged index
+        ticker_prices.loaded_ts = time.time() - 120
+        self.assertIs(price_store.get_ticker_prices("TEST"), ticker_prices)
+        self.assertEqual(self.es_dbi.scrolled_documents, 1)
+
+        # archived date overwritten by another process
+        self.es_dbi.documents[200] = dict(self.es_dbi.documents[200], close=7.0)
+        ticker_prices.loaded_ts = time.time() - 120
+        ticker_prices = price_store.get_ticker_prices("TEST")
+        # all prices reloaded, indexed prices overwrite archived ones
+        self.assertEqual(
+            ticker_prices.columns["close"].tolist(),
+            [float(numpy.float32(1.1)), 7.0, float(numpy.float32(3.3)), 4.4],
+        )
+        self.assertEqual(self.es_dbi.scrolled_documents, 5)
+
+    def test_delete(self) -> None:
+        """
+        Test archived prices of deleted ticker are ignored by all processes, including already loaded ones.
+        @return: None
+        """
+        other_price_store = self.get_price_store()
+        other_price_store.get_ticker_prices("TEST")
+
+        self.es_dbi.documents.clear()
+        self.get_price_store().delete("TEST")
+
+        self.assertIsNone(self.get_price_store().get_ticker_prices("TEST"))
+
+        other_price_store.get_ticker_prices("TEST").loaded_ts = time.time() - 120
+        self.assertIsNone(other_price_store.get_ticker_prices("TEST"))
@@ -0,0 +1,152 @@
+"""
+CachedProvider test case.
+"""
+
+import datetime
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from util.market_data.cached_provider import CachedProvider
+from util.market_data.fake_provider import FakeProvider
+from util.market_data.provider_cache import ProviderCache
+
+
+class CountingProvider(FakeProvider):
+    """
+    Fake provider recording history calls.
+    """
+
+    def __init__(self):
+        """
+        Fake provider with no latency.
+        """
+        super().__init__()
+        self.calls = []
+
+    def get_info(self, ticker) -> dict:
+        """
+        @param ticker: string
+        @return: dict
+        """
+        self.calls.append(("info", ticker))
+        return super().get_info(ticker)
+
+    def get_batch_history(self, tickers, start_date, end_date) -> dict:
+        """
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD"
+        @return: dict
+        """
+        self.calls.append((tuple(tickers), start_date, end_date))
+        return super().get_batch_history(tickers, start_date, end_date)
+
+
+class TestProviderCache(unittest.TestCase):
+    """
+    Unit test case for on-disk provider cache - ProviderCache and CachedProvider classes.
+    """
+
+    def setUp(self) -> None:
+        """
+        Setup cached fake provider on temporary SQLite file.
+        @return: None
+        """
+        self.directory = tempfile.mkdtemp()
+        self.provider = CountingProvider()
+        self.cache = ProviderCache(
+            os.path.join(self.directory, "cache.sqlite"),
+            info_ttl=60,
+            history_ttl=60,
+        )
+        self.cached_provider = CachedProvider(self.provider, self.cache, recent_days=3)
+
+    def tearDown(self) -> None:
+        """
+        Remove temporary SQLite file.
+        @return: None
+        """
+        shutil.rmtree(self.directory)
+
+    def test_get_batch_history(self) -> None:
+        """
+        Test cached windows are not fetched again and only missing head/tail windows are fetched.
+        @return: None
+        """
+        history = self.cached_provider.get_batch_history(
+            ["AAA", "BBB"], "2020-01-01", "2020-03-01"
+        )
+        self.assertEqual(
+            history["AAA"],
+            FakeProvider().get_history("AAA", "2020-01-01", "2020-03-01"),
+        )
+        self.assertEqual(
+            self.provider.calls, [(("AAA", "BBB"), "2020-01-01", "2020-03-01")]
+        )
+
+        # overlapping windows, only missing tail and head fetched
+        self.provider.calls = []
+        self.assertEqual(
+            self.cached_provider.get_history("AAA", "2020-02-01", "2020-02-15"),
+            FakeProvider().get_history("AAA", "2020-02-01", "2020-02-15"),
+        )
+        self.assertEqual(self.provider.calls, [])
+
+        self.assertEqual(
+            self.cached_provider.get_batch_history(
+                ["AAA", "BBB"], "2019-12-01", "2020-04-01"
+            )["BBB"],
+            FakeProvider().get_history("BBB", "2019-12-01", "2020-04-01"),
+        )
+        self.assertEqual(
+            self.provider.calls,
+            [
+                (("AAA", "BBB"), "2019-12-01", "2020-01-01"),
+                (("AAA", "BBB"), "2020-03-01", "2020-04-01"),
+            ],
+        )
+
+    def test_recent_days_and_expiry(self) -> None:
+        """
+        Test last recent days are fetched again, expired windows fully fetched again.
+        @return: None
+        """
+        today = datetime.datetime.utcnow().date()
+        start_date = (today - datetime.timedelta(days=30)).isoformat()
+        end_date = today.isoformat()
+        cacheable_end_date = (today - datetime.timedelta(days=3)).isoformat()
+
+        self.cached_provider.get_history("AAA", start_date, end_date)
+        self.assertEqual(
+            self.cache.get_window("fake", "AAA"), (start_date, cacheable_end_date)
+        )
+
+        self.provider.calls = []
+        self.cached_provider.get_history("AAA", start_date, end_date)
+        self.assertEqual(
+            self.provider.calls, [(("AAA",), cacheable_end_date, end_date)]
+        )
+
+        self.cache.history_ttl = -1
+        self.assertIsNone(self.cache.get_window("fake", "AAA"))
+        self.assertEqual(self.cache.get_prices("fake", "AAA", 0, time.time()), [])
+
+    def test_get_info(self) -> None:
+        """
+        Test info is fetched once until expired.
+        @return: None
+        """
+        info = self.cached_provider.get_info("AAA")
+        self.assertEqual(self.cached_provider.get_info("AAA"), info)
+        self.assertEqual(self.provider.calls, [("info", "AAA")])
+
+        self.cache.info_ttl = -1
+        self.cached_provider.get_info("AAA")
+        self.assertEqual(len(self.provider.calls), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,269 @@
+"""
+In-process prefix index over stock tickers, company names and tags.
+"""
+
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.logger.logger import Logger
+
+# matched fields, in ranking order
+FIELD_TICKER = "ticker"
+FIELD_NAME = "name"
+FIELD_NAME_TOKEN = "name_token"
+FIELD_TAG = "tag"
+FIELDS = [FIELD_TICKER, FIELD_NAME, FIELD_NAME_TOKEN, FIELD_TAG]
+
+TOKEN_SEPARATORS = re.compile(r"[\s,.&()/-]+")
+
+# seconds before retrying a failed build
+BUILD_RETRY_DELAY = 30
+
+
+class AutocompleteIndex:
+    """
+    One sorted array of lowercase keys per field. A prefix query is a binary search followed by a scan of the keys
+    sharing the prefix, field by field in ranking order (ticker, full name, name word, tag), stopping as soon as top k
+    distinct tickers are found. Inside a field, matches are ranked alphabetically, so an exact match comes first.
+    Index is built from the stocks index, updated on stock add/update/delete and fully rebuilt after ttl seconds to
+    catch changes made by other webserver workers. Only the first build blocks requests: expired index is rebuilt in
+    background by one thread at a time while requests keep using the current index, which is also kept on failure.
+    """
+
+    instance = None
+
+    def __init__(self, ttl):
+        """
+        Singleton class constructor. Must not be called directly.
+        @param ttl: int, seconds after which index is rebuilt from stocks index
+        """
+        if AutocompleteIndex.instance:
+            raise Exception(
+                "Singleton AutocompleteIndex called directly. Use AutocompleteIndex.get_instance() method"
+            )
+
+        self.__ttl = ttl
+        self.__built_ts = None
+        self.__failed_ts = None
+        self.__lock = threading.RLock()
+        # held by the (single) running build
+        self.__build_lock = threading.Lock()
+        # field -> sorted list of (key, ticker)
+        self.__keys = {field: [] for field in FIELDS}
+        # ticker -> (display name, {(field, key): display value})
+        self.__tickers = {}
+
+    @staticmethod
+    def get_instance() -> "AutocompleteIndex":
+        """
+        Returns existing instance of AutocompleteIndex class, or creates new instance if none exists.
+        @return: AutocompleteIndex object
+        """
+        if AutocompleteIndex.instance is None:
+            AutocompleteIndex.instance = AutocompleteIndex(
+                ttl=config.AUTOCOMPLETE_INDEX_TTL
+            )
+        return AutocompleteIndex.instance
+
+    def __len__(self) -> int:
+        return len(self.__tickers)
+
+    ##########
+    # ACCESS #
+    ##########
+
+    def suggest(self, prefix, top_k=10) -> list:
+        """
+        Top k tickers matching prefix.
+        @param prefix: string
+        @param top_k: int
+        @return: list of dicts {ticker, name, match, value}
+        """
+        self.refresh()
+
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+
+        suggestions = {}
+        with self.__lock:
+            for field in FIELDS:
+                keys = self.__keys[field]
+                position = bisect_left(keys, (prefix,))
+                while (
+                    position < len(keys)
+                    and len(suggestions) < top_k
+                    and keys[position][0].startswith(prefix)
+                ):
+                    key, ticker = keys[position]
+                    if ticker not in suggestions:
+                        name, entries = self.__tickers[ticker]
+                        suggestions[ticker] = {
+                            "ticker": ticker,
+                            "name": name,
+                            "match": field,
+                            "value": entries[(field, key)],
+                        }
+                    position += 1
+
+        return list(suggestions.values())
+
+    ##########
+    # UPDATE #
+    ##########
+
+    def needs_build(self) -> bool:
+        """
+        Whether index was never built or expired, and no build failed in the last BUILD_RETRY_DELAY seconds.
+        @return: boolean
+        """
+        now = time.time()
+        if self.__failed_ts is not None and now - self.__failed_ts < BUILD_RETRY_DELAY:
+            return False
+        return self.__built_ts is None or now - self.__built_ts >= self.__ttl
+
+    def refresh(self) -> None:
+        """
+        Build index if never built, waiting for a build already running. Rebuild expired index in a background thread,
+        unless a build is already running.
+        @return: None
+        """
+        if not self.needs_build():
+            return
+
+        if self.__built_ts is None:
+            with self.__build_lock:
+                if self.needs_build():
+                    self.__build()
+        elif self.__build_lock.acquire(blocking=False):
+            try:
+                threading.Thread(target=self.__background_build, daemon=True).start()
+            except Exception:
+                self.__build_lock.release()
+                raise
+
+    def build(self, stocks=None) -> bool:
+        """
+        (Re)build index. Current index is kept if build fails.
+        @param stocks: iterable of (ticker, stock info) (default scroll stocks index)
+        @return: boolean
+        """
+        with self.__build_lock:
+            return self.__build(stocks)
+
+    def __background_build(self) -> None:
+        """
+        Rebuild index and release build lock acquired by refresh.
+        @return: None
+        """
+        try:
+            self.__build()
+        finally:
+            self.__build_lock.release()
+
+    def __build(self, stocks=None) -> bool:
+        """
+        (Re)build index. Build lock must be held.
+        @param stocks: iterable of (ticker, stock info) (default scroll stocks index)
+        @return: boolean
+        """
+        if stocks is None:
+            stocks = AutocompleteIndex.scroll_stocks()
+
+        keys = {field: [] for field in FIELDS}
+        tickers = {}
+        try:
+            for ticker, stock_info in stocks:
+                ticker = ticker.upper()
+                tickers[ticker] = AutocompleteIndex.get_ticker_entries(
+                    ticker, stock_info
+                )
+                for field, key in tickers[ticker][1]:
+                    keys[field].append((key, ticker))
+        except Exception as e:
+            Logger.exception("Could not build autocomplete index. {}".format(str(e)))
+            # keep current index, retry after BUILD_RETRY_DELAY
+            self.__failed_ts = time.time()
+            return False
+
+        for field_keys in keys.values():
+            field_keys.sort()
+
+        with self.__lock:
+            self.__keys = keys
+            self.__tickers = tickers
+            self.__built_ts = time.time()
+            self.__failed_ts = None
+        return True
+
+    def add(self, ticker, stock_info) -> None:
+        """
+        Add/replace stock entries.
+        @param ticker: string
+        @param stock_info: dict, stock document source (names, tags)
+        @return: None
+        """
+        ticker = ticker.upper()
+        with self.__lock:
+            self.remove(ticker)
+            self.__tickers[ticker] = AutocompleteIndex.get_ticker_entries(
+                ticker, stock_info
+            )
+            for field, key in self.__tickers[ticker][1]:
+                insort(self.__keys[field], (key, ticker))
+
+    def remove(self, ticker) -> None:
+        """
+        Remove stock entries.
+        @param ticker: string
+        @return: None
+        """
+        ticker = ticker.upper()
+        with self.__lock:
+            if ticker not in self.__tickers:
+                return
+            for field, key in self.__tickers.pop(ticker)[1]:
+                keys = self.__keys[field]
+                position = bisect_left(keys, (key, ticker))
+                if position < len(keys) and keys[position] == (key, ticker):
+                    del keys[position]
+
+    @staticmethod
+    def scroll_stocks() -> object:
+        """
+        Names and tags of all stocks in stocks index (generator).
+        @return: generator of (ticker, stock info)
+        """
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        for stock_document in es_dbi.scroll_search_documents_generator(
+            config.ES_INDEX_STOCKS,
+            query_body={"_source": ["names", "tags"], "query": {"match_all": {}}},
+            raise_on_error=True,
+        ):
+            yield stock_document["_id"], stock_document["_source"]
+
+    @staticmethod
+    def get_ticker_entries(ticker, stock_info) -> tuple:
+        """
+        Index entries of stock: ticker, full names, name words and tags.
+        @param ticker: string
+        @param stock_info: dict, stock document source (names, tags)
+        @return: tuple (display name, {(field, lowercase key): display value})
+        """
+        names = [name for name in stock_info.get("names", None) or [] if name]
+        entries = {(FIELD_TICKER, ticker.lower()): ticker}
+        for name in names:
+            entries[(FIELD_NAME, name.lower())] = name
+            for token in TOKEN_SEPARATORS.split(name):
+                if token:
+                    entries.setdefault((FIELD_NAME_TOKEN, token.lower()), name)
+        for tag in stock_info.get("tags", None) or []:
+            if tag:
+                entries[(FIELD_TAG, tag.lower())] = tag
+        return names[0] if names else ticker, entries
@@ -0,0 +1,88 @@
+"""
+Bounded in-process LRU cache with TTL.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Least recently used cache. Entries expire after ttl seconds.
+    """
+
+    def __init__(self, max_size, ttl):
+        """
+        @param max_size: int, max number of entries
+        @param ttl: int, entry time to live in seconds
+        """
+        self.__max_size = max_size
+        self.__ttl = ttl
+        self.__entries = OrderedDict()
+        self.__hits = 0
+        self.__misses = 0
+        self.__lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self.__entries)
+
+    def get(self, key) -> object:
+        """
+        Get cached value. Counts cache hit/miss.
+        @param key: hashable
+        @return: object/None
+        """
+        with self.__lock:
+            entry = self.__entries.get(key, None)
+            if entry is not None and time.time() - entry[1] >= self.__ttl:
+                self.__remove(key)
+                entry = None
+
+            if entry is None:
+                self.__misses += 1
+                return None
+
+            self.__entries.move_to_end(key)
+            self.__hits += 1
+            return entry[0]
+
+    def set(self, key, value) -> None:
+        """
+        Cache value. Least recently used entries are evicted when max size is exceeded.
+        @param key: hashable
+        @param value: object
+        @return: None
+        """
+        with self.__lock:
+            self.__remove(key)
+            self.__entries[key] = (value, time.time())
+            while len(self.__entries) > self.__max_size:
+                self.__remove(next(iter(self.__entries)))
+
+    def clear(self) -> None:
+        """
+        Remove all entries. Hit/miss counters are kept.
+        @return: None
+        """
+        with self.__lock:
+            self.__entries.clear()
+
+    def get_stats(self) -> dict:
+        """
+        Cache statistics.
+        @return: dict
+        """
+        with self.__lock:
+            requests = self.__hits + self.__misses
+            return {
+                "size": len(self.__entries),
+                "max_size": self.__max_size,
+                "ttl": self.__ttl,
+                "hits": self.__hits,
+                "misses": self.__misses,
+                "hit_ratio": round(self.__hits / requests, 4) if requests else 0,
+            }
+
+    def __remove(self, key) -> None:
+        self.__entries.pop(key, None)
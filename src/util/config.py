@@ -21,16 +21,101 @@ LOG_DIR = os.path.join(PROJECT_ROOT, "logs")
 
 ELASTICSEARCH_HOST = os.environ.get("ELASTIC_HOST", "localhost")
 ELASTICSEARCH_PORT = os.environ.get("ELASTIC_PORT", 9200)
+ES_POOL_MAXSIZE = int(os.environ.get("ES_POOL_MAXSIZE", 25))
+ES_KEEPALIVE = os.environ.get("ES_KEEPALIVE", "true").lower() in ["true", "1"]
+ES_TIMEOUT = int(os.environ.get("ES_TIMEOUT", 60))
+ES_SEARCH_TIMEOUT = int(os.environ.get("ES_SEARCH_TIMEOUT", ES_TIMEOUT))
+ES_BULK_TIMEOUT = int(os.environ.get("ES_BULK_TIMEOUT", 100))
+ES_MAX_RETRIES = int(os.environ.get("ES_MAX_RETRIES", 10))
+ES_RETRY_ON_TIMEOUT = os.environ.get("ES_RETRY_ON_TIMEOUT", "true").lower() in [
+    "true",
+    "1",
+]
+ES_BULK_MAX_RETRIES = int(os.environ.get("ES_BULK_MAX_RETRIES", 0))
+
 KIBANA_HOST = os.environ.get("KIBANA_HOST", "localhost")
 KIBANA_PORT = os.environ.get("KIBANA_HOST", 5603)
 
 DATASET_STOCKS = os.path.join(PROJECT_ROOT, "data", "dataset_stocks.json")
 DATASET_STOCK_PRICES = os.path.join(PROJECT_ROOT, "data", "dataset_stock_prices.json")
+PRICE_ARCHIVE = os.environ.get(
+    "PRICE_ARCHIVE", os.path.join(PROJECT_ROOT, "data", "stock_prices.bin")
+)
 
 ES_INDEX_STOCKS = "stocks"
 ES_INDEX_STOCK_PRICES = "stock_prices"
 ES_INDEX_PORTFOLIOS = "user_portfolios"
 
+PRICE_STORE_MAX_TICKERS = int(os.environ.get("PRICE_STORE_MAX_TICKERS", 2000))
+PRICE_STORE_TTL = int(os.environ.get("PRICE_STORE_TTL", 3600))
+BACKTEST_CACHE_MAX_SIZE = int(os.environ.get("BACKTEST_CACHE_MAX_SIZE", 1024))
+BACKTEST_CACHE_TTL = int(os.environ.get("BACKTEST_CACHE_TTL", 6 * 3600))
+AUTOCOMPLETE_INDEX_TTL = int(os.environ.get("AUTOCOMPLETE_INDEX_TTL", 600))
+RISK_FREE_RATE = float(os.environ.get("RISK_FREE_RATE", 0.0))
+PROCESS_POOL_SIZE = int(os.environ.get("PROCESS_POOL_SIZE", os.cpu_count() or 1))
+HISTORICAL_CACHE_MAX_AGE = int(
+    os.environ.get("HISTORICAL_CACHE_MAX_AGE", 30 * 24 * 3600)
+)
+INGEST_PARSERS = int(os.environ.get("INGEST_PARSERS", os.cpu_count() or 1))
+INGEST_SENDERS = int(os.environ.get("INGEST_SENDERS", 4))
+INGEST_QUEUE_SIZE = int(os.environ.get("INGEST_QUEUE_SIZE", 16))
+INGEST_BULK_MAX_RETRIES = int(os.environ.get("INGEST_BULK_MAX_RETRIES", 3))
+INGEST_CHECKPOINT_DIR = os.environ.get(
+    "INGEST_CHECKPOINT_DIR", os.path.join(PROJECT_ROOT, "data", "checkpoints")
+)
+# market data provider: "yahoo" or "fake" (deterministic synthetic prices, for offline load tests)
+MARKET_DATA_PROVIDER = os.environ.get("MARKET_DATA_PROVIDER", "yahoo").lower()
+FAKE_PROVIDER_LATENCY = float(os.environ.get("FAKE_PROVIDER_LATENCY", 0.0))
+FAKE_PROVIDER_SEED = int(os.environ.get("FAKE_PROVIDER_SEED", 0))
+# provider responses cache (SQLite file, disabled if empty)
+PROVIDER_CACHE = os.environ.get(
+    "PROVIDER_CACHE", os.path.join(PROJECT_ROOT, "data", "provider_cache.sqlite")
+)
+PROVIDER_CACHE_INFO_TTL = int(os.environ.get("PROVIDER_CACHE_INFO_TTL", 7 * 24 * 3600))
+PROVIDER_CACHE_HISTORY_TTL = int(
+    os.environ.get("PROVIDER_CACHE_HISTORY_TTL", 30 * 24 * 3600)
+)
+PROVIDER_CACHE_RECENT_DAYS = int(os.environ.get("PROVIDER_CACHE_RECENT_DAYS", 3))
+YF_FETCH_WORKERS = int(os.environ.get("YF_FETCH_WORKERS", 16))
+YF_REQUESTS_PER_SECOND = float(os.environ.get("YF_REQUESTS_PER_SECOND", 5))
+YF_BURST = int(os.environ.get("YF_BURST", 10))
+YF_FETCH_RETRIES = int(os.environ.get("YF_FETCH_RETRIES", 3))
+YF_RETRY_BACKOFF = float(os.environ.get("YF_RETRY_BACKOFF", 1.0))
+YF_BATCH_SIZE = int(os.environ.get("YF_BATCH_SIZE", 10))
+SCHEDULER_LOCK_FILE = os.environ.get(
+    "SCHEDULER_LOCK_FILE", os.path.join(PROJECT_ROOT, "data", "price_scheduler.lock")
+)
+SCHEDULER_CLOSE_DELAY = int(os.environ.get("SCHEDULER_CLOSE_DELAY", 3600))
+# markets price updates are scheduled for (after close); tickers with unknown exchanges belong to DEFAULT_MARKET
+MARKET_SCHEDULES = {
+    "US": {
+        "timezone": "America/New_York",
+        "close": "16:00",
+        "days": [0, 1, 2, 3, 4],
+        "exchanges": [
+            "National Market System",
+            "New York Stock Exchange",
+            "Pacific Exchange",
+            "Pink Sheets (OTC)",
+            "NCM Nasdaq Commodities",
+            "BitShares BTS",
+        ],
+    },
+    "NORDIC": {
+        "timezone": "Europe/Stockholm",
+        "close": "17:30",
+        "days": [0, 1, 2, 3, 4],
+        "exchanges": ["Nordic Growth Market"],
+    },
+    "AMMAN": {
+        "timezone": "Asia/Amman",
+        "close": "12:00",
+        "days": [6, 0, 1, 2, 3],
+        "exchanges": ["Amman Stock Exchange"],
+    },
+}
+DEFAULT_MARKET = "US"
+
 DOCKER_LOG_DIR = "/usr/flask-app/logs"
 DOCKER_WEB_REQUESTS_LOGS_FILENAME = "webserver_requests.log"
 NO_LOG_IPS = ["127.0.0.1"]
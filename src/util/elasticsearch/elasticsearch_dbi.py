@@ -3,6 +3,7 @@ Elasticsearch Database Interface class.
 """
 
 import logging
+import os
 import time
 
 from elasticsearch import (
@@ -13,6 +14,7 @@ from elasticsearch import (
     helpers,
 )
 
+from util import config
 from util.logger.logger import Logger
 
 CONNECTION_TRIALS = 3
@@ -21,7 +23,8 @@ CONNECTION_TIMEOUT = 5
 
 class ElasticsearchDBI:
     """
-    Singleton class.
+    Singleton class. One instance (and connection pool) per process: instances inherited from a forked parent
+    process (ex. gunicorn preloaded master) are replaced, so pooled sockets are never shared between processes.
     """
 
     instance = None
@@ -33,19 +36,24 @@ class ElasticsearchDBI:
         @param host: string, elasticsearch host
         @param port: int, elasticsearch port
         """
-        if ElasticsearchDBI.instance:
+        if ElasticsearchDBI.instance and ElasticsearchDBI.instance.pid == os.getpid():
             raise ElasticsearchException(
                 "Singleton Elasticsearch DBI called directly. Use ElasticsearchDBI.get_instance() method"
             )
 
         logging.info("Constructor - Elasticserch DBI @ {0}:{1}".format(host, port))
 
+        self.pid = os.getpid()
         try:
             self.__es = Elasticsearch(
                 [{"host": host, "port": port}],
-                timeout=60,
-                retry_on_timeout=True,
-                max_retries=10,
+                timeout=config.ES_TIMEOUT,
+                retry_on_timeout=config.ES_RETRY_ON_TIMEOUT,
+                max_retries=config.ES_MAX_RETRIES,
+                maxsize=config.ES_POOL_MAXSIZE,
+                headers={
+                    "connection": "keep-alive" if config.ES_KEEPALIVE else "close"
+                },
             )
             self.__host = host
             self.__port = port
@@ -59,36 +67,103 @@ class ElasticsearchDBI:
 
         self.__tracer = logging.getLogger("elasticsearch")
         self.__tracer.setLevel(logging.INFO)
-        self.__tracer.addHandler(logging.FileHandler("elasticsearch.log"))
+        if not self.__tracer.handlers:
+            self.__tracer.addHandler(logging.FileHandler("elasticsearch.log"))
 
     @staticmethod
     def get_instance(host, port):
         """
-        Returns existing api_instance of ElasticsearchDBI class, or creates new api_instance if none exists.
+        Returns existing api_instance of ElasticsearchDBI class, or creates new api_instance if none exists in
+        current process.
         @param host: string
         @param port: string
         @return: ElasticsearchDBI object
         """
-        if ElasticsearchDBI.instance is None:
-            for _ in range(CONNECTION_TRIALS):
-                ElasticsearchDBI.instance = ElasticsearchDBI(host=host, port=port)
-                if ElasticsearchDBI.connected:
-                    break
-                Logger.error(
-                    "Could not connect to Elasticsearch @ {0}:{1}".format(host, port)
-                )
-                ElasticsearchDBI.instance = None
-                time.sleep(CONNECTION_TIMEOUT)
-
-            if not ElasticsearchDBI.connected:
-                raise ElasticsearchException(
-                    "Could not connect to Elasticsearch @ {0}:{1} after {2} trials".format(
-                        host, port, CONNECTION_TRIALS
-                    )
+        if (
+            ElasticsearchDBI.instance is not None
+            and ElasticsearchDBI.instance.pid == os.getpid()
+        ):
+            return ElasticsearchDBI.instance
+
+        # do not use (or close) connections inherited from parent process
+        ElasticsearchDBI.instance = None
+        ElasticsearchDBI.connected = False
+        for _ in range(CONNECTION_TRIALS):
+            ElasticsearchDBI.instance = ElasticsearchDBI(host=host, port=port)
+            if ElasticsearchDBI.connected:
+                break
+            Logger.error(
+                "Could not connect to Elasticsearch @ {0}:{1}".format(host, port)
+            )
+            ElasticsearchDBI.instance = None
+            time.sleep(CONNECTION_TIMEOUT)
+
+        if not ElasticsearchDBI.connected:
+            raise ElasticsearchException(
+                "Could not connect to Elasticsearch @ {0}:{1} after {2} trials".format(
+                    host, port, CONNECTION_TRIALS
                 )
+            )
 
         return ElasticsearchDBI.instance
 
+    @staticmethod
+    def close_instance() -> None:
+        """
+        Close connections of current process instance (if any). Next get_instance call creates a new instance.
+        @return: None
+        """
+        instance = ElasticsearchDBI.instance
+        ElasticsearchDBI.instance = None
+        ElasticsearchDBI.connected = False
+
+        if instance is not None and instance.pid == os.getpid():
+            instance.close()
+
+    def close(self) -> None:
+        """
+        Close all pooled connections.
+        @return: None
+        """
+        try:
+            self.__es.transport.close()
+        except Exception as exception:
+            Logger.error(
+                "Could not close Elasticsearch connections. {}".format(exception)
+            )
+
+    def get_pool_stats(self) -> dict:
+        """
+        Connection pool utilization of current process, for each Elasticsearch node.
+        @return: dict
+        """
+        nodes = []
+        for connection in self.__es.transport.connection_pool.connections:
+            pool = getattr(connection, "pool", None)
+            if pool is None or pool.pool is None:
+                continue
+            idle = sum(1 for pooled in list(pool.pool.queue) if pooled is not None)
+            in_use = pool.pool.maxsize - pool.pool.qsize()
+            nodes.append(
+                {
+                    "host": connection.host,
+                    "maxsize": pool.pool.maxsize,
+                    "in_use": in_use,
+                    "idle": idle,
+                    "utilization": round(in_use / pool.pool.maxsize, 4),
+                    "connections_created": pool.num_connections,
+                    "requests": pool.num_requests,
+                }
+            )
+
+        return {
+            "pid": self.pid,
+            "keep_alive": config.ES_KEEPALIVE,
+            "timeout": config.ES_TIMEOUT,
+            "max_retries": config.ES_MAX_RETRIES,
+            "nodes": nodes,
+        }
+
     ####################
     # INDEX MANAGEMENT #
     ####################
@@ -243,7 +318,9 @@ class ElasticsearchDBI:
         @return: dict/None
         """
         try:
-            result = self.__es.get(index=index, id=_id)
+            result = self.__es.get(
+                index=index, id=_id, request_timeout=config.ES_SEARCH_TIMEOUT
+            )
             if "found" not in result or not result["found"]:
                 return None
             return result
@@ -260,7 +337,10 @@ class ElasticsearchDBI:
         """
         try:
             return self.__es.mget(
-                body={"ids": ids}, index=index, _source_includes=_source_includes
+                body={"ids": ids},
+                index=index,
+                _source_includes=_source_includes,
+                request_timeout=config.ES_SEARCH_TIMEOUT,
             ).get("docs", [])
         except Exception as exception:
             Logger.error(exception)
@@ -283,7 +363,11 @@ class ElasticsearchDBI:
 
         try:
             return self.__es.search(
-                index=index, body=query_body, size=size, explain=explain
+                index=index,
+                body=query_body,
+                size=size,
+                explain=explain,
+                request_timeout=config.ES_SEARCH_TIMEOUT,
             )
         except Exception as exception:
             Logger.error("Search failed. {}".format(str(exception)))
@@ -315,7 +399,12 @@ class ElasticsearchDBI:
 
         try:
             data = self.__es.search(
-                index=index, body=query_body, size=size, scroll=scroll, sort=sort
+                index=index,
+                body=query_body,
+                size=size,
+                scroll=scroll,
+                sort=sort,
+                request_timeout=config.ES_SEARCH_TIMEOUT,
             )
             scroll_id = data["_scroll_id"]
             scroll_size = len(data["hits"]["hits"])
@@ -324,7 +413,11 @@ class ElasticsearchDBI:
                 yield item
 
             while scroll_size > 0:
-                data = self.__es.scroll(scroll_id=scroll_id, scroll=scroll)
+                data = self.__es.scroll(
+                    scroll_id=scroll_id,
+                    scroll=scroll,
+                    request_timeout=config.ES_SEARCH_TIMEOUT,
+                )
                 for item in data["hits"]["hits"]:
                     yield item
 
@@ -339,24 +432,77 @@ class ElasticsearchDBI:
                 raise exception
             return None
 
+    # AGGREGATIONS
+    def composite_aggregation_generator(
+        self,
+        index,
+        sources,
+        aggregations=None,
+        query=None,
+        size=1000,
+        raise_on_error=False,
+    ) -> object:
+        """
+        Page through composite aggregation buckets and return them one by one (generator). One request is sent for
+        each size buckets.
+        @param index: string
+        @param sources: list, composite aggregation sources
+        @param aggregations: dict, sub-aggregations computed for each bucket
+        @param query: dict
+        @param size: int
+        @param raise_on_error: boolean
+        @return: dict/None
+        """
+        composite = {"size": size, "sources": sources}
+        query_body = {"size": 0, "aggs": {"buckets": {"composite": composite}}}
+        if aggregations:
+            query_body["aggs"]["buckets"]["aggs"] = aggregations
+        if query:
+            query_body["query"] = query
+
+        try:
+            while True:
+                data = self.__es.search(
+                    index=index,
+                    body=query_body,
+                    request_timeout=config.ES_SEARCH_TIMEOUT,
+                )
+                buckets = data["aggregations"]["buckets"]
+                for bucket in buckets["buckets"]:
+                    yield bucket
+
+                if not buckets["buckets"] or "after_key" not in buckets:
+                    break
+                composite["after"] = buckets["after_key"]
+
+        except Exception as exception:
+            Logger.error(exception)
+            if raise_on_error:
+                raise exception
+            return None
+
     # BULK
     def bulk(
         self,
         actions,
         chunk_size=1000,
         raise_on_error=False,
-        max_retries=0,
-        request_timeout=100,
+        max_retries=None,
+        request_timeout=None,
     ) -> tuple:
         """
         Bulk operations. Most frequent _op_types: index, update, delete.
         @param actions: list
         @param chunk_size: int
         @param raise_on_error: boolean
-        @param max_retries: int
-        @param request_timeout: int
+        @param max_retries: int, retries of rejected (429) chunks (default config.ES_BULK_MAX_RETRIES)
+        @param request_timeout: int (default config.ES_BULK_TIMEOUT)
         @return: tuple
         """
+        if max_retries is None:
+            max_retries = config.ES_BULK_MAX_RETRIES
+        if request_timeout is None:
+            request_timeout = config.ES_BULK_TIMEOUT
 
         try:
             return helpers.bulk(
@@ -370,3 +516,35 @@ class ElasticsearchDBI:
         except Exception as exception:
             Logger.error("Error during bulk index: {0}".format(str(exception)))
             return -1, exception
+
+    def streaming_bulk(
+        self,
+        actions,
+        chunk_size=1000,
+        max_retries=None,
+        request_timeout=None,
+        expand_action_callback=helpers.expand_action,
+    ) -> object:
+        """
+        Bulk operations, result of each action in order (generator). Failed actions are yielded, not raised.
+        @param actions: iterable
+        @param chunk_size: int
+        @param max_retries: int, retries of rejected (429) chunks (default config.ES_BULK_MAX_RETRIES)
+        @param request_timeout: int (default config.ES_BULK_TIMEOUT)
+        @param expand_action_callback: function, action -> (action line, source); identity for pre-expanded actions
+        @return: generator of tuples (ok, item)
+        """
+        return helpers.streaming_bulk(
+            self.__es,
+            actions,
+            chunk_size=chunk_size,
+            raise_on_error=False,
+            raise_on_exception=False,
+            max_retries=(
+                config.ES_BULK_MAX_RETRIES if max_retries is None else max_retries
+            ),
+            request_timeout=(
+                config.ES_BULK_TIMEOUT if request_timeout is None else request_timeout
+            ),
+            expand_action_callback=expand_action_callback,
+        )
@@ -0,0 +1,133 @@
+"""
+Concurrent, rate limited price history fetcher.
+"""
+
+import random
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from util.fetcher.token_bucket import TokenBucket
+from util.logger.logger import Logger
+
+
+class PriceFetcher:
+    """
+    Fetch price history of many tickers with a bounded thread pool. Tickers with the same date window are fetched in
+    batches (one provider call for several tickers). Every fetched ticker (including retries) takes a token from a
+    shared token bucket, so throughput is bound by the allowed request rate, not by request latency. Failed calls
+    are retried with exponential backoff and jitter, for the tickers not fetched yet only.
+    """
+
+    def __init__(
+        self,
+        fetch_function,
+        workers,
+        requests_per_second,
+        burst,
+        retries,
+        backoff,
+        batch_size=1,
+    ):
+        """
+        @param fetch_function: function (tickers list, start_date, end_date) -> dict {ticker: list of price dicts},
+        raises on error; tickers missing from result are retried
+        @param workers: int, max concurrent provider calls
+        @param requests_per_second: float
+        @param burst: int, max requests sent at once after idle time (at least batch_size)
+        @param retries: int, retries per batch
+        @param backoff: float, seconds before first retry (doubled on each retry)
+        @param batch_size: int, max tickers per provider call
+        """
+        self.__fetch_function = fetch_function
+        self.__workers = max(1, workers)
+        self.__batch_size = max(1, batch_size)
+        # a batch takes one token per ticker at once: bucket must hold a full batch
+        self.__rate_limiter = TokenBucket(
+            requests_per_second, max(burst, self.__batch_size)
+        )
+        self.__retries = retries
+        self.__backoff = backoff
+
+    def fetch(self, requests) -> object:
+        """
+        Fetch prices for each request; results are returned as they complete. At most 2 x workers batches are
+        pending, so a slow consumer (ex. bulk indexing) slows down fetching.
+        @param requests: iterable of tuples (ticker, start_date, end_date)
+        @return: generator of tuples (ticker, list of price dicts/None on failure)
+        """
+        with ThreadPoolExecutor(max_workers=self.__workers) as executor:
+            pending = set()
+            for tickers, start_date, end_date in self.get_batches(requests):
+                if len(pending) >= 2 * self.__workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from future.result()
+
+                pending.add(
+                    executor.submit(self.fetch_batch, tickers, start_date, end_date)
+                )
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
+    def get_batches(self, requests) -> object:
+        """
+        Group requests with the same date window in batches of at most batch_size tickers.
+        @param requests: iterable of tuples (ticker, start_date, end_date)
+        @return: generator of tuples (tickers list, start_date, end_date)
+        """
+        windows = {}
+        for ticker, start_date, end_date in requests:
+            tickers = windows.setdefault((start_date, end_date), [])
+            tickers.append(ticker)
+            if len(tickers) >= self.__batch_size:
+                yield tickers, start_date, end_date
+                windows[(start_date, end_date)] = []
+
+        for (start_date, end_date), tickers in windows.items():
+            if tickers:
+                yield tickers, start_date, end_date
+
+    def fetch_batch(self, tickers, start_date, end_date) -> list:
+        """
+        Fetch prices of tickers in one provider call; on errors, tickers not fetched yet are retried.
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD"
+        @return: list of tuples (ticker, list of price dicts/None on failure)
+        """
+        tickers_prices = {}
+        missing_tickers = tickers
+        for attempt in range(self.__retries + 1):
+            if attempt:
+                time.sleep(
+                    self.__backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                )
+
+            self.__rate_limiter.acquire(len(missing_tickers))
+            try:
+                response = self.__fetch_function(missing_tickers, start_date, end_date)
+                for ticker in missing_tickers:
+                    if response.get(ticker) is not None:
+                        tickers_prices[ticker] = response[ticker]
+                missing_tickers = [
+                    ticker for ticker in missing_tickers if ticker not in tickers_prices
+                ]
+                if missing_tickers:
+                    raise KeyError(
+                        "No response for {}".format(", ".join(missing_tickers))
+                    )
+                break
+            except Exception as exception:
+                Logger.warning(
+                    "Could not get prices for {} (attempt {} of {}). {}".format(
+                        ", ".join(missing_tickers),
+                        attempt + 1,
+                        self.__retries + 1,
+                        exception,
+                    )
+                )
+
+        return [(ticker, tickers_prices.get(ticker)) for ticker in tickers]
@@ -0,0 +1,54 @@
+"""
+Thread safe token bucket rate limiter.
+"""
+
+import threading
+import time
+
+
+class TokenBucket:
+    """
+    Token bucket. Tokens are added at rate per second, up to capacity (max burst). Each request takes one token;
+    callers wait until a token is available.
+    """
+
+    def __init__(self, rate, capacity):
+        """
+        @param rate: float, tokens added per second
+        @param capacity: int, max tokens (burst size)
+        """
+        self.__rate = float(rate)
+        self.__capacity = float(max(1, capacity))
+        self.__tokens = self.__capacity
+        self.__updated_ts = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def try_acquire(self, tokens=1) -> float:
+        """
+        Take tokens if available.
+        @param tokens: int
+        @return: float, 0 if tokens were taken, else seconds until they are available
+        """
+        with self.__lock:
+            now = time.monotonic()
+            self.__tokens = min(
+                self.__capacity,
+                self.__tokens + (now - self.__updated_ts) * self.__rate,
+            )
+            self.__updated_ts = now
+
+            if self.__tokens >= tokens:
+                self.__tokens -= tokens
+                return 0.0
+            return (tokens - self.__tokens) / self.__rate
+
+    def acquire(self, tokens=1) -> None:
+        """
+        Take tokens, waiting until they are available.
+        @param tokens: int
+        @return: None
+        """
+        wait = self.try_acquire(tokens)
+        while wait > 0:
+            time.sleep(wait)
+            wait = self.try_acquire(tokens)
@@ -0,0 +1,124 @@
+"""
+Market data provider with on-disk response cache.
+"""
+
+import datetime
+
+from util.market_data.market_data_provider import MarketDataProvider
+from util.market_data.provider_cache import ProviderCache
+
+
+def get_date_ts(date) -> float:
+    """
+    Timestamp of date start (UTC).
+    @param date: string "YYYY-MM-DD"
+    @return: float
+    """
+    return (
+        datetime.datetime.strptime(date, "%Y-%m-%d")
+        .replace(tzinfo=datetime.timezone.utc)
+        .timestamp()
+    )
+
+
+class CachedProvider(MarketDataProvider):
+    """
+    Wraps a provider; info and price history are served from ProviderCache when cached. For history requests only
+    the windows missing from the cached window of each ticker are fetched (head before it, tail after it); tickers
+    missing the same window are fetched in one batch call.
+
+    Prices of the last recent_days days are never marked as cached (bars of the last sessions may be missing or
+    revised), so they are fetched again on each request.
+    """
+
+    def __init__(self, provider: MarketDataProvider, cache: ProviderCache, recent_days):
+        """
+        @param provider: MarketDataProvider
+        @param cache: ProviderCache
+        @param recent_days: int
+        """
+        self.provider = provider
+        self.cache = cache
+        self.recent_days = recent_days
+        self.name = provider.name
+        self.max_batch_size = provider.max_batch_size
+
+    def get_info(self, ticker) -> dict:
+        """
+        Get stock info from cache or provider.
+        @param ticker: string
+        @return: dict
+        """
+        info = self.cache.get_info(self.name, ticker)
+        if info is None:
+            info = self.provider.get_info(ticker)
+            if info:
+                self.cache.set_info(self.name, ticker, info)
+        return info
+
+    def get_batch_history(self, tickers, start_date, end_date) -> dict:
+        """
+        Get price history from cache, fetching missing windows from provider.
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD", exclusive
+        @return: dict {ticker: list}
+        """
+        # last date that may be cached (exclusive end)
+        cacheable_end_date = (
+            datetime.datetime.utcnow().date()
+            - datetime.timedelta(days=self.recent_days)
+        ).isoformat()
+
+        # tickers by missing window
+        missing_windows = {}
+        for ticker in tickers:
+            for window in self.get_missing_windows(ticker, start_date, end_date):
+                missing_windows.setdefault(window, []).append(ticker)
+
+        for (window_start, window_end), window_tickers in missing_windows.items():
+            tickers_prices = self.provider.get_batch_history(
+                window_tickers, window_start, window_end
+            )
+            for ticker in window_tickers:
+                # empty responses (may be a provider error) are not cached
+                prices = tickers_prices.get(ticker, None) or []
+                self.cache.add_prices(
+                    self.name,
+                    ticker,
+                    prices,
+                    (
+                        window_start,
+                        min(window_end, cacheable_end_date) if prices else window_start,
+                    ),
+                )
+
+        start_ts, end_ts = get_date_ts(start_date), get_date_ts(end_date)
+        return {
+            ticker: self.cache.get_prices(self.name, ticker, start_ts, end_ts)
+            for ticker in tickers
+        }
+
+    def get_missing_windows(self, ticker, start_date, end_date) -> list:
+        """
+        Windows to fetch so ticker cached window covers [start_date, end_date). Missing windows are adjacent to the
+        cached window, so it stays contiguous.
+        @param ticker: string
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD"
+        @return: list of tuples (start_date, end_date)
+        """
+        if start_date >= end_date:
+            return []
+
+        window = self.cache.get_window(self.name, ticker)
+        if window is None:
+            return [(start_date, end_date)]
+
+        cached_start, cached_end = window
+        missing_windows = []
+        if start_date < cached_start:
+            missing_windows.append((start_date, cached_start))
+        if end_date > cached_end:
+            missing_windows.append((cached_end, end_date))
+        return missing_windows
@@ -0,0 +1,146 @@
+"""
+Deterministic local market data provider, for offline load tests and benchmarks.
+"""
+
+import time
+import zlib
+
+import numpy
+
+from util.market_data.market_data_provider import MarketDataProvider
+
+# first generated trading day (Monday); prices are a random walk from this day
+ORIGIN_DATE = numpy.datetime64("2000-01-03")
+# prices dated at 14:30 UTC (US market open), like Yahoo daily bars
+PRICE_TIME_OFFSET = 14 * 3600 + 1800
+SECTORS = [
+    ("Technology", "Software"),
+    ("Healthcare", "Biotechnology"),
+    ("Financial Services", "Banks"),
+    ("Energy", "Oil & Gas"),
+    ("Industrials", "Aerospace & Defense"),
+    ("Consumer Cyclical", "Retail"),
+]
+
+
+class FakeProvider(MarketDataProvider):
+    """
+    Synthetic daily OHLCV for any ticker: a random walk seeded by (seed, ticker) over Monday-Friday days. Same inputs
+    always give the same prices, and a date has the same price in any window. Each call waits latency seconds to
+    simulate a remote provider.
+    """
+
+    name = "fake"
+
+    def __init__(self, latency=0.0, seed=0):
+        """
+        @param latency: float, seconds per call
+        @param seed: int
+        """
+        self.latency = latency
+        self.seed = seed
+
+    def get_info(self, ticker) -> dict:
+        """
+        Synthetic stock info.
+        @param ticker: string
+        @return: dict
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        sector, industry = SECTORS[self.__get_ticker_seed(ticker) % len(SECTORS)]
+        return {
+            "ticker": ticker,
+            "names": ["{} Synthetic Corp".format(ticker)],
+            "description": "Synthetic {} company.".format(industry.lower()),
+            "industry": industry,
+            "sector": sector,
+            "exchanges": ["New York Stock Exchange"],
+            "website": None,
+            "tags": [industry, sector],
+        }
+
+    def get_batch_history(self, tickers, start_date, end_date) -> dict:
+        """
+        Synthetic price history for several tickers.
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD", exclusive
+        @return: dict {ticker: list}
+        """
+        if self.latency:
+            time.sleep(self.latency)
+
+        first = max(
+            0, int(numpy.busday_count(ORIGIN_DATE, numpy.datetime64(start_date)))
+        )
+        last = max(0, int(numpy.busday_count(ORIGIN_DATE, numpy.datetime64(end_date))))
+        dates = []
+        if first < last:
+            dates = (
+                numpy.busday_offset(ORIGIN_DATE, numpy.arange(first, last))
+                .astype("datetime64[s]")
+                .astype("int64")
+                + PRICE_TIME_OFFSET
+            ).astype("float64")
+
+        return {
+            ticker: self.__get_prices(ticker, dates, first, last) for ticker in tickers
+        }
+
+    def __get_ticker_seed(self, ticker) -> int:
+        """
+        Seed of ticker (stable across processes, unlike hash()).
+        @param ticker: string
+        @return: int
+        """
+        return zlib.crc32("{}:{}".format(self.seed, ticker.upper()).encode("utf-8"))
+
+    def __get_prices(self, ticker, dates, first, last) -> list:
+        """
+        Generate random walk from origin date up to last day and return [first, last) days.
+        @param ticker: string
+        @param dates: numpy array, timestamps of [first, last) days
+        @param first: int, day index
+        @param last: int, day index
+        @return: list of dicts
+        """
+        if first >= last:
+            return []
+
+        ticker_seed = self.__get_ticker_seed(ticker)
+        # draws are sequential, so day values do not depend on window length
+        noise = numpy.random.default_rng(ticker_seed).standard_normal((last, 4))
+        close = (10 + ticker_seed % 490) * numpy.exp(
+            numpy.cumsum(0.0003 + 0.015 * noise[:, 0])
+        )
+        open_ = numpy.concatenate(([close[0]], close[:-1])) * numpy.exp(
+            0.005 * noise[:, 1]
+        )
+        high = numpy.maximum(open_, close) * (1 + 0.01 * numpy.abs(noise[:, 2]))
+        low = numpy.minimum(open_, close) * (1 - 0.01 * numpy.abs(noise[:, 3]))
+        volume = numpy.round(1e6 * numpy.exp(0.5 * noise[:, 2]))
+
+        columns = [
+            dates.tolist(),
+            open_[first:].round(4).tolist(),
+            close[first:].round(4).tolist(),
+            high[first:].round(4).tolist(),
+            low[first:].round(4).tolist(),
+            volume[first:].tolist(),
+        ]
+        return [
+            {
+                "ticker": ticker,
+                "date": date,
+                "open": open_price,
+                "close": close_price,
+                "high": high_price,
+                "low": low_price,
+                "volume": volume_value,
+            }
+            for date, open_price, close_price, high_price, low_price, volume_value in zip(
+                *columns
+            )
+        ]
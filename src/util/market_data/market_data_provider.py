@@ -0,0 +1,95 @@
+"""
+Market data provider interface.
+"""
+
+from abc import ABC, abstractmethod
+
+from util import config
+
+
+class MarketDataException(Exception):
+    pass
+
+
+class MarketDataProvider(ABC):
+    """
+    Source of stock info and daily price history. Price dicts have the stock_prices index document format
+    {ticker, date, open, close, high, low, volume}; date windows are [start_date, end_date).
+    """
+
+    instance = None
+    name = None
+    # max tickers per get_batch_history call worth batching (None: no limit)
+    max_batch_size = None
+
+    @staticmethod
+    def get_instance() -> "MarketDataProvider":
+        """
+        Returns existing provider instance, or creates the provider configured by config.MARKET_DATA_PROVIDER
+        (wrapped by on-disk cache if config.PROVIDER_CACHE is set).
+        @return: MarketDataProvider object
+        """
+        if MarketDataProvider.instance is None:
+            if config.MARKET_DATA_PROVIDER == "fake":
+                from util.market_data.fake_provider import FakeProvider
+
+                MarketDataProvider.instance = FakeProvider(
+                    latency=config.FAKE_PROVIDER_LATENCY,
+                    seed=config.FAKE_PROVIDER_SEED,
+                )
+            else:
+                from util.market_data.yahoo_provider import YahooProvider
+
+                MarketDataProvider.instance = YahooProvider()
+
+            if config.PROVIDER_CACHE:
+                from util.market_data.cached_provider import CachedProvider
+                from util.market_data.provider_cache import ProviderCache
+
+                MarketDataProvider.instance = CachedProvider(
+                    MarketDataProvider.instance,
+                    ProviderCache(
+                        config.PROVIDER_CACHE,
+                        info_ttl=config.PROVIDER_CACHE_INFO_TTL,
+                        history_ttl=config.PROVIDER_CACHE_HISTORY_TTL,
+                    ),
+                    recent_days=config.PROVIDER_CACHE_RECENT_DAYS,
+                )
+        return MarketDataProvider.instance
+
+    def get_batch_size(self, batch_size) -> int:
+        """
+        Tickers per get_batch_history call: batch_size, limited by provider max_batch_size.
+        @param batch_size: int
+        @return: int
+        """
+        return min(batch_size, self.max_batch_size or batch_size)
+
+    @abstractmethod
+    def get_info(self, ticker) -> dict:
+        """
+        Get stock info (stocks index document format, with ticker).
+        @param ticker: string
+        @return: dict, empty if no info
+        """
+
+    def get_history(self, ticker, start_date, end_date) -> list:
+        """
+        Get daily price history of ticker.
+        @param ticker: string
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD", exclusive
+        @return: list of price dicts (raises on errors, see get_batch_history)
+        """
+        return self.get_batch_history([ticker], start_date, end_date)[ticker]
+
+    @abstractmethod
+    def get_batch_history(self, tickers, start_date, end_date) -> dict:
+        """
+        Get daily price history of several tickers in one call. Raises when a request fails or a ticker is missing
+        from the response, so the call can be retried; tickers without prices in window get an empty list.
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD", exclusive
+        @return: dict {ticker: list of price dicts}
+        """
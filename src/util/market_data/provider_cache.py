@@ -0,0 +1,199 @@
+"""
+On-disk (SQLite) cache of market data provider responses.
+"""
+
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+
+PRICE_FIELDS = ["date", "open", "close", "high", "low", "volume"]
+
+
+class ProviderCache:
+    """
+    SQLite cache of stock info and daily prices, keyed by provider and ticker. Prices are stored one row per
+    (provider, ticker, date) with the date window [start_date, end_date) they cover, so overlapping requests are
+    answered from cache and only missing windows are fetched.
+
+    Entries expire per data kind (info_ttl, history_ttl seconds since first fetch). Safe to use from several threads
+    (one connection per thread) and processes (WAL journal).
+    """
+
+    def __init__(self, path, info_ttl, history_ttl):
+        """
+        @param path: string, SQLite database file
+        @param info_ttl: int, seconds
+        @param history_ttl: int, seconds
+        """
+        self.path = path
+        self.info_ttl = info_ttl
+        self.history_ttl = history_ttl
+        self.__local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self.__get_connection()
+        with connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS info (provider TEXT, ticker TEXT, fetched_ts REAL, data TEXT, "
+                "PRIMARY KEY (provider, ticker))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS history_windows (provider TEXT, ticker TEXT, start_date TEXT, "
+                "end_date TEXT, fetched_ts REAL, PRIMARY KEY (provider, ticker))"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS prices (provider TEXT, ticker TEXT, date REAL, open REAL, close REAL, "
+                "high REAL, low REAL, volume REAL, PRIMARY KEY (provider, ticker, date)) WITHOUT ROWID"
+            )
+
+    def __get_connection(self) -> sqlite3.Connection:
+        """
+        Connection of current thread.
+        @return: sqlite3.Connection
+        """
+        connection = getattr(self.__local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self.__local.connection = connection
+        return connection
+
+    ########
+    # INFO #
+    ########
+
+    def get_info(self, provider, ticker) -> object:
+        """
+        Cached stock info.
+        @param provider: string
+        @param ticker: string
+        @return: dict/None if missing or expired
+        """
+        row = (
+            self.__get_connection()
+            .execute(
+                "SELECT data FROM info WHERE provider = ? AND ticker = ? AND fetched_ts >= ?",
+                (provider, ticker.upper(), time.time() - self.info_ttl),
+            )
+            .fetchone()
+        )
+        return json.loads(row[0]) if row else None
+
+    def set_info(self, provider, ticker, info) -> None:
+        """
+        @param provider: string
+        @param ticker: string
+        @param info: dict
+        @return: None
+        """
+        connection = self.__get_connection()
+        with connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO info VALUES (?, ?, ?, ?)",
+                (provider, ticker.upper(), time.time(), json.dumps(info)),
+            )
+
+    ###########
+    # HISTORY #
+    ###########
+
+    def get_window(self, provider, ticker) -> object:
+        """
+        Date window covered by cached prices of ticker. Expired windows (and their prices) are deleted.
+        @param provider: string
+        @param ticker: string
+        @return: tuple (start_date, end_date)/None
+        """
+        connection = self.__get_connection()
+        row = connection.execute(
+            "SELECT start_date, end_date, fetched_ts FROM history_windows WHERE provider = ? AND ticker = ?",
+            (provider, ticker.upper()),
+        ).fetchone()
+        if not row:
+            return None
+
+        if row[2] < time.time() - self.history_ttl:
+            with connection:
+                connection.execute(
+                    "DELETE FROM history_windows WHERE provider = ? AND ticker = ?",
+                    (provider, ticker.upper()),
+                )
+                connection.execute(
+                    "DELETE FROM prices WHERE provider = ? AND ticker = ?",
+                    (provider, ticker.upper()),
+                )
+            return None
+
+        return row[0], row[1]
+
+    def add_prices(self, provider, ticker, prices, window) -> None:
+        """
+        Store prices and extend ticker covered window (window must overlap or touch the covered window).
+        @param provider: string
+        @param ticker: string
+        @param prices: list of price dicts
+        @param window: tuple (start_date, end_date), covered by prices; not extended if start_date >= end_date
+        @return: None
+        """
+        ticker = ticker.upper()
+        connection = self.__get_connection()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO prices VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (provider, ticker, *[price.get(field) for field in PRICE_FIELDS])
+                    for price in prices
+                ],
+            )
+            if window[0] >= window[1]:
+                return
+
+            row = connection.execute(
+                "SELECT start_date, end_date FROM history_windows WHERE provider = ? AND ticker = ?",
+                (provider, ticker),
+            ).fetchone()
+            if row is None:
+                connection.execute(
+                    "INSERT INTO history_windows VALUES (?, ?, ?, ?, ?)",
+                    (provider, ticker, window[0], window[1], time.time()),
+                )
+            else:
+                connection.execute(
+                    "UPDATE history_windows SET start_date = ?, end_date = ? WHERE provider = ? AND ticker = ?",
+                    (min(row[0], window[0]), max(row[1], window[1]), provider, ticker),
+                )
+
+    def get_prices(self, provider, ticker, start_ts, end_ts) -> list:
+        """
+        Cached prices of ticker in [start_ts, end_ts), sorted by date. Missing values are nan.
+        @param provider: string
+        @param ticker: string
+        @param start_ts: float
+        @param end_ts: float
+        @return: list of price dicts
+        """
+        rows = (
+            self.__get_connection()
+            .execute(
+                "SELECT date, open, close, high, low, volume FROM prices "
+                "WHERE provider = ? AND ticker = ? AND date >= ? AND date < ? ORDER BY date",
+                (provider, ticker.upper(), start_ts, end_ts),
+            )
+            .fetchall()
+        )
+        # SQLite stores nan as NULL
+        return [
+            {
+                "ticker": ticker,
+                **{
+                    field: math.nan if value is None else value
+                    for field, value in zip(PRICE_FIELDS, row)
+                },
+            }
+            for row in rows
+        ]
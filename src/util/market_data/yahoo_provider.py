@@ -0,0 +1,122 @@
+"""
+Yahoo Finance market data provider (yfinance and yahoofinancials libraries).
+"""
+
+import numpy
+from yahoofinancials import YahooFinancials
+from yfinance import Ticker
+
+from util.logger.logger import Logger
+from util.market_data.market_data_provider import (
+    MarketDataException,
+    MarketDataProvider,
+)
+from util.utils import get_exchange_name
+
+PRICE_FIELDS = ["date", "open", "close", "high", "low", "volume"]
+
+
+def yf_prices_to_rows(ticker, prices) -> list:
+    """
+    Convert yahoofinancials prices to stock_prices documents. Each column is converted to float at once (NumPy), rows
+    are then built from the column lists.
+    @param ticker: string
+    @param prices: list of dicts
+    @return: list of dicts
+    """
+    if not prices:
+        return []
+
+    # missing values (None) are converted to nan
+    columns = [
+        numpy.array(
+            [price.get(field, None) for price in prices], dtype="float64"
+        ).tolist()
+        for field in PRICE_FIELDS
+    ]
+    return [{"ticker": ticker, **dict(zip(PRICE_FIELDS, row))} for row in zip(*columns)]
+
+
+class YahooProvider(MarketDataProvider):
+    """
+    Stock info from yfinance, price history from yahoofinancials.
+    """
+
+    name = "yahoo"
+    max_batch_size = 1
+
+    def get_info(self, ticker) -> dict:
+        """
+        Get ticker info using yfinance and format result.
+        @param ticker: string
+        @return: dict
+        """
+        yf_ticker = Ticker(ticker)
+        try:
+            _ = yf_ticker.info
+        except Exception as e:
+            Logger.exception("No info for ticker {}. {}".format(ticker, str(e)))
+            return {}
+
+        info = dict()
+        info["ticker"] = ticker
+        info["names"] = [yf_ticker.info.get("longName", None)]
+        short_name = yf_ticker.info.get("shortName", None)
+        if not info["names"] or (
+            short_name and info["names"][0].lower() != short_name.lower()
+        ):
+            info["names"].append(short_name.rstrip(" -"))
+
+        info["description"] = yf_ticker.info.get("longBusinessSummary", None)
+        info["industry"] = yf_ticker.info.get("industry", None)
+        info["sector"] = yf_ticker.info.get("sector", None)
+        info["exchanges"] = [yf_ticker.info.get("exchange", None)]
+        if info["exchanges"]:
+            info["exchanges"] = [get_exchange_name(ex) for ex in info["exchanges"]]
+        info["website"] = yf_ticker.info.get("website", None)
+        info["tags"] = []
+
+        for key in info:
+            if isinstance(info[key], list):
+                info[key] = [el for el in info[key] if el]
+
+        info["names"] = list(set(info["names"]))
+
+        tags = []
+        if info["industry"]:
+            tags.append(info["industry"])
+        if info["sector"]:
+            tags.append(info["sector"])
+        tags = list(set(tags))
+
+        if tags:
+            info["tags"] = tags
+
+        return info
+
+    def get_batch_history(self, tickers, start_date, end_date) -> dict:
+        """
+        Retrieve historical price data using yahoofinancials, one request per ticker: a list of tickers would be
+        fetched sequentially anyway and its request errors swallowed, so they could not be retried.
+        @param tickers: list of strings
+        @param start_date: string "YYYY-MM-DD"
+        @param end_date: string "YYYY-MM-DD"
+        @return: dict {ticker: list}
+        """
+        tickers_prices = {}
+        for ticker in tickers:
+            data = YahooFinancials(ticker).get_historical_price_data(
+                start_date=start_date, end_date=end_date, time_interval="daily"
+            )
+            if not data or ticker.upper() not in data:
+                raise MarketDataException("No response for ticker {}".format(ticker))
+
+            ticker_data = data[ticker.upper()]
+            if not ticker_data or "prices" not in ticker_data:
+                Logger.warning("No price data for {}".format(ticker))
+                tickers_prices[ticker] = []
+                continue
+
+            tickers_prices[ticker] = yf_prices_to_rows(ticker, ticker_data["prices"])
+
+        return tickers_prices
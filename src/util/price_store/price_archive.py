@@ -0,0 +1,265 @@
+"""
+Memory-mapped binary price archive. Price columns for all tickers are stored as fixed-width float64 arrays sorted by
+(ticker, date), plus a ticker -> (offset, count) directory.
+
+File layout:
+    MAGIC (8 bytes) | header size (uint64, little endian) | json header | padding | column 0 | column 1 | ...
+
+Tickers deleted after the archive was built are appended (one per line) to a "<archive path>.deleted" tombstone file
+shared by all processes, and hidden from then on.
+"""
+
+import json
+import os
+import struct
+
+import numpy
+
+MAGIC = b"SMPRICE1"
+TOMBSTONES_SUFFIX = ".deleted"
+DTYPE = "<f8"
+ALIGNMENT = 64
+
+
+class PriceArchiveException(Exception):
+    pass
+
+
+class PriceArchive:
+    """
+    Read-only access to a price archive. Column slices returned are views over the memory-mapped file (zero-copy).
+    """
+
+    def __init__(self, path):
+        """
+        Open archive and memory map its data.
+        @param path: string
+        """
+        with open(path, "rb") as archive_file:
+            if archive_file.read(len(MAGIC)) != MAGIC:
+                raise PriceArchiveException("{} is not a price archive".format(path))
+            (header_size,) = struct.unpack("<Q", archive_file.read(8))
+            header = json.loads(archive_file.read(header_size).decode("utf-8"))
+
+        self.__path = path
+        self.__columns = header["columns"]
+        self.__directory = header["tickers"]
+        self.__int_columns = header.get("int_columns", [])
+        self.__source_tickers = header.get("source_tickers", {})
+        self.__deleted_tickers = frozenset()
+        self.__deleted_mtime = None
+        self.__rows = header["rows"]
+        self.__data = (
+            numpy.memmap(
+                path,
+                dtype=header["dtype"],
+                mode="r",
+                offset=PriceArchive.data_offset(header_size),
+                shape=(len(self.__columns), self.__rows),
+            )
+            if self.__rows
+            else numpy.empty((len(self.__columns), 0), dtype=header["dtype"])
+        )
+
+    def __contains__(self, ticker) -> bool:
+        ticker = ticker.upper()
+        return ticker in self.__directory and ticker not in self.get_deleted_tickers()
+
+    def __len__(self) -> int:
+        return self.__rows
+
+    @staticmethod
+    def open(path) -> object:
+        """
+        Open archive if file exists.
+        @param path: string
+        @return: PriceArchive/None
+        """
+        if not path or not os.path.isfile(path):
+            return None
+        return PriceArchive(path)
+
+    @staticmethod
+    def data_offset(header_size) -> int:
+        """
+        Offset of first column in file, aligned to ALIGNMENT bytes.
+        @param header_size: int
+        @return: int
+        """
+        offset = len(MAGIC) + 8 + header_size
+        return offset + (-offset % ALIGNMENT)
+
+    def get_path(self) -> str:
+        """
+        Archive file path getter.
+        @return: string
+        """
+        return self.__path
+
+    def get_column_names(self) -> list:
+        """
+        Column names getter.
+        @return: list
+        """
+        return list(self.__columns)
+
+    def get_int_columns(self) -> list:
+        """
+        Names of columns whose dataset values were all integers.
+        @return: list
+        """
+        return list(self.__int_columns)
+
+    def get_source_ticker(self, ticker) -> str:
+        """
+        Ticker as spelled in dataset.
+        @param ticker: string
+        @return: string
+        """
+        ticker = ticker.upper()
+        return self.__source_tickers.get(ticker, ticker)
+
+    def get_tickers(self) -> list:
+        """
+        Get all tickers in archive, except deleted ones.
+        @return: list
+        """
+        deleted_tickers = self.get_deleted_tickers()
+        return sorted(
+            ticker
+            for ticker in self.__directory.keys()
+            if ticker not in deleted_tickers
+        )
+
+    def get_deleted_tickers(self) -> frozenset:
+        """
+        Tickers in tombstone file. File is only read again when modified (e.g. by another process).
+        @return: frozenset
+        """
+        tombstones_path = self.__path + TOMBSTONES_SUFFIX
+        try:
+            mtime = os.stat(tombstones_path).st_mtime_ns
+        except FileNotFoundError:
+            return frozenset()
+
+        if mtime != self.__deleted_mtime:
+            with open(tombstones_path, "r") as tombstones_file:
+                self.__deleted_tickers = frozenset(
+                    line.strip().upper() for line in tombstones_file if line.strip()
+                )
+            self.__deleted_mtime = mtime
+        return self.__deleted_tickers
+
+    def delete_ticker(self, ticker) -> None:
+        """
+        Hide archived prices of ticker in all processes: append ticker to tombstone file.
+        @param ticker: string
+        @return: None
+        """
+        ticker = ticker.upper()
+        if ticker not in self.__directory or ticker in self.get_deleted_tickers():
+            return
+
+        with open(self.__path + TOMBSTONES_SUFFIX, "a") as tombstones_file:
+            tombstones_file.write(ticker + "\n")
+
+    def get_columns(self, ticker) -> object:
+        """
+        Get price columns for ticker.
+        @param ticker: string
+        @return: dict {column: numpy.ndarray}/None (ticker missing or deleted)
+        """
+        entry = self.__directory.get(ticker.upper(), None)
+        if entry is None or ticker.upper() in self.get_deleted_tickers():
+            return None
+
+        offset, count = entry
+        return {
+            column: self.__data[index, offset : offset + count]
+            for index, column in enumerate(self.__columns)
+        }
+
+    def iter_rows(self, ticker) -> object:
+        """
+        Generate price dicts (stock_prices _source format) for ticker, with dataset value types and ticker spelling.
+        @param ticker: string
+        @return: generator
+        """
+        columns = self.get_columns(ticker)
+        if not columns:
+            return
+
+        column_values = [
+            (
+                columns[column].astype(numpy.int64).tolist()
+                if column in self.__int_columns
+                else columns[column].tolist()
+            )
+            for column in self.__columns
+        ]
+        source_ticker = self.get_source_ticker(ticker)
+        for values in zip(*column_values):
+            price = dict(zip(self.__columns, values))
+            price["ticker"] = source_ticker
+            yield price
+
+    @staticmethod
+    def write(path, tickers, ticker_codes, columns, int_columns=()) -> int:
+        """
+        Write archive. Rows are sorted by (ticker, date); for duplicate (ticker, date) rows the last one is kept.
+        File is written next to path and moved in place when complete.
+        @param path: string
+        @param tickers: list, ticker names (as spelled in dataset) indexed by ticker code
+        @param ticker_codes: numpy.ndarray, ticker code for each row
+        @param columns: dict {column: numpy.ndarray}, must contain "date"
+        @param int_columns: list, columns whose dataset values are integers
+        @return: int, number of rows written
+        """
+        ticker_codes = numpy.asarray(ticker_codes)
+        order = numpy.lexsort((columns["date"], ticker_codes))
+        sorted_codes = ticker_codes[order]
+        sorted_dates = numpy.asarray(columns["date"])[order]
+        keep = numpy.append(
+            (sorted_codes[1:] != sorted_codes[:-1])
+            | (sorted_dates[1:] != sorted_dates[:-1]),
+            True,
+        )
+        order = order[keep]
+        sorted_codes = sorted_codes[keep]
+
+        codes, offsets, counts = numpy.unique(
+            sorted_codes, return_index=True, return_counts=True
+        )
+        header = json.dumps(
+            {
+                "columns": list(columns.keys()),
+                "dtype": DTYPE,
+                "rows": int(len(order)),
+                "int_columns": [column for column in columns if column in int_columns],
+                "tickers": {
+                    tickers[code].upper(): [int(offset), int(count)]
+                    for code, offset, count in zip(
+                        codes.tolist(), offsets.tolist(), counts.tolist()
+                    )
+                },
+                "source_tickers": {
+                    ticker.upper(): ticker
+                    for ticker in tickers
+                    if ticker != ticker.upper()
+                },
+            }
+        ).encode("utf-8")
+
+        tmp_path = "{}.tmp".format(path)
+        with open(tmp_path, "wb") as archive_file:
+            archive_file.write(MAGIC)
+            archive_file.write(struct.pack("<Q", len(header)))
+            archive_file.write(header)
+            archive_file.write(
+                b"\0" * (PriceArchive.data_offset(len(header)) - archive_file.tell())
+            )
+            for values in columns.values():
+                numpy.asarray(values, dtype=DTYPE)[order].tofile(archive_file)
+        os.replace(tmp_path, path)
+
+        return int(len(order))
@@ -0,0 +1,114 @@
+"""
+Aligned date x ticker close price matrix built from price store.
+"""
+
+import numpy
+
+from util.price_store.price_store import PriceStore
+
+ONE_DAY = 24 * 3600
+
+
+class PriceMatrix:
+    """
+    Close prices of several tickers aligned on calendar days (UTC). Missing prices are NaN.
+    """
+
+    def __init__(self, tickers, days, closes):
+        """
+        @param tickers: list
+        @param days: numpy.ndarray, int64 days since epoch (sorted)
+        @param closes: numpy.ndarray, float64 matrix len(days) x len(tickers)
+        """
+        self.tickers = tickers
+        self.days = days
+        self.closes = closes
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    @staticmethod
+    def build(tickers, start_ts, end_ts, price_store=None) -> "PriceMatrix":
+        """
+        Build close matrix for tickers and time range. Each ticker price history is read once from price store.
+        @param tickers: list
+        @param start_ts: int
+        @param end_ts: int
+        @param price_store: PriceStore (default singleton instance)
+        @return: PriceMatrix
+        """
+        if price_store is None:
+            price_store = PriceStore.get_instance()
+
+        ticker_days, ticker_closes = [], []
+        for ticker in tickers:
+            price_range = price_store.get_range(ticker, start_ts, end_ts)
+            if price_range is None:
+                price_range = {"date": numpy.empty(0), "close": numpy.empty(0)}
+            ticker_days.append(
+                numpy.floor_divide(price_range["date"], ONE_DAY).astype(numpy.int64)
+            )
+            ticker_closes.append(price_range["close"])
+
+        # union of days using a presence mask over [first day, last day]
+        first_day = min((int(d[0]) for d in ticker_days if len(d)), default=0)
+        last_day = max((int(d[-1]) for d in ticker_days if len(d)), default=-1)
+        present = numpy.zeros(last_day - first_day + 1, dtype=bool)
+        for ticker_day in ticker_days:
+            present[ticker_day - first_day] = True
+        days = numpy.flatnonzero(present) + first_day
+        day_rows = numpy.cumsum(present) - 1
+
+        closes = numpy.full((len(days), len(tickers)), numpy.nan, order="F")
+        for column, (ticker_day, ticker_close) in enumerate(
+            zip(ticker_days, ticker_closes)
+        ):
+            closes[day_rows[ticker_day - first_day], column] = ticker_close
+
+        # zero close means missing price
+        closes[closes <= 0] = numpy.nan
+        return PriceMatrix(list(tickers), days, closes)
+
+    def get_dates(self, rows=None) -> list:
+        """
+        Days as "YYYY-MM-DD" strings.
+        @param rows: numpy.ndarray, boolean mask/indices of days to return (default all)
+        @return: list
+        """
+        days = self.days if rows is None else self.days[rows]
+        return numpy.datetime_as_string(days.astype("datetime64[D]"), unit="D").tolist()
+
+    def forward_fill(self) -> numpy.ndarray:
+        """
+        Close matrix with each missing price replaced by last known price of the same ticker. Prices before the first
+        known price stay NaN.
+        @return: numpy.ndarray
+        """
+        rows = numpy.arange(len(self.days))[:, None]
+        last_known = numpy.where(numpy.isnan(self.closes), 0, rows)
+        numpy.maximum.accumulate(last_known, axis=0, out=last_known)
+        return self.closes[last_known, numpy.arange(len(self.tickers))]
+
+    def relative_prices(self) -> numpy.ndarray:
+        """
+        Forward filled prices divided by first known price of each ticker. Before first known price (or if ticker has
+        no prices at all) relative price is 1, i.e. allocation is held as cash.
+        @return: numpy.ndarray
+        """
+        filled = self.forward_fill()
+        known = ~numpy.isnan(filled)
+        first_known = numpy.argmax(known, axis=0)
+        first_prices = filled[first_known, numpy.arange(len(self.tickers))]
+        first_prices[~known.any(axis=0)] = 1
+
+        relative = filled / first_prices
+        relative[~known] = 1
+        return relative
+
+    def log_returns(self) -> numpy.ndarray:
+        """
+        Daily log returns (len(days) - 1 x len(tickers)). Return is NaN if either of the two consecutive prices is
+        missing.
+        @return: numpy.ndarray
+        """
+        return numpy.log(self.closes[1:] / self.closes[:-1])
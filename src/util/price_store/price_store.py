@@ -0,0 +1,574 @@
+"""
+In-process columnar price store. Price history is kept per ticker as date sorted numpy arrays, loaded lazily from
+the price archive (if built) and stock_prices index and kept up to date on ingestion.
+"""
+
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+import numpy
+
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.logger.logger import Logger
+from util.price_store.price_archive import PriceArchive
+
+PRICE_COLUMNS = ["date", "open", "high", "low", "close", "volume"]
+RANGE_DIGESTS_MAX_SIZE = 64
+
+
+class TickerPrices:
+    """
+    Price history for one ticker. Each column is a float64 numpy array sorted by date, without duplicate dates.
+    Columns indexed as integers and the indexed ticker spelling are kept so that prices can be served unchanged.
+    """
+
+    def __init__(self, ticker, columns, int_columns=(), source_ticker=None):
+        self.ticker = ticker
+        self.columns = columns
+        self.int_columns = frozenset(int_columns)
+        self.source_ticker = source_ticker or ticker
+        self.loaded_ts = time.time()
+        # stock_prices index state at load time (see PriceStore), None if unknown
+        self.marker = None
+        self.__date_strings = None
+        self.__range_digests = {}
+
+    def __len__(self) -> int:
+        return len(self.columns["date"])
+
+    @staticmethod
+    def from_rows(ticker, rows) -> "TickerPrices":
+        """
+        Build columnar price history from price dicts (stock_prices _source format).
+        @param ticker: string
+        @param rows: list of dicts
+        @return: TickerPrices
+        """
+        columns = {
+            column: numpy.fromiter(
+                (float(row.get(column) or 0) for row in rows),
+                dtype=numpy.float64,
+                count=len(rows),
+            )
+            for column in PRICE_COLUMNS
+        }
+        int_columns = [
+            column
+            for column in PRICE_COLUMNS
+            if rows and all(type(row.get(column)) is int for row in rows)
+        ]
+        return TickerPrices(
+            ticker,
+            TickerPrices.sort_columns(columns),
+            int_columns=int_columns,
+            source_ticker=rows[-1].get("ticker", None) if rows else None,
+        )
+
+    @staticmethod
+    def sort_columns(columns) -> dict:
+        """
+        Sort columns by date and drop duplicate dates. Last occurrence of a date wins.
+        @param columns: dict {column: numpy.ndarray}
+        @return: dict
+        """
+        order = numpy.argsort(columns["date"], kind="stable")
+        dates = columns["date"][order]
+        keep = numpy.ones(len(dates), dtype=bool)
+        keep[:-1] = dates[1:] != dates[:-1]
+        return {column: values[order][keep] for column, values in columns.items()}
+
+    def merge(self, other) -> "TickerPrices":
+        """
+        Return new TickerPrices containing rows of both objects. Rows of other object overwrite same date rows.
+        @param other: TickerPrices
+        @return: TickerPrices
+        """
+        if not len(self):
+            int_columns = other.int_columns
+        elif not len(other):
+            int_columns = self.int_columns
+        else:
+            int_columns = self.int_columns & other.int_columns
+
+        return TickerPrices(
+            self.ticker,
+            TickerPrices.sort_columns(
+                {
+                    column: numpy.concatenate(
+                        [self.columns[column], other.columns[column]]
+                    )
+                    for column in PRICE_COLUMNS
+                }
+            ),
+            int_columns=int_columns,
+            source_ticker=other.source_ticker if len(other) else self.source_ticker,
+        )
+
+    def get_value(self, column, index) -> object:
+        """
+        Column value at row index, with its indexed type.
+        @param column: string
+        @param index: int
+        @return: int/float
+        """
+        value = self.columns[column][index]
+        return int(value) if column in self.int_columns else float(value)
+
+    def get_last_date(self) -> object:
+        """
+        Last known price date.
+        @return: float/None
+        """
+        return float(self.columns["date"][-1]) if len(self) else None
+
+    def get_range_indices(self, start_ts, end_ts) -> tuple:
+        """
+        Slice indices of rows with start_ts <= date <= end_ts.
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple (start, end)
+        """
+        dates = self.columns["date"]
+        return (
+            int(numpy.searchsorted(dates, start_ts, side="left")),
+            int(numpy.searchsorted(dates, end_ts, side="right")),
+        )
+
+    def get_range(self, start_ts, end_ts) -> dict:
+        """
+        Columns for start_ts <= date <= end_ts. Arrays are views, no data is copied.
+        @param start_ts: int
+        @param end_ts: int
+        @return: dict {column: numpy.ndarray}
+        """
+        start, end = self.get_range_indices(start_ts, end_ts)
+        return {column: values[start:end] for column, values in self.columns.items()}
+
+    def get_range_digest(self, start, end) -> str:
+        """
+        Digest of rows in [start, end) index range. Same rows give the same digest on any process; it only changes
+        when ingestion adds or overwrites rows in range.
+        @param start: int
+        @param end: int
+        @return: string
+        """
+        digest = self.__range_digests.get((start, end), None)
+        if digest is None:
+            blake = hashlib.blake2b(digest_size=16)
+            for column in PRICE_COLUMNS:
+                blake.update(self.columns[column][start:end].tobytes())
+            digest = blake.hexdigest()
+
+            if len(self.__range_digests) >= RANGE_DIGESTS_MAX_SIZE:
+                self.__range_digests.clear()
+            self.__range_digests[(start, end)] = digest
+        return digest
+
+    def get_date_strings(self) -> list:
+        """
+        "YYYY-MM-DD" representation of date column. Computed once per loaded price history.
+        @return: list
+        """
+        if self.__date_strings is None:
+            self.__date_strings = [
+                datetime.fromtimestamp(date).strftime("%Y-%m-%d")
+                for date in self.columns["date"].tolist()
+            ]
+        return self.__date_strings
+
+
+class PriceStore:
+    """
+    Singleton class. LRU of TickerPrices objects; Elasticsearch is only queried on cold misses and for checking
+    entries older than config.PRICE_STORE_TTL seconds. Other processes (workers, price scheduler) write to the
+    stock_prices index too, so an expired entry is compared with a marker of the ticker documents in the index
+    (count, date and value sums) and fully reloaded if any document was added, overwritten or deleted. Archived
+    prices are read from the price archive and only newer documents from the index, unless the marker of archived
+    dates documents does not match archived prices.
+    """
+
+    instance = None
+
+    def __init__(self, max_tickers, ttl, archive=None):
+        """
+        Singleton class constructor. Must not be called directly.
+        @param max_tickers: int, max number of tickers kept in memory
+        @param ttl: int, seconds until a ticker price history is checked for changes
+        @param archive: PriceArchive
+        """
+        if PriceStore.instance:
+            raise Exception(
+                "Singleton PriceStore called directly. Use PriceStore.get_instance() method"
+            )
+
+        self.__max_tickers = max_tickers
+        self.__ttl = ttl
+        self.__tickers = OrderedDict()
+        self.__archive = archive
+        self.__lock = threading.RLock()
+
+    @staticmethod
+    def get_instance() -> "PriceStore":
+        """
+        Returns existing instance of PriceStore class, or creates new instance if none exists.
+        @return: PriceStore object
+        """
+        if PriceStore.instance is None:
+            archive = None
+            try:
+                archive = PriceArchive.open(config.PRICE_ARCHIVE)
+            except Exception as exception:
+                Logger.error("Could not open price archive. {}".format(exception))
+
+            PriceStore.instance = PriceStore(
+                max_tickers=config.PRICE_STORE_MAX_TICKERS,
+                ttl=config.PRICE_STORE_TTL,
+                archive=archive,
+            )
+        return PriceStore.instance
+
+    ##########
+    # ACCESS #
+    ##########
+
+    def get_ticker_prices(self, ticker) -> object:
+        """
+        Get price history for ticker. Loaded from Elasticsearch on cold miss.
+        @param ticker: string
+        @return: TickerPrices/None
+        """
+        ticker = ticker.upper()
+        with self.__lock:
+            ticker_prices = self.__tickers.get(ticker, None)
+            if ticker_prices is not None:
+                self.__tickers.move_to_end(ticker)
+
+        if ticker_prices is None:
+            ticker_prices = self.__load(ticker)
+            if ticker_prices is None:
+                return None
+            self.__set(ticker, ticker_prices)
+        elif time.time() - ticker_prices.loaded_ts >= self.__ttl:
+            ticker_prices = self.__refresh_ticker_prices(ticker_prices)
+
+        return ticker_prices if len(ticker_prices) else None
+
+    def get_range(self, ticker, start_ts, end_ts) -> object:
+        """
+        Get price columns for ticker and specified time range.
+        @param ticker: string
+        @param start_ts: int
+        @param end_ts: int
+        @return: dict {column: numpy.ndarray}/None
+        """
+        ticker_prices = self.get_ticker_prices(ticker)
+        if ticker_prices is None:
+            return None
+        return ticker_prices.get_range(start_ts, end_ts)
+
+    def get_range_version(self, ticker, start_ts, end_ts) -> tuple:
+        """
+        Version of ticker prices for specified time range: digest of prices in range. Range is historical if newer
+        prices exist, so its prices no longer change.
+        @param ticker: string
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple (digest/None if no prices in range, historical boolean)
+        """
+        ticker_prices = self.get_ticker_prices(ticker)
+        if ticker_prices is None:
+            return None, False
+
+        start, end = ticker_prices.get_range_indices(start_ts, end_ts)
+        if start >= end:
+            return None, False
+        return ticker_prices.get_range_digest(start, end), end < len(ticker_prices)
+
+    #############
+    # INGESTION #
+    #############
+
+    def add_prices(self, ticker, prices) -> None:
+        """
+        Merge newly ingested prices in memory. If ticker is not loaded, prices are loaded on next access.
+        @param ticker: string
+        @param prices: list of dicts (stock_prices _source format)
+        @return: None
+        """
+        ticker = ticker.upper()
+        with self.__lock:
+            ticker_prices = self.__tickers.get(ticker, None)
+            if ticker_prices is not None and prices:
+                self.__set(
+                    ticker,
+                    ticker_prices.merge(TickerPrices.from_rows(ticker, prices)),
+                )
+            else:
+                self.invalidate(ticker)
+
+    def invalidate(self, ticker) -> None:
+        """
+        Drop ticker price history from memory.
+        @param ticker: string
+        @return: None
+        """
+        ticker = ticker.upper()
+        with self.__lock:
+            self.__tickers.pop(ticker, None)
+
+    def delete(self, ticker) -> None:
+        """
+        Drop ticker price history from memory after its prices were deleted from stock_prices index. Archived prices
+        of ticker are deleted too (tombstone shared by all processes).
+        @param ticker: string
+        @return: None
+        """
+        if self.__archive:
+            try:
+                self.__archive.delete_ticker(ticker)
+            except OSError as exception:
+                Logger.error(
+                    "Could not delete archived prices for {}. {}".format(
+                        ticker, exception
+                    )
+                )
+        self.invalidate(ticker)
+
+    def clear(self) -> None:
+        """
+        Drop all price histories from memory.
+        @return: None
+        """
+        with self.__lock:
+            for ticker in list(self.__tickers.keys()):
+                self.invalidate(ticker)
+
+    ###########
+    # HELPERS #
+    ###########
+
+    def __set(self, ticker, ticker_prices) -> None:
+        with self.__lock:
+            self.__tickers[ticker] = ticker_prices
+            self.__tickers.move_to_end(ticker)
+            while len(self.__tickers) > self.__max_tickers:
+                self.__tickers.popitem(last=False)
+
+    def __load(self, ticker, marker=None) -> object:
+        """
+        Load ticker price history from archive (if any) and stock_prices index. Only documents newer than the last
+        archived date are loaded from stock_prices index, unless the marker shows that documents of archived dates
+        were added, overwritten or deleted: all documents are loaded then and overwrite archived prices of the same
+        date.
+        @param ticker: string
+        @param marker: list, marker of ticker prices (loaded if None)
+        @return: TickerPrices/None (on error)
+        """
+        archived_prices = self.__get_archived_prices(ticker)
+        if marker is None:
+            # taken before loading prices: documents indexed meanwhile trigger a reload on next check
+            marker = self.__get_marker(ticker, archived_prices)
+
+        after_ts = None
+        if (
+            archived_prices is not None
+            and marker is not None
+            and PriceStore.__matches_archive(archived_prices, marker[1])
+        ):
+            after_ts = archived_prices.get_last_date()
+
+        ticker_prices = self.__load_ticker_prices(ticker, after_ts=after_ts)
+        if ticker_prices is not None and archived_prices is not None:
+            ticker_prices = archived_prices.merge(ticker_prices)
+
+        if ticker_prices is not None:
+            ticker_prices.marker = marker
+        return ticker_prices
+
+    def __get_archived_prices(self, ticker) -> object:
+        """
+        Archived price history of ticker (zero-copy views over the archive).
+        @param ticker: string
+        @return: TickerPrices/None (no archive, ticker not archived or deleted)
+        """
+        archived_columns = (
+            self.__archive.get_columns(ticker) if self.__archive else None
+        )
+        if not archived_columns:
+            return None
+
+        return TickerPrices(
+            ticker,
+            archived_columns,
+            int_columns=self.__archive.get_int_columns(),
+            source_ticker=self.__archive.get_source_ticker(ticker),
+        )
+
+    @staticmethod
+    def __matches_archive(archived_prices, archived_dates_marker) -> bool:
+        """
+        Whether stock_prices documents of archived dates hold archived prices (or there are none), comparing their
+        stats with archived prices stats. Price fields are mapped as float in stock_prices index, so archived prices
+        are rounded to float32 first.
+        @param archived_prices: TickerPrices
+        @param archived_dates_marker: list, stats of documents until last archived date
+        @return: boolean
+        """
+        if archived_dates_marker is None:
+            return False
+        if not any(count for count, _, _, _ in archived_dates_marker):
+            return True
+
+        for column, (count, minimum, maximum, total) in zip(
+            PRICE_COLUMNS, archived_dates_marker
+        ):
+            values = archived_prices.columns[column]
+            if column not in archived_prices.int_columns:
+                values = values.astype(numpy.float32).astype(numpy.float64)
+            if count != len(values) or not numpy.allclose(
+                [minimum, maximum, total],
+                [values.min(), values.max(), values.sum()],
+                rtol=1e-9,
+                atol=0,
+            ):
+                return False
+        return True
+
+    def __refresh_ticker_prices(self, ticker_prices) -> TickerPrices:
+        """
+        Reload ticker price history if its stock_prices documents changed since it was loaded.
+        @param ticker_prices: TickerPrices
+        @return: TickerPrices
+        """
+        marker = self.__get_marker(
+            ticker_prices.ticker, self.__get_archived_prices(ticker_prices.ticker)
+        )
+        if marker is None:
+            return ticker_prices
+
+        if marker == ticker_prices.marker:
+            ticker_prices.loaded_ts = time.time()
+            return ticker_prices
+
+        reloaded_prices = self.__load(ticker_prices.ticker, marker=marker)
+        if reloaded_prices is None:
+            return ticker_prices
+
+        self.__set(ticker_prices.ticker, reloaded_prices)
+        return reloaded_prices
+
+    @staticmethod
+    def __get_ticker_query(ticker) -> dict:
+        """
+        stock_prices query for ticker documents.
+        @param ticker: string
+        @return: dict
+        """
+        return {"bool": {"must": [{"term": {"ticker": ticker.lower()}}]}}
+
+    def __get_marker(self, ticker, archived_prices) -> object:
+        """
+        Marker of ticker prices: stock_prices documents marker, marker of documents until last archived date and
+        whether archived prices were deleted.
+        @param ticker: string
+        @param archived_prices: TickerPrices/None
+        @return: list/None (on error)
+        """
+        markers = self.__load_ticker_marker(
+            ticker, archived_prices.get_last_date() if archived_prices else None
+        )
+        if markers is None:
+            return None
+        return list(markers) + [
+            bool(self.__archive) and ticker in self.__archive.get_deleted_tickers()
+        ]
+
+    @staticmethod
+    def __load_ticker_marker(ticker, archived_end_ts=None) -> object:
+        """
+        Marker of ticker documents in stock_prices index (stats of each price field): changes when documents are
+        added, overwritten or deleted. Marker of documents until archived_end_ts is loaded in the same request.
+        @param ticker: string
+        @param archived_end_ts: float, last archived date (None if ticker is not archived)
+        @return: tuple (list, list/None)/None (on error)
+        """
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        stats_aggregations = {
+            column: {"stats": {"field": column}} for column in PRICE_COLUMNS
+        }
+        aggregations = dict(stats_aggregations)
+        if archived_end_ts is not None:
+            aggregations["archived"] = {
+                "filter": {"range": {"date": {"lte": archived_end_ts}}},
+                "aggs": stats_aggregations,
+            }
+        es_result = es_dbi.search_documents(
+            config.ES_INDEX_STOCK_PRICES,
+            query_body={
+                "query": PriceStore.__get_ticker_query(ticker),
+                "aggs": aggregations,
+            },
+            size=0,
+        )
+        if not es_result or "aggregations" not in es_result:
+            return None
+
+        def get_marker(stats) -> list:
+            return [
+                [stats[column][key] for key in ["count", "min", "max", "sum"]]
+                for column in PRICE_COLUMNS
+            ]
+
+        es_aggregations = es_result["aggregations"]
+        return (
+            get_marker(es_aggregations),
+            (
+                get_marker(es_aggregations["archived"])
+                if archived_end_ts is not None
+                else None
+            ),
+        )
+
+    @staticmethod
+    def __load_ticker_prices(ticker, after_ts=None) -> object:
+        """
+        Load ticker price history from stock_prices index.
+        @param ticker: string
+        @param after_ts: float, only load prices newer than after_ts (default all)
+        @return: TickerPrices/None (on error)
+        """
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+
+        es_query = {
+            "_source": ["ticker"] + PRICE_COLUMNS,
+            "query": PriceStore.__get_ticker_query(ticker),
+        }
+        if after_ts is not None:
+            es_query["query"]["bool"]["must"].append(
+                {"range": {"date": {"gt": after_ts}}}
+            )
+        try:
+            rows = [
+                es_price_doc["_source"]
+                for es_price_doc in es_dbi.scroll_search_documents_generator(
+                    config.ES_INDEX_STOCK_PRICES,
+                    query_body=es_query,
+                    raise_on_error=True,
+                )
+                if es_price_doc["_source"].get("ticker", "").upper() == ticker
+            ]
+        except Exception as exception:
+            Logger.error(
+                "Could not load price history for {}. {}".format(ticker, exception)
+            )
+            return None
+
+        return TickerPrices.from_rows(ticker, rows)
@@ -0,0 +1,65 @@
+"""
+Process pool for CPU bound work (ex. simulations) that must not run on the webserver request loop.
+"""
+
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+from util import config
+
+
+class ProcessPool:
+    """
+    Per process pool of spawned worker processes. Workers are spawned (not forked), so they do not inherit the
+    gevent hub / monkey patched state of the webserver worker. Waiting for results only blocks the calling greenlet.
+    """
+
+    instance = None
+    instance_lock = threading.Lock()
+
+    def __init__(self, max_workers):
+        """
+        Singleton class constructor. Must not be called directly.
+        @param max_workers: int, number of worker processes
+        """
+        if ProcessPool.instance and ProcessPool.instance.pid == os.getpid():
+            raise Exception(
+                "Singleton ProcessPool called directly. Use ProcessPool.get_instance() method"
+            )
+
+        self.pid = os.getpid()
+        self.max_workers = max_workers
+        self.__executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    @staticmethod
+    def get_instance() -> "ProcessPool":
+        """
+        Returns existing instance of ProcessPool class, or creates new instance if none exists in current process
+        (ex. after gunicorn forked the worker from a preloaded master).
+        @return: ProcessPool object
+        """
+        with ProcessPool.instance_lock:
+            if ProcessPool.instance is None or ProcessPool.instance.pid != os.getpid():
+                ProcessPool.instance = ProcessPool(max_workers=config.PROCESS_POOL_SIZE)
+        return ProcessPool.instance
+
+    def map(self, function, arguments) -> list:
+        """
+        Run function for each arguments tuple in worker processes.
+        @param function: picklable module level function/static method
+        @param arguments: list of tuples
+        @return: list, results in arguments order
+        """
+        futures = [self.__executor.submit(function, *args) for args in arguments]
+        return [future.result() for future in futures]
+
+    def shutdown(self) -> None:
+        """
+        Stop worker processes.
+        @return: None
+        """
+        self.__executor.shutdown(wait=True)
@@ -0,0 +1,54 @@
+"""
+Inter-process exclusive lock on a file.
+"""
+
+import fcntl
+import os
+
+
+class FileLock:
+    """
+    Non blocking exclusive lock (flock) on a file, used for leader election between processes of the same host.
+    The lock is released by the OS when the holder process exits, so a crashed leader never blocks a new one.
+    """
+
+    def __init__(self, path):
+        """
+        @param path: string
+        """
+        self.path = path
+        self.__file = None
+
+    def try_acquire(self) -> bool:
+        """
+        Acquire lock if not held by another process. Holder pid is written to lock file.
+        @return: boolean
+        """
+        if self.__file is not None:
+            return True
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        file = open(self.path, "a+")
+        try:
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            file.close()
+            return False
+
+        file.truncate(0)
+        file.write(str(os.getpid()))
+        file.flush()
+        self.__file = file
+        return True
+
+    def release(self) -> None:
+        """
+        Release lock if held.
+        @return: None
+        """
+        if self.__file is None:
+            return
+        fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+        self.__file.close()
+        self.__file = None
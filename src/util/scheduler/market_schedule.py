@@ -0,0 +1,76 @@
+"""
+Market close time schedule.
+"""
+
+import datetime
+
+import pytz
+
+_MAX_DAYS_AHEAD = 8
+
+
+class MarketSchedule:
+    """
+    Close time of a market in its own timezone, on its trading week days. Used to run tasks (price updates) after
+    each trading session of the market.
+    """
+
+    def __init__(self, name, timezone, close, days, exchanges):
+        """
+        @param name: string
+        @param timezone: string, ex. "America/New_York"
+        @param close: string "HH:MM", local close time
+        @param days: list of ints, trading week days (Monday = 0)
+        @param exchanges: list of strings, exchange names of market tickers
+        """
+        self.name = name
+        self.timezone = pytz.timezone(timezone)
+        self.close = datetime.datetime.strptime(close, "%H:%M").time()
+        self.days = set(days)
+        self.exchanges = {exchange.lower() for exchange in exchanges}
+
+    def has_exchange(self, exchanges) -> bool:
+        """
+        Check if any of a ticker exchanges belongs to market.
+        @param exchanges: list of strings
+        @return: boolean
+        """
+        return any(exchange.lower() in self.exchanges for exchange in exchanges)
+
+    def get_next_close(self, after_ts, delay=0) -> datetime.datetime:
+        """
+        First trading day close (plus delay) after timestamp.
+        @param after_ts: float
+        @param delay: int, seconds after close
+        @return: datetime, timezone aware (market timezone)
+        """
+        local_date = datetime.datetime.fromtimestamp(after_ts, tz=self.timezone).date()
+        for day in range(_MAX_DAYS_AHEAD):
+            date = local_date + datetime.timedelta(days=day)
+            if date.weekday() not in self.days:
+                continue
+
+            close = self.timezone.localize(datetime.datetime.combine(date, self.close))
+            if close.timestamp() + delay > after_ts:
+                return close
+
+        raise ValueError("Market {} has no trading days".format(self.name))
+
+    def get_last_close(self, before_ts, delay=0) -> datetime.datetime:
+        """
+        Last trading day close (plus delay) at or before timestamp.
+        @param before_ts: float
+        @param delay: int, seconds after close
+        @return: datetime, timezone aware (market timezone)
+        """
+        local_date = datetime.datetime.fromtimestamp(before_ts, tz=self.timezone).date()
+        for day in range(_MAX_DAYS_AHEAD):
+            date = local_date - datetime.timedelta(days=day)
+            if date.weekday() not in self.days:
+                continue
+
+            close = self.timezone.localize(datetime.datetime.combine(date, self.close))
+            if close.timestamp() + delay <= before_ts:
+                return close
+
+        raise ValueError("Market {} has no trading days".format(self.name))
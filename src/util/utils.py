@@ -1,10 +1,5 @@
-import time
 from datetime import datetime
 
-import pandas
-from yahoofinancials import YahooFinancials
-from yfinance import Ticker
-
 from util import config
 from util.logger.logger import Logger
 
@@ -22,6 +17,17 @@ EXCHANGE_NAMES = {
 }
 
 
+def get_stock_price_id(ticker, date) -> str:
+    """
+    Deterministic stock_prices document id, so indexing the same price again overwrites it instead of adding a
+    duplicate.
+    @param ticker: string
+    @param date: float/int, timestamp
+    @return: string
+    """
+    return "{}_{}".format(ticker.upper(), int(float(date)))
+
+
 def get_exchange_name(exchange) -> str:
     """
     Return exchange full name.
@@ -33,95 +39,6 @@ def get_exchange_name(exchange) -> str:
     return EXCHANGE_NAMES[exchange]
 
 
-def yf_get_info_for_ticker(ticker) -> dict:
-    """
-    Get ticker info using yfinance and format result.
-    @param ticker: string
-    @return: dict
-    """
-    yf_ticker = Ticker(ticker)
-    try:
-        _ = yf_ticker.info
-    except Exception as e:
-        Logger.exception("No info for ticker {}. {}".format(ticker, str(e)))
-        return {}
-
-    info = dict()
-    info["ticker"] = ticker
-    info["names"] = [yf_ticker.info.get("longName", None)]
-    short_name = yf_ticker.info.get("shortName", None)
-    if not info["names"] or (
-        short_name and info["names"][0].lower() != short_name.lower()
-    ):
-        info["names"].append(short_name.rstrip(" -"))
-
-    info["description"] = yf_ticker.info.get("longBusinessSummary", None)
-    info["industry"] = yf_ticker.info.get("industry", None)
-    info["sector"] = yf_ticker.info.get("sector", None)
-    info["exchanges"] = [yf_ticker.info.get("exchange", None)]
-    if info["exchanges"]:
-        info["exchanges"] = [get_exchange_name(ex) for ex in info["exchanges"]]
-    info["website"] = yf_ticker.info.get("website", None)
-    info["tags"] = []
-
-    for key in info:
-        if isinstance(info[key], list):
-            info[key] = [el for el in info[key] if el]
-
-    info["names"] = list(set(info["names"]))
-
-    tags = []
-    if info["industry"]:
-        tags.append(info["industry"])
-    if info["sector"]:
-        tags.append(info["sector"])
-    tags = list(set(tags))
-
-    if tags:
-        info["tags"] = tags
-
-    return info
-
-
-def yf_get_historical_price_data_for_ticker(
-    ticker,
-    start_date=DEFAULT_LAST_PRICE_DATE,
-    end_date=datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d"),
-) -> list:
-    """
-    Retrieve historical price data using yahoofinancials lib.
-    @param ticker: string
-    @param start_date: string "YYYY-MM-DD"
-    @param end_date: string "YYYY-MM-DD"
-    @return: list
-    """
-
-    ticker_prices = []
-    yahoo_financials = YahooFinancials(ticker)
-    data = yahoo_financials.get_historical_price_data(
-        start_date=start_date, end_date=end_date, time_interval="daily"
-    )
-    if not data or not data[ticker] or "prices" not in data[ticker]:
-        Logger.warning("No price data for {}".format(ticker))
-        return []
-
-    prices_dataframe = pandas.DataFrame(data[ticker]["prices"])
-    for _, price_entry in prices_dataframe.iterrows():
-        ticker_prices.append(
-            {
-                "ticker": ticker,
-                "date": float(price_entry["date"]),
-                "open": float(price_entry["open"]),
-                "close": float(price_entry["close"]),
-                "high": float(price_entry["high"]),
-                "low": float(price_entry["low"]),
-                "volume": float(price_entry["volume"]),
-            }
-        )
-
-    return ticker_prices
-
-
 def get_all_tickers(es_dbi):
     """
     Get all tickers from stocks index.
@@ -142,6 +59,27 @@ def get_all_tickers(es_dbi):
     return sorted(list(tickers))
 
 
+def get_ticker_exchanges(es_dbi) -> dict:
+    """
+    Get exchanges of all tickers from stocks index.
+    @param es_dbi: ElasticsearchDBI object
+    @return: dict {ticker: list of exchange names}
+    """
+    ticker_exchanges = {}
+    try:
+        for es_doc in es_dbi.scroll_search_documents_generator(
+            config.ES_INDEX_STOCKS, query_body={"_source": ["exchanges"]}, size=1000
+        ):
+            exchanges = es_doc.get("_source", {}).get("exchanges", None) or []
+            if isinstance(exchanges, str):
+                exchanges = [exchanges]
+            ticker_exchanges[es_doc["_id"]] = [ex for ex in exchanges if ex]
+    except Exception as exception:
+        Logger.exception(str(exception))
+
+    return ticker_exchanges
+
+
 def get_last_price_date_for_ticker(ticker, es_dbi) -> str:
     """
     Get last price date from stock_prices index for specified ticker.
@@ -178,6 +116,38 @@ def get_last_price_date_for_ticker(ticker, es_dbi) -> str:
     return DEFAULT_LAST_PRICE_DATE
 
 
+def get_last_price_date_for_all_tickers(es_dbi) -> object:
+    """
+    Get last price date from stock_prices index for all tickers using a terms + max(date) composite aggregation
+    (one request for each 1000 tickers).
+    @param es_dbi: ElasticsearchDBI object
+    @return: dict/None (on error)
+    """
+    ticker_last_price_dates = {}
+    try:
+        for bucket in es_dbi.composite_aggregation_generator(
+            config.ES_INDEX_STOCK_PRICES,
+            sources=[{"ticker": {"terms": {"field": "ticker.keyword"}}}],
+            aggregations={"last_date": {"max": {"field": "date"}}},
+            raise_on_error=True,
+        ):
+            if bucket["last_date"]["value"] is None:
+                continue
+
+            ticker = bucket["key"]["ticker"].upper()
+            last_date = datetime.fromtimestamp(
+                int(bucket["last_date"]["value"])
+            ).strftime("%Y-%m-%d")
+            ticker_last_price_dates[ticker] = max(
+                last_date, ticker_last_price_dates.get(ticker, last_date)
+            )
+    except Exception as exception:
+        Logger.exception(exception)
+        return None
+
+    return ticker_last_price_dates
+
+
 def get_last_price_date_for_tickers(tickers, es_dbi) -> dict:
     """
     Get last known date from stock_prices index for each ticker
@@ -186,10 +156,14 @@ def get_last_price_date_for_tickers(tickers, es_dbi) -> dict:
     @return: dict
     """
 
-    # get last price date for each ticker
-    ticker_last_price_dates = {}
-    for ticker in tickers:
-        last_date = get_last_price_date_for_ticker(ticker, es_dbi)
-        if last_date:
-            ticker_last_price_dates[ticker] = last_date
-    return ticker_last_price_dates
+    ticker_last_price_dates = get_last_price_date_for_all_tickers(es_dbi)
+    if ticker_last_price_dates is None:
+        # aggregation failed, fallback to one search for each ticker
+        return {
+            ticker: get_last_price_date_for_ticker(ticker, es_dbi) for ticker in tickers
+        }
+
+    return {
+        ticker: ticker_last_price_dates.get(ticker.upper(), DEFAULT_LAST_PRICE_DATE)
+        for ticker in tickers
+    }
@@ -17,3 +17,38 @@ TIME_RANGES = {
     "LAST_5_YEARS": NOW_TIMESTAMP - 5 * 365 * ONE_DAY,
     "ALL": 0,
 }
+
+BACKTEST_MODE_SUMMARY = "summary"
+BACKTEST_MODE_TIMESERIES = "timeseries"
+BACKTEST_MODES = [BACKTEST_MODE_SUMMARY, BACKTEST_MODE_TIMESERIES]
+BACKTEST_BATCH_MAX_PORTFOLIOS = 100
+CORRELATION_MAX_TICKERS = 200
+
+PRICE_FORMAT_JSON = "json"
+PRICE_FORMAT_JSON_STREAM = "json-stream"
+PRICE_FORMAT_NDJSON = "ndjson"
+PRICE_FORMAT_COLUMNAR = "columnar"
+PRICE_FORMAT_MSGPACK = "msgpack"
+PRICE_FORMATS = [
+    PRICE_FORMAT_JSON,
+    PRICE_FORMAT_JSON_STREAM,
+    PRICE_FORMAT_NDJSON,
+    PRICE_FORMAT_COLUMNAR,
+    PRICE_FORMAT_MSGPACK,
+]
+PRICE_STREAM_CHUNK_SIZE = 1000
+STOCKS_PAGE_DEFAULT_SIZE = 100
+STOCKS_PAGE_MAX_SIZE = 1000
+SUGGEST_DEFAULT_SIZE = 10
+SUGGEST_MAX_SIZE = 50
+
+COMPOUND_INTEREST_GRID_MAX_SCENARIOS = 10000
+COMPOUND_INTEREST_MAX_YEARS = 100
+
+MONTE_CARLO_PARAMETRIC = "parametric"
+MONTE_CARLO_BOOTSTRAP = "bootstrap"
+MONTE_CARLO_METHODS = [MONTE_CARLO_PARAMETRIC, MONTE_CARLO_BOOTSTRAP]
+MONTE_CARLO_DEFAULT_PATHS = 100000
+MONTE_CARLO_MAX_PATHS = 250000
+MONTE_CARLO_MAX_YEARS = 50
+MONTE_CARLO_PERCENTILES = [5, 10, 25, 50, 75, 90, 95]
@@ -0,0 +1,75 @@
+"""
+Analytics APIs.
+"""
+
+import time
+from datetime import datetime
+
+from webserver.constants import TIME_RANGES
+from webserver.core.portfolio_management import PortfolioManagementAPI
+from webserver.decorators import fails_safe_request
+from webserver.model.analytics import NavAnalytics
+from webserver.model.backtest import BacktestEngine
+
+
+class AnalyticsAPI:
+    @staticmethod
+    @fails_safe_request
+    def get_rolling_returns(
+        user_id,
+        portfolio_id=None,
+        ticker=None,
+        windows=(1, 3, 5),
+        start_ts=TIME_RANGES["ALL"],
+        end_ts=int(time.time()),
+    ) -> tuple:
+        """
+        Rolling window returns (best, worst, median) for user portfolio or ticker. NAV is computed once and all
+        windows are evaluated on it.
+        @param user_id: string
+        @param portfolio_id: string
+        @param ticker: string
+        @param windows: list, window lengths in years
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple
+        """
+
+        if portfolio_id:
+            status, portfolio, msg = PortfolioManagementAPI.get_user_portfolio(
+                user_id, portfolio_id, operation="analyze"
+            )
+            if status != 200:
+                return status, portfolio, msg
+            tickers = [
+                allocation.get_ticker() for allocation in portfolio.get_allocations()
+            ]
+            percentages = [
+                allocation.get_percentage()
+                for allocation in portfolio.get_allocations()
+            ]
+        elif ticker:
+            tickers, percentages = [ticker.upper()], [100]
+        else:
+            return 400, {}, "Portfolio id or ticker must be specified."
+
+        days, relative_prices, weights = BacktestEngine.compute_relative_prices(
+            tickers, percentages, start_ts, end_ts
+        )
+        if not len(days):
+            return 404, {}, "No price history for specified time range."
+
+        return (
+            200,
+            {
+                "start_date": datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d"),
+                "end_date": datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d"),
+                "rolling_returns": {
+                    "{}Y".format(window): NavAnalytics.rolling_returns(
+                        days, relative_prices, window, weights=weights
+                    )
+                    for window in windows
+                },
+            },
+            "OK",
+        )
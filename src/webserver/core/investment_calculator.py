@@ -1,4 +1,25 @@
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy
+
+from util.price_store.price_matrix import ONE_DAY
+from util.price_store.price_store import PriceStore
+from util.process_pool.process_pool import ProcessPool
+from webserver.constants import (
+    COMPOUND_INTEREST_GRID_MAX_SCENARIOS,
+    COMPOUND_INTEREST_MAX_YEARS,
+    MONTE_CARLO_BOOTSTRAP,
+    MONTE_CARLO_DEFAULT_PATHS,
+    MONTE_CARLO_MAX_PATHS,
+    MONTE_CARLO_MAX_YEARS,
+    MONTE_CARLO_METHODS,
+    MONTE_CARLO_PARAMETRIC,
+    MONTE_CARLO_PERCENTILES,
+)
 from webserver.decorators import fails_safe_request
+from webserver.model.analytics import NavAnalytics
+from webserver.model.compound_interest import CompoundInterestGrid
+from webserver.model.monte_carlo import MonteCarloSimulator
 
 
 class InvestmentCalculatorAPI:
@@ -55,3 +76,225 @@ class InvestmentCalculatorAPI:
             },
             "OK",
         )
+
+    @staticmethod
+    @fails_safe_request
+    def compute_compound_interest_grid(
+        starting_amounts,
+        yearly_return_rates,
+        investment_lengths_in_years,
+        additional_yearly_contributions=(0,),
+        additional_at_end_of_year=True,
+        include_schedule=False,
+    ) -> tuple:
+        """
+        Compute compound interest and final amount for all combinations of parameters (Cartesian product).
+        @param starting_amounts: list, initial deposits
+        @param yearly_return_rates: list, yearly return rates
+        @param investment_lengths_in_years: list, investment lengths in years
+        @param additional_yearly_contributions: list, additional yearly contributions
+        @param additional_at_end_of_year: boolean, flag for additional contribution (start of end of each year)
+        @param include_schedule: boolean, include amount at the end of each year
+        @return: tuple
+        """
+
+        for name, values in [
+            ("starting_amounts", starting_amounts),
+            ("yearly_return_rates", yearly_return_rates),
+            ("investment_lengths_in_years", investment_lengths_in_years),
+            ("additional_yearly_contributions", additional_yearly_contributions),
+        ]:
+            if not values or not all(
+                isinstance(value, (int, float)) and not isinstance(value, bool)
+                for value in values
+            ):
+                return 400, {}, "Param {} must be a list of numbers.".format(name)
+
+        if not all(
+            isinstance(length, int) and 1 <= length <= COMPOUND_INTEREST_MAX_YEARS
+            for length in investment_lengths_in_years
+        ):
+            return (
+                400,
+                {},
+                "Investment lengths must be integers between 1 and {}".format(
+                    COMPOUND_INTEREST_MAX_YEARS
+                ),
+            )
+        if min(yearly_return_rates) < -100:
+            return 400, {}, "Yearly return rates must be greater or equal to -100"
+
+        grid = CompoundInterestGrid(
+            starting_amounts,
+            yearly_return_rates,
+            investment_lengths_in_years,
+            additional_yearly_contributions,
+            additional_at_end_of_year,
+        )
+        if len(grid) > COMPOUND_INTEREST_GRID_MAX_SCENARIOS:
+            return (
+                400,
+                {},
+                "Too many scenarios. Max {} per request.".format(
+                    COMPOUND_INTEREST_GRID_MAX_SCENARIOS
+                ),
+            )
+
+        scenarios = grid.get_scenarios(include_schedule=include_schedule)
+        return 200, {"count": len(scenarios), "scenarios": scenarios}, "OK"
+
+    @staticmethod
+    def get_historical_yearly_returns(ticker) -> numpy.ndarray:
+        """
+        All (overlapping) rolling 1 year returns of ticker close prices.
+        @param ticker: string
+        @return: numpy.ndarray/None
+        """
+        ticker_prices = PriceStore.get_instance().get_ticker_prices(ticker)
+        if ticker_prices is None:
+            return None
+
+        closes = ticker_prices.columns["close"]
+        valid = closes > 0
+        _, _, returns = NavAnalytics.rolling_window_returns(
+            numpy.floor_divide(ticker_prices.columns["date"][valid], ONE_DAY),
+            closes[valid],
+            1,
+        )
+        return returns
+
+    @staticmethod
+    @fails_safe_request
+    def simulate_compound_interest(
+        starting_amount,
+        investment_length_in_years,
+        additional_yearly_contribution=0,
+        additional_at_end_of_year=True,
+        method=MONTE_CARLO_PARAMETRIC,
+        yearly_return_rate=None,
+        yearly_volatility=None,
+        ticker=None,
+        paths=MONTE_CARLO_DEFAULT_PATHS,
+        seed=None,
+    ) -> tuple:
+        """
+        Monte Carlo simulation of final amount of investment. Yearly returns are drawn from a normal distribution
+        (parametric) or resampled from ticker historical yearly returns (bootstrap). Paths and percentile bands are
+        computed in worker processes; the calling greenlet only waits for percentile bands.
+        @param starting_amount: int, initial deposit
+        @param investment_length_in_years: int, investment length in years
+        @param additional_yearly_contribution: int, additional yearly contribution
+        @param additional_at_end_of_year: boolean, flag for additional contribution (start of end of each year)
+        @param method: string, parametric or bootstrap
+        @param yearly_return_rate: float, mean yearly return rate (parametric)
+        @param yearly_volatility: float, yearly return standard deviation (parametric)
+        @param ticker: string, ticker with historical returns (bootstrap)
+        @param paths: int, number of simulated paths
+        @param seed: int, random seed for reproducible results
+        @return: tuple
+        """
+
+        if method not in MONTE_CARLO_METHODS:
+            return 400, {}, "Invalid simulation method {}.".format(method)
+        if not 1 <= investment_length_in_years <= MONTE_CARLO_MAX_YEARS:
+            return (
+                400,
+                {},
+                "Investment length must be between 1 and {}".format(
+                    MONTE_CARLO_MAX_YEARS
+                ),
+            )
+        if not 1 <= paths <= MONTE_CARLO_MAX_PATHS:
+            return (
+                400,
+                {},
+                "Number of paths must be between 1 and {}".format(
+                    MONTE_CARLO_MAX_PATHS
+                ),
+            )
+
+        historical_returns = None
+        if method == MONTE_CARLO_BOOTSTRAP:
+            if not ticker:
+                return 400, {}, "Ticker is required for bootstrap simulation."
+            historical_returns = InvestmentCalculatorAPI.get_historical_yearly_returns(
+                ticker
+            )
+            if historical_returns is None or not len(historical_returns):
+                return (
+                    404,
+                    {},
+                    "Not enough price history for ticker {}.".format(ticker),
+                )
+        elif yearly_return_rate is None or yearly_volatility is None:
+            return (
+                400,
+                {},
+                "Yearly return rate and volatility are required for parametric simulation.",
+            )
+        elif yearly_volatility < 0:
+            return 400, {}, "Yearly volatility must be positive."
+
+        # shards write amounts into shared memory and percentile bands are computed from it in worker processes:
+        # the calling greenlet only waits and receives percentile bands
+        process_pool = ProcessPool.get_instance()
+        shape = (paths, investment_length_in_years)
+        shared_amounts = SharedMemory(
+            create=True,
+            size=numpy.dtype(numpy.float32).itemsize * int(numpy.prod(shape)),
+        )
+        try:
+            shards = MonteCarloSimulator.get_shards(
+                paths, process_pool.max_workers, seed
+            )
+            shard_rows = numpy.cumsum([0] + [shard_paths for shard_paths, _ in shards])
+            process_pool.map(
+                MonteCarloSimulator.simulate_shared_shard,
+                [
+                    (
+                        shared_amounts.name,
+                        shape,
+                        int(row),
+                        shard_paths,
+                        shard_seed,
+                        starting_amount,
+                        investment_length_in_years,
+                        additional_yearly_contribution,
+                        additional_at_end_of_year,
+                        method,
+                        yearly_return_rate,
+                        yearly_volatility,
+                        historical_returns,
+                    )
+                    for row, (shard_paths, shard_seed) in zip(shard_rows, shards)
+                ],
+            )
+            (simulation_info,) = process_pool.map(
+                MonteCarloSimulator.get_shared_percentile_bands,
+                [
+                    (
+                        shared_amounts.name,
+                        shape,
+                        MONTE_CARLO_PERCENTILES,
+                        starting_amount
+                        + additional_yearly_contribution
+                        * numpy.arange(1, investment_length_in_years + 1),
+                    )
+                ],
+            )
+        finally:
+            shared_amounts.close()
+            shared_amounts.unlink()
+
+        simulation_info.update(
+            starting_amount=starting_amount,
+            additional_contribution=investment_length_in_years
+            * additional_yearly_contribution,
+            method=method,
+        )
+        if method == MONTE_CARLO_BOOTSTRAP:
+            simulation_info.update(
+                ticker=ticker.upper(), historical_returns=int(len(historical_returns))
+            )
+
+        return 200, simulation_info, "OK"
@@ -0,0 +1,21 @@
+"""
+Monitoring APIs.
+"""
+
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from webserver.decorators import fails_safe_request
+
+
+class MonitoringAPI:
+    @staticmethod
+    @fails_safe_request
+    def get_elasticsearch_pool_stats() -> tuple:
+        """
+        Get Elasticsearch connection pool utilization (current worker).
+        @return: tuple
+        """
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        return 200, es_dbi.get_pool_stats(), "OK"
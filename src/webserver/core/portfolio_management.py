@@ -1,9 +1,19 @@
 import time
 
 from util import config
+from util.cache.lru_cache import LRUCache
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
-from webserver.constants import TIME_RANGES
+from util.price_store.price_store import PriceStore
+from webserver.constants import (
+    BACKTEST_BATCH_MAX_PORTFOLIOS,
+    BACKTEST_MODE_SUMMARY,
+    BACKTEST_MODE_TIMESERIES,
+    BACKTEST_MODES,
+    ONE_DAY,
+    TIME_RANGES,
+)
 from webserver.decorators import fails_safe_request
+from webserver.model.backtest import BacktestEngine
 from webserver.model.portfolio import (
     Allocation,
     AllocationException,
@@ -14,6 +24,113 @@ from webserver.model.user import User
 
 
 class PortfolioManagementAPI:
+    backtest_cache = None
+
+    @staticmethod
+    def get_backtest_cache() -> LRUCache:
+        """
+        Backtest results cache. Keys contain the version of holdings prices, so results computed from prices that
+        changed since (in any process) are never served.
+        @return: LRUCache
+        """
+        if PortfolioManagementAPI.backtest_cache is None:
+            PortfolioManagementAPI.backtest_cache = LRUCache(
+                max_size=config.BACKTEST_CACHE_MAX_SIZE, ttl=config.BACKTEST_CACHE_TTL
+            )
+        return PortfolioManagementAPI.backtest_cache
+
+    @staticmethod
+    def get_backtest_cache_key(
+        allocations, start_ts, end_ts, mode, risk_metrics=False
+    ) -> tuple:
+        """
+        Backtest cache key: normalized allocations + start/end trading days + mode + risk metrics flag + versions
+        of holdings prices in range (digests, answered from price store memory).
+        @param allocations: List[Allocation]
+        @param start_ts: int
+        @param end_ts: int
+        @param mode: string
+        @param risk_metrics: boolean
+        @return: tuple
+        """
+        price_store = PriceStore.get_instance()
+        tickers = sorted(
+            {allocation.get_ticker().upper() for allocation in allocations}
+        )
+        return (
+            tuple(
+                sorted(
+                    (
+                        allocation.get_ticker().upper(),
+                        float(allocation.get_percentage()),
+                    )
+                    for allocation in allocations
+                )
+            ),
+            int(start_ts) // ONE_DAY,
+            int(end_ts) // ONE_DAY,
+            mode,
+            bool(risk_metrics),
+            tuple(
+                (ticker, price_store.get_range_version(ticker, start_ts, end_ts)[0])
+                for ticker in tickers
+            ),
+        )
+
+    @staticmethod
+    def get_user_portfolio(user_id, portfolio_id, operation="access") -> tuple:
+        """
+        Get portfolio object for portfolio with portfolio_id. Portfolio must belong to user.
+        @param user_id: string
+        @param portfolio_id: string
+        @param operation: string, operation name used in error message
+        @return: tuple (status, Portfolio/{}, message)
+        """
+
+        # check portfolio exists
+        es_dbi = ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+        portfolio_document = es_dbi.get_document_by_id(
+            config.ES_INDEX_PORTFOLIOS, _id=portfolio_id
+        )
+        if not portfolio_document:
+            return 404, {}, "Portfolio not found."
+
+        # check portfolio owner
+        if portfolio_document["_source"]["user_id"] != user_id:
+            return 401, {}, "Cannot {} other users' portfolios".format(operation)
+
+        # setup alloation objects
+        allocation_objects = []
+        for allocation in portfolio_document["_source"]["allocations"]:
+            try:
+                allocation_objects.append(Allocation(allocation_json=allocation))
+            except AllocationException:
+                return 400, {}, "Invalid allocation {}".format(allocation)
+
+        # setup portfolio object
+        try:
+            portfolio = Portfolio(
+                portfolio_json={
+                    "portfolio_name": portfolio_document["_source"].get(
+                        "portfolio_name", None
+                    ),
+                    "created_timestamp": portfolio_document["_source"].get(
+                        "created_timestamp", None
+                    ),
+                    "modified_timestamp": portfolio_document["_source"].get(
+                        "modified_timestamp", None
+                    ),
+                    "user_id": portfolio_document["_source"].get("user_id", None),
+                    "allocations": allocation_objects,
+                }
+            )
+        except PortfolioException as e:
+            return 400, {}, str(e)
+
+        return 200, portfolio, "OK"
+
     @staticmethod
     def check_user_exists(user_id) -> bool:
         """
@@ -190,6 +307,9 @@ class PortfolioManagementAPI:
         portfolio_id,
         start_ts=TIME_RANGES["LAST_5_YEARS"],
         ends_ts=int(time.time()),
+        mode=BACKTEST_MODE_SUMMARY,
+        risk_metrics=False,
+        portfolio=None,
     ) -> tuple:
         """
         Backtest user portfolio. Default interval 5 years ago - now.
@@ -197,52 +317,224 @@ class PortfolioManagementAPI:
         @param portfolio_id: string
         @param start_ts: int
         @param ends_ts: int
+        @param mode: string, summary (first/last price returns) or timeseries (daily NAV)
+        @param risk_metrics: boolean, include volatility, max drawdown, Sharpe, Sortino and Calmar ratios
+        @param portfolio: Portfolio, user portfolio already fetched (ex. by get_backtest_version)
         @return: tuple
         """
 
-        # check portfolio exists
-        es_dbi = ElasticsearchDBI.get_instance(
-            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        if mode not in BACKTEST_MODES:
+            return 400, {}, "Invalid backtest mode {}.".format(mode)
+
+        if portfolio is None:
+            status, portfolio, msg = PortfolioManagementAPI.get_user_portfolio(
+                user_id, portfolio_id, operation="backtest"
+            )
+            if status != 200:
+                return status, portfolio, msg
+
+        # same allocations backtested for same days -> cached result
+        backtest_cache = PortfolioManagementAPI.get_backtest_cache()
+        cache_key = PortfolioManagementAPI.get_backtest_cache_key(
+            portfolio.get_allocations(), start_ts, ends_ts, mode, risk_metrics
         )
-        portfolio_document = es_dbi.get_document_by_id(
-            config.ES_INDEX_PORTFOLIOS, _id=portfolio_id
+        backtest_info = backtest_cache.get(cache_key)
+        if backtest_info is None:
+            backtest_info = (
+                portfolio.backtest_timeseries(
+                    start_ts=start_ts,
+                    end_ts=ends_ts,
+                    include_risk_metrics=risk_metrics,
+                )
+                if mode == BACKTEST_MODE_TIMESERIES
+                else portfolio.backtest(
+                    start_ts=start_ts,
+                    end_ts=ends_ts,
+                    include_risk_metrics=risk_metrics,
+                )
+            )
+            backtest_cache.set(cache_key, backtest_info)
+
+        return 200, backtest_info, "OK"
+
+    @staticmethod
+    @fails_safe_request
+    def get_backtest_version(
+        user_id,
+        portfolio_id,
+        start_ts=TIME_RANGES["LAST_5_YEARS"],
+        ends_ts=int(time.time()),
+        mode=BACKTEST_MODE_SUMMARY,
+        risk_metrics=False,
+    ) -> tuple:
+        """
+        Version of user portfolio backtest: backtest cache key (allocations + versions of holdings prices in range).
+        Fetched portfolio is returned too, to be backtested without fetching it again.
+        @param user_id: string
+        @param portfolio_id: string
+        @param start_ts: int
+        @param ends_ts: int
+        @param mode: string
+        @param risk_metrics: boolean
+        @return: tuple (data: {version, portfolio})
+        """
+
+        if mode not in BACKTEST_MODES:
+            return 400, {}, "Invalid backtest mode {}.".format(mode)
+
+        status, portfolio, msg = PortfolioManagementAPI.get_user_portfolio(
+            user_id, portfolio_id, operation="backtest"
+        )
+        if status != 200:
+            return status, portfolio, msg
+
+        return (
+            200,
+            {
+                "version": PortfolioManagementAPI.get_backtest_cache_key(
+                    portfolio.get_allocations(), start_ts, ends_ts, mode, risk_metrics
+                ),
+                "portfolio": portfolio,
+            },
+            "OK",
         )
-        if not portfolio_document:
-            return 404, {}, "Portfolio not found."
 
-        # check portfolio owner
-        if portfolio_document["_source"]["user_id"] != user_id:
-            return 401, {}, "Cannot backtest other users' portfolios"
+    @staticmethod
+    @fails_safe_request
+    def backtest_portfolios(
+        user_id,
+        portfolio_ids=None,
+        allocations_list=None,
+        start_ts=TIME_RANGES["LAST_5_YEARS"],
+        ends_ts=int(time.time()),
+        mode=BACKTEST_MODE_SUMMARY,
+        risk_metrics=False,
+    ) -> tuple:
+        """
+        Backtest multiple user portfolios and/or inline allocations in one pass. Each distinct ticker price history
+        is loaded once. Results are returned per portfolio id (inline allocations as inline_<index>); portfolios that
+        cannot be backtested get an error message instead.
+        @param user_id: string
+        @param portfolio_ids: list
+        @param allocations_list: list of lists of dicts [[{'ticker': <>, 'percentage': <>}]]
+        @param start_ts: int
+        @param ends_ts: int
+        @param mode: string, summary (first/last price returns, same as single portfolio backtest) or timeseries
+        (daily NAV)
+        @param risk_metrics: boolean, include volatility, max drawdown, Sharpe, Sortino and Calmar ratios
+        @return: tuple
+        """
 
-        # setup alloation objects
-        allocation_objects = []
-        for allocation in portfolio_document["_source"]["allocations"]:
+        if mode not in BACKTEST_MODES:
+            return 400, {}, "Invalid backtest mode {}.".format(mode)
+
+        portfolio_ids = portfolio_ids or []
+        allocations_list = allocations_list or []
+        if not portfolio_ids and not allocations_list:
+            return 400, {}, "No portfolios to backtest."
+        if len(portfolio_ids) + len(allocations_list) > BACKTEST_BATCH_MAX_PORTFOLIOS:
+            return (
+                400,
+                {},
+                "Too many portfolios. Max {} per request.".format(
+                    BACKTEST_BATCH_MAX_PORTFOLIOS
+                ),
+            )
+
+        # get user portfolios in a single request
+        backtests = {}
+        portfolios_allocations = {}
+        if portfolio_ids:
+            es_dbi = ElasticsearchDBI.get_instance(
+                config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+            )
+            portfolio_documents = es_dbi.mget_documents_by_id(
+                config.ES_INDEX_PORTFOLIOS, ids=portfolio_ids
+            )
+            if portfolio_documents is None:
+                return 500, {}, "Could not get portfolios."
+
+            for portfolio_id, portfolio_document in zip(
+                portfolio_ids, portfolio_documents
+            ):
+                if not portfolio_document.get("found", False):
+                    backtests[portfolio_id] = {"error": "Portfolio not found."}
+                elif portfolio_document["_source"]["user_id"] != user_id:
+                    backtests[portfolio_id] = {
+                        "error": "Cannot backtest other users' portfolios"
+                    }
+                else:
+                    portfolios_allocations[portfolio_id] = portfolio_document[
+                        "_source"
+                    ]["allocations"]
+
+        for index, allocations in enumerate(allocations_list):
+            portfolios_allocations["inline_{}".format(index)] = allocations
+
+        # portfolios validation
+        portfolios = {}
+        for key, allocations in portfolios_allocations.items():
             try:
-                allocation_objects.append(Allocation(allocation_json=allocation))
-            except AllocationException:
-                return 400, "Invalid allocation {}".format(allocation)
+                portfolio = Portfolio(
+                    portfolio_json={
+                        "portfolio_name": key,
+                        "user_id": user_id,
+                        "allocations": [
+                            Allocation(allocation_json=allocation)
+                            for allocation in allocations
+                        ],
+                    }
+                )
+            except (AllocationException, PortfolioException) as e:
+                backtests[key] = {"error": str(e)}
+                continue
+            except (AttributeError, TypeError):
+                backtests[key] = {"error": "Invalid allocations {}".format(allocations)}
+                continue
+
+            portfolios[key] = (
+                [allocation.get_ticker() for allocation in portfolio.get_allocations()],
+                [
+                    allocation.get_percentage()
+                    for allocation in portfolio.get_allocations()
+                ],
+            )
 
-        # setup portfolio object
-        try:
-            portfolio = Portfolio(
-                portfolio_json={
-                    "portfolio_name": portfolio_document["_source"].get(
-                        "portfolio_name", None
-                    ),
-                    "created_timestamp": portfolio_document["_source"].get(
-                        "created_timestamp", None
-                    ),
-                    "modified_timestamp": portfolio_document["_source"].get(
-                        "modified_timestamp", None
-                    ),
-                    "user_id": portfolio_document["_source"].get("user_id", None),
-                    "allocations": allocation_objects,
-                }
+        if portfolios:
+            backtests.update(
+                BacktestEngine.backtest_batch(
+                    portfolios,
+                    start_ts=start_ts,
+                    end_ts=ends_ts,
+                    include_risk_metrics=risk_metrics,
+                )
+                if mode == BACKTEST_MODE_TIMESERIES
+                else BacktestEngine.backtest_summary_batch(
+                    portfolios,
+                    start_ts=start_ts,
+                    end_ts=ends_ts,
+                    include_risk_metrics=risk_metrics,
+                )
             )
-        except PortfolioException as e:
-            return 400, {}, str(e)
 
-        return 200, portfolio.backtest(start_ts=start_ts, end_ts=ends_ts), "OK"
+        return (
+            200,
+            {
+                key: backtests[key]
+                for key in portfolio_ids
+                + ["inline_{}".format(index) for index in range(len(allocations_list))]
+            },
+            "OK",
+        )
+
+    @staticmethod
+    @fails_safe_request
+    def get_backtest_cache_stats() -> tuple:
+        """
+        Get backtest cache size and hit/miss counters (current worker).
+        @return: tuple
+        """
+        return 200, PortfolioManagementAPI.get_backtest_cache().get_stats(), "OK"
 
     @staticmethod
     @fails_safe_request
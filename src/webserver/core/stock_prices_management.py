@@ -2,18 +2,38 @@
 Stock management APIs.
 """
 
+import json
 import time
 from datetime import datetime
 
+import numpy
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
 from util import config
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.market_data.market_data_provider import MarketDataProvider
+from util.price_store.price_matrix import PriceMatrix
+from util.price_store.price_store import PRICE_COLUMNS, PriceStore
 from util.utils import (
     DEFAULT_LAST_PRICE_DATE,
     get_last_price_date_for_ticker,
-    yf_get_historical_price_data_for_ticker,
+    get_stock_price_id,
+)
+from webserver.constants import (
+    CORRELATION_MAX_TICKERS,
+    PRICE_FORMAT_COLUMNAR,
+    PRICE_FORMAT_JSON_STREAM,
+    PRICE_FORMAT_MSGPACK,
+    PRICE_FORMAT_NDJSON,
+    PRICE_STREAM_CHUNK_SIZE,
+    TIME_RANGES,
 )
-from webserver.constants import TIME_RANGES
 from webserver.decorators import fails_safe_request
+from webserver.model.analytics import ReturnsAnalytics
 
 
 class StockPricesManagementAPI:
@@ -29,31 +49,181 @@ class StockPricesManagementAPI:
         @param end_ts: end timestamp
         @return: tuple
         """
-        es_dbi = ElasticsearchDBI.get_instance(
-            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        ticker_prices, start, end = StockPricesManagementAPI.get_ticker_prices_range(
+            ticker, start_ts, end_ts
         )
+        if start >= end:
+            return (
+                404,
+                {},
+                "No price history for ticker {} for specified time range.".format(
+                    ticker
+                ),
+            )
 
-        price_history = {}
-        for es_price_doc in es_dbi.scroll_search_documents_generator(
-            config.ES_INDEX_STOCK_PRICES,
-            query_body={
-                "query": {
-                    "bool": {
-                        "must": [
-                            {"term": {"ticker": ticker.lower()}},
-                            {"range": {"date": {"gte": start_ts, "lte": end_ts}}},
-                        ]
+        # most recent first, one entry per day
+        price_history = dict(
+            StockPricesManagementAPI.iter_price_history(ticker_prices, start, end)
+        )
+
+        return 200, price_history, "OK"
+
+    @staticmethod
+    @fails_safe_request
+    def stream_price_history_for_ticker(
+        ticker,
+        start_ts=TIME_RANGES["LAST_WEEK"],
+        end_ts=int(time.time()),
+        output_format=PRICE_FORMAT_NDJSON,
+    ) -> tuple:
+        """
+        Get stock price history since start until end for specified ticker as a generator of response chunks.
+        Prices are read from price store arrays in chunks, so memory per request does not depend on range size.
+        @param ticker: string
+        @param start_ts: start as timestamp
+        @param end_ts: end timestamp
+        @param output_format: string, ndjson (one price per line) or json-stream (same document as json format)
+        @return: tuple
+        """
+        if output_format not in [PRICE_FORMAT_NDJSON, PRICE_FORMAT_JSON_STREAM]:
+            return 400, {}, "Invalid streaming format {}.".format(output_format)
+
+        ticker_prices, start, end = StockPricesManagementAPI.get_ticker_prices_range(
+            ticker, start_ts, end_ts
+        )
+        if start >= end:
+            return (
+                404,
+                {},
+                "No price history for ticker {} for specified time range.".format(
+                    ticker
+                ),
+            )
+
+        prices = StockPricesManagementAPI.iter_price_history(ticker_prices, start, end)
+
+        def ndjson_chunks():
+            lines = []
+            for _, price in prices:
+                lines.append(json.dumps(price))
+                if len(lines) >= PRICE_STREAM_CHUNK_SIZE:
+                    yield "\n".join(lines) + "\n"
+                    lines = []
+            if lines:
+                yield "\n".join(lines) + "\n"
+
+        def json_chunks():
+            # {"data": {<date>: <price>, ...}, "message": "OK"}
+            yield '{"data": {'
+            separator = ""
+            entries = []
+            for date, price in prices:
+                entries.append("{}: {}".format(json.dumps(date), json.dumps(price)))
+                if len(entries) >= PRICE_STREAM_CHUNK_SIZE:
+                    yield separator + ", ".join(entries)
+                    separator, entries = ", ", []
+            if entries:
+                yield separator + ", ".join(entries)
+            yield '}, "message": "OK"}\n'
+
+        return (
+            200,
+            ndjson_chunks() if output_format == PRICE_FORMAT_NDJSON else json_chunks(),
+            "OK",
+        )
+
+    @staticmethod
+    @fails_safe_request
+    def get_price_history_columns_for_ticker(
+        ticker,
+        start_ts=TIME_RANGES["LAST_WEEK"],
+        end_ts=int(time.time()),
+        output_format=PRICE_FORMAT_COLUMNAR,
+    ) -> tuple:
+        """
+        Get stock price history since start until end for specified ticker as one array per field, oldest first, one
+        entry per day. Columnar format holds JSON arrays; msgpack format packs each column as raw little endian
+        bytes, int64 for integer columns (date, volume) and float64 for the others (numpy.frombuffer on client side
+        with the column dtype).
+        @param ticker: string
+        @param start_ts: start as timestamp
+        @param end_ts: end timestamp
+        @param output_format: string, columnar or msgpack
+        @return: tuple (data is bytes for msgpack format)
+        """
+        if output_format not in [PRICE_FORMAT_COLUMNAR, PRICE_FORMAT_MSGPACK]:
+            return 400, {}, "Invalid columnar format {}.".format(output_format)
+        if output_format == PRICE_FORMAT_MSGPACK and msgpack is None:
+            return 400, {}, "Format msgpack not available. Install msgpack package."
+
+        ticker_prices, start, end = StockPricesManagementAPI.get_ticker_prices_range(
+            ticker, start_ts, end_ts
+        )
+        if start >= end:
+            return (
+                404,
+                {},
+                "No price history for ticker {} for specified time range.".format(
+                    ticker
+                ),
+            )
+
+        # last entry of each day
+        dates = numpy.asarray(ticker_prices.get_date_strings()[start:end])
+        rows = numpy.append(dates[1:] != dates[:-1], True)
+        columns = {
+            column: ticker_prices.columns[column][start:end][rows].astype(
+                "<i8" if column in ticker_prices.int_columns else "<f8"
+            )
+            for column in PRICE_COLUMNS
+        }
+
+        if output_format == PRICE_FORMAT_MSGPACK:
+            return (
+                200,
+                msgpack.packb(
+                    {
+                        "ticker": ticker_prices.ticker,
+                        "length": int(rows.sum()),
+                        "dtypes": {
+                            column: values.dtype.str
+                            for column, values in columns.items()
+                        },
+                        "columns": {
+                            column: values.tobytes()
+                            for column, values in columns.items()
+                        },
                     }
-                }
+                ),
+                "OK",
+            )
+
+        return (
+            200,
+            {
+                "ticker": ticker_prices.ticker,
+                "dates": dates[rows].tolist(),
+                **{column: values.tolist() for column, values in columns.items()},
             },
-        ):
-            if es_price_doc["_source"]["ticker"].lower() == ticker.lower():
-                date = datetime.fromtimestamp(
-                    es_price_doc["_source"].get("date", None)
-                ).strftime("%Y-%m-%d")
-                price_history[date] = es_price_doc["_source"]
+            "OK",
+        )
 
-        if not price_history:
+    @staticmethod
+    @fails_safe_request
+    def get_price_history_version(
+        ticker, start_ts=TIME_RANGES["LAST_WEEK"], end_ts=int(time.time())
+    ) -> tuple:
+        """
+        Version of stock price history since start until end for specified ticker, answered from price store memory.
+        @param ticker: string
+        @param start_ts: start as timestamp
+        @param end_ts: end timestamp
+        @return: tuple (data: {version, historical})
+        """
+        version, historical = PriceStore.get_instance().get_range_version(
+            ticker, start_ts, end_ts
+        )
+        if version is None:
             return (
                 404,
                 {},
@@ -62,11 +232,111 @@ class StockPricesManagementAPI:
                 ),
             )
 
-        price_history = {
-            k: v
-            for k, v in sorted(price_history.items(), key=lambda x: x[0], reverse=True)
-        }
-        return 200, price_history, "OK"
+        return 200, {"version": version, "historical": historical}, "OK"
+
+    @staticmethod
+    def get_ticker_prices_range(ticker, start_ts, end_ts) -> tuple:
+        """
+        Price store history of ticker and index range of [start_ts, end_ts].
+        @param ticker: string
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple (TickerPrices/None, start index, end index)
+        """
+        ticker_prices = PriceStore.get_instance().get_ticker_prices(ticker)
+        if ticker_prices is None:
+            return None, 0, 0
+        return (ticker_prices, *ticker_prices.get_range_indices(start_ts, end_ts))
+
+    @staticmethod
+    def iter_price_history(ticker_prices, start, end) -> object:
+        """
+        Prices in [start, end) index range, most recent first, one entry per day (generator). Columns are converted
+        chunk by chunk, back to their indexed types.
+        @param ticker_prices: TickerPrices
+        @param start: int
+        @param end: int
+        @return: generator of (date string, price dict)
+        """
+        date_strings = ticker_prices.get_date_strings()
+        last_date = None
+        for chunk_end in range(end, start, -PRICE_STREAM_CHUNK_SIZE):
+            chunk_start = max(start, chunk_end - PRICE_STREAM_CHUNK_SIZE)
+            columns = {
+                column: (
+                    ticker_prices.columns[column][chunk_start:chunk_end].astype(
+                        numpy.int64
+                    )
+                    if column in ticker_prices.int_columns
+                    else ticker_prices.columns[column][chunk_start:chunk_end]
+                ).tolist()
+                for column in PRICE_COLUMNS
+            }
+            for index in range(chunk_end - chunk_start - 1, -1, -1):
+                date = date_strings[chunk_start + index]
+                if date == last_date:
+                    continue
+                last_date = date
+                yield date, {
+                    "ticker": ticker_prices.source_ticker,
+                    **{column: columns[column][index] for column in PRICE_COLUMNS},
+                }
+
+    @staticmethod
+    @fails_safe_request
+    def get_returns_correlation(
+        tickers, start_ts=TIME_RANGES["LAST_YEAR"], end_ts=int(time.time())
+    ) -> tuple:
+        """
+        Correlation and covariance matrices of daily log returns for specified tickers. Price histories are aligned
+        on trading days; tickers with missing days are handled by pairwise masking.
+        @param tickers: list
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple
+        """
+        tickers = list(dict.fromkeys(ticker.upper() for ticker in tickers))
+        if not tickers:
+            return 400, {}, "No tickers specified."
+        if len(tickers) > CORRELATION_MAX_TICKERS:
+            return (
+                400,
+                {},
+                "Too many tickers. Max {} per request.".format(CORRELATION_MAX_TICKERS),
+            )
+
+        price_matrix = PriceMatrix.build(tickers, start_ts, end_ts)
+        has_prices = ~numpy.isnan(price_matrix.closes).all(axis=0)
+        if not has_prices.any():
+            return 404, {}, "No price history for specified tickers and time range."
+
+        covariance, correlation, observations = ReturnsAnalytics.pairwise_covariance(
+            price_matrix.log_returns()
+        )
+
+        def to_list(matrix) -> list:
+            # NaN (not enough common returns) as null
+            return numpy.where(
+                numpy.isnan(matrix), None, matrix.round(8).astype(object)
+            ).tolist()
+
+        return (
+            200,
+            {
+                "start_date": datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d"),
+                "end_date": datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d"),
+                "tickers": tickers,
+                "missing_tickers": [
+                    ticker
+                    for ticker, ticker_has_prices in zip(tickers, has_prices)
+                    if not ticker_has_prices
+                ],
+                "observations": observations.tolist(),
+                "correlation": to_list(correlation),
+                "covariance": to_list(covariance),
+            },
+            "OK",
+        )
 
     @staticmethod
     @fails_safe_request
@@ -92,8 +362,8 @@ class StockPricesManagementAPI:
             start_date = DEFAULT_LAST_PRICE_DATE
 
         # get historical prices
-        prices = yf_get_historical_price_data_for_ticker(
-            ticker=ticker,
+        prices = MarketDataProvider.get_instance().get_history(
+            ticker,
             start_date=start_date,
             end_date=datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d"),
         )
@@ -104,7 +374,13 @@ class StockPricesManagementAPI:
         # index prices
         actions = []
         for price in prices:
-            actions.append({"_index": config.ES_INDEX_STOCK_PRICES, "_source": price})
+            actions.append(
+                {
+                    "_id": get_stock_price_id(ticker, price["date"]),
+                    "_index": config.ES_INDEX_STOCK_PRICES,
+                    "_source": price,
+                }
+            )
             # do bulk insert
             if len(actions) >= 1000:
                 es_dbi.bulk(actions, chunk_size=len(actions), max_retries=3)
@@ -113,6 +389,7 @@ class StockPricesManagementAPI:
             es_dbi.bulk(actions, chunk_size=len(actions), max_retries=3)
 
         es_dbi.refresh_index(config.ES_INDEX_STOCK_PRICES)
+        PriceStore.get_instance().add_prices(ticker, prices)
 
         return 200, prices, "OK"
 
@@ -159,5 +436,6 @@ class StockPricesManagementAPI:
                 actions = []
 
         es_dbi.refresh_index(config.ES_INDEX_STOCK_PRICES)
+        PriceStore.get_instance().delete(ticker)
 
         return 200, True, "OK"
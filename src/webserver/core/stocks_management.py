@@ -3,8 +3,15 @@ Stock management APIs.
 """
 
 from util import config
+from util.autocomplete.autocomplete_index import AutocompleteIndex
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
-from util.utils import EXCHANGE_NAMES, yf_get_info_for_ticker
+from util.market_data.market_data_provider import MarketDataProvider
+from util.utils import EXCHANGE_NAMES
+from webserver.constants import (
+    STOCKS_PAGE_DEFAULT_SIZE,
+    STOCKS_PAGE_MAX_SIZE,
+    SUGGEST_MAX_SIZE,
+)
 from webserver.decorators import fails_safe_request
 
 
@@ -24,9 +31,14 @@ class StocksManagementAPI:
         exchange=None,
         legal_type=None,
         ticker_only=False,
+        fields=None,
+        size=None,
+        search_after=None,
+        include_total=False,
     ) -> tuple:
         """
-        Get stocks information.
+        Get stocks information. If size or search_after is specified, results are paginated (sorted by ticker) and
+        returned as {"stocks": <>, "next": <cursor for next page or None>[, "total": <>]}.
         @param ticker: string
         @param company_name: string
         @param sector: string
@@ -35,15 +47,36 @@ class StocksManagementAPI:
         @param exchange: string
         @param legal_type: string
         @param ticker_only: bool
+        @param fields: list, stock fields to return (default all)
+        @param size: int, page size
+        @param search_after: string, ticker after which page starts (cursor from previous page)
+        @param include_total: bool, count all matching stocks (paginated results)
         @return: tuple
         """
 
+        paginated = size is not None or search_after is not None
+        if paginated:
+            size = STOCKS_PAGE_DEFAULT_SIZE if size is None else size
+            if not 1 <= size <= STOCKS_PAGE_MAX_SIZE:
+                return (
+                    400,
+                    {},
+                    "Size must be between 1 and {}".format(STOCKS_PAGE_MAX_SIZE),
+                )
+
         # setup es query
         es_query = (
             {"_source": False, "query": {"match_all": {}}}
             if ticker_only
             else {"query": {"match_all": {}}}
         )
+        if fields and not ticker_only:
+            es_query["_source"] = {"includes": list(fields)}
+        if paginated:
+            es_query["sort"] = [{"_id": "asc"}]
+            es_query["track_total_hits"] = bool(include_total)
+            if search_after is not None:
+                es_query["search_after"] = [search_after.upper()]
         if any([ticker, company_name, sector, industry, tags, exchange, legal_type]):
             es_query["query"] = {"bool": {"must": []}}
             if ticker:
@@ -103,28 +136,52 @@ class StocksManagementAPI:
         )
 
         # search
-        search_results = es_dbi.search_documents(
-            config.ES_INDEX_STOCKS, query_body=es_query
+        search_results = (
+            es_dbi.search_documents(
+                config.ES_INDEX_STOCKS, query_body=es_query, size=size
+            )
+            if paginated
+            else es_dbi.search_documents(config.ES_INDEX_STOCKS, query_body=es_query)
         )
         if not search_results:
             return 500, {}, "Could not get stocks info from db."
 
-        if not search_results["hits"]["total"]["value"]:
+        hits = search_results["hits"]["hits"]
+        if not hits and search_after is None:
             return 404, {}, "No stocks found for specified filter."
 
         # format result
-        search_results = (
-            {
-                search_result["_id"]: search_result["_source"]
-                for search_result in search_results["hits"]["hits"]
-            }
+        stocks = (
+            {search_result["_id"]: search_result["_source"] for search_result in hits}
             if not ticker_only
-            else [
-                search_result["_id"] for search_result in search_results["hits"]["hits"]
-            ]
+            else [search_result["_id"] for search_result in hits]
         )
+        if not paginated:
+            return 200, stocks, "OK"
 
-        return 200, search_results, "OK"
+        page = {
+            "stocks": stocks,
+            "next": hits[-1]["_id"] if len(hits) == size else None,
+        }
+        if include_total:
+            page["total"] = search_results["hits"]["total"]["value"]
+        return 200, page, "OK"
+
+    @staticmethod
+    @fails_safe_request
+    def suggest_stocks(prefix, size=10) -> tuple:
+        """
+        Autocomplete stocks by ticker, company name or tag prefix. Served from in-memory index.
+        @param prefix: string
+        @param size: int, max number of suggestions
+        @return: tuple
+        """
+        if not prefix or not prefix.strip():
+            return 400, [], "Prefix must not be empty."
+        if not 1 <= size <= SUGGEST_MAX_SIZE:
+            return 400, [], "Size must be between 1 and {}".format(SUGGEST_MAX_SIZE)
+
+        return 200, AutocompleteIndex.get_instance().suggest(prefix, top_k=size), "OK"
 
     @staticmethod
     @fails_safe_request
@@ -148,7 +205,7 @@ class StocksManagementAPI:
             return 200, ticker_document["_source"], "OK"
 
         # Get ticker info
-        ticker_info = yf_get_info_for_ticker(ticker)
+        ticker_info = MarketDataProvider.get_instance().get_info(ticker)
         if not ticker_info:
             return 400, {}, "Could not get info for ticker {}".format(ticker)
 
@@ -160,6 +217,7 @@ class StocksManagementAPI:
         )
         if not stock_added:
             return 500, {}, "Could not save info for ticker {}".format(ticker)
+        AutocompleteIndex.get_instance().add(ticker_info["ticker"], ticker_info)
 
         return 201, ticker_info, "OK"
 
@@ -193,6 +251,9 @@ class StocksManagementAPI:
         )
         if not updated:
             return 500, False, "Could not update info for ticker {}.".format(ticker)
+        AutocompleteIndex.get_instance().add(
+            ticker, {**ticker_document["_source"], **updated_info}
+        )
 
         return 200, True, "OK"
 
@@ -214,5 +275,6 @@ class StocksManagementAPI:
         ticker_deleted = es_dbi.delete_document(config.ES_INDEX_STOCKS, _id=ticker)
         if not ticker_deleted:
             return 404, False, "Ticker {} not found".format(ticker)
+        AutocompleteIndex.get_instance().remove(ticker)
 
         return 200, True, "OK"
@@ -0,0 +1,164 @@
+"""
+Standalone price ingestion scheduler. Keeps stock_prices index up to date outside the web workers: prices of each
+market tickers are updated after the market close time (see config.MARKET_SCHEDULES). Only one scheduler instance
+(leader) ingests; other instances wait for the leader lock.
+
+Usage: python -m webserver.daemons.price_scheduler
+"""
+
+import datetime
+import time
+
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.logger.logger import Logger
+from util.scheduler.file_lock import FileLock
+from util.scheduler.market_schedule import MarketSchedule
+from util.utils import get_last_price_date_for_tickers, get_ticker_exchanges
+from webserver.daemons.stock_prices_daemon import (
+    get_price_fetcher,
+    update_stock_prices,
+)
+
+LOCK_RETRY_INTERVAL = 60
+
+
+def get_market_schedules() -> list:
+    """
+    Market schedules from config.
+    @return: list of MarketSchedule
+    """
+    return [
+        MarketSchedule(name, **market)
+        for name, market in config.MARKET_SCHEDULES.items()
+    ]
+
+
+def get_market_tickers(es_dbi, market_schedule, market_schedules) -> list:
+    """
+    Tickers traded on market exchanges. Tickers of no configured market belong to config.DEFAULT_MARKET.
+    @param es_dbi: ElasticsearchDBI
+    @param market_schedule: MarketSchedule
+    @param market_schedules: list of MarketSchedule, all markets
+    @return: list
+    """
+    tickers = []
+    for ticker, exchanges in get_ticker_exchanges(es_dbi).items():
+        market = next(
+            (
+                schedule.name
+                for schedule in market_schedules
+                if schedule.has_exchange(exchanges)
+            ),
+            config.DEFAULT_MARKET,
+        )
+        if market == market_schedule.name:
+            tickers.append(ticker)
+
+    return sorted(tickers)
+
+
+def update_market_prices(
+    es_dbi, price_fetcher, market_schedule, market_schedules, session_date
+) -> None:
+    """
+    Update prices of market tickers up to (including) trading session date.
+    @param es_dbi: ElasticsearchDBI
+    @param price_fetcher: PriceFetcher
+    @param market_schedule: MarketSchedule
+    @param market_schedules: list of MarketSchedule
+    @param session_date: date, market local date of last trading session
+    @return: None
+    """
+    try:
+        tickers = get_market_tickers(es_dbi, market_schedule, market_schedules)
+        Logger.info(
+            "Updating {} prices for {} tickers up to {}.".format(
+                market_schedule.name, len(tickers), session_date.isoformat()
+            )
+        )
+        if not tickers:
+            return
+
+        # provider end date is exclusive
+        end_date = (session_date + datetime.timedelta(days=1)).strftime("%Y-%m-%d")
+        update_stock_prices(
+            es_dbi,
+            price_fetcher,
+            get_last_price_date_for_tickers(tickers, es_dbi),
+            end_date,
+        )
+    except Exception as exception:
+        Logger.exception(
+            "Price update for {} failed. {}".format(market_schedule.name, exception)
+        )
+
+
+def run_scheduler() -> None:
+    """
+    Acquire leader lock, catch up all markets, then update each market after its close time.
+    @return: None
+    """
+    lock = FileLock(config.SCHEDULER_LOCK_FILE)
+    if not lock.try_acquire():
+        Logger.info(
+            "Price scheduler lock {} held by another instance. Waiting...".format(
+                lock.path
+            )
+        )
+        while not lock.try_acquire():
+            time.sleep(LOCK_RETRY_INTERVAL)
+    Logger.info("Price scheduler lock acquired. Scheduling price updates.")
+
+    es_dbi = ElasticsearchDBI.get_instance(
+        config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+    )
+    price_fetcher = get_price_fetcher()
+    market_schedules = get_market_schedules()
+
+    try:
+        # catch up to last trading session of each market
+        now = time.time()
+        for market_schedule in market_schedules:
+            update_market_prices(
+                es_dbi,
+                price_fetcher,
+                market_schedule,
+                market_schedules,
+                market_schedule.get_last_close(
+                    now, config.SCHEDULER_CLOSE_DELAY
+                ).date(),
+            )
+
+        # next close of each market, in order (closes passed while updating are not skipped)
+        next_closes = [
+            (schedule.get_next_close(now, config.SCHEDULER_CLOSE_DELAY), index)
+            for index, schedule in enumerate(market_schedules)
+        ]
+        while True:
+            next_closes.sort()
+            close, index = next_closes[0]
+            market_schedule = market_schedules[index]
+            run_ts = close.timestamp() + config.SCHEDULER_CLOSE_DELAY
+            Logger.info(
+                "Next price update: {} at {}.".format(
+                    market_schedule.name,
+                    datetime.datetime.fromtimestamp(run_ts).isoformat(),
+                )
+            )
+            time.sleep(max(0.0, run_ts - time.time()))
+
+            update_market_prices(
+                es_dbi, price_fetcher, market_schedule, market_schedules, close.date()
+            )
+            next_closes[0] = (
+                market_schedule.get_next_close(run_ts, config.SCHEDULER_CLOSE_DELAY),
+                index,
+            )
+    finally:
+        lock.release()
+        ElasticsearchDBI.close_instance()
+
+
+if __name__ == "__main__":
+    run_scheduler()
@@ -1,24 +1,32 @@
 """
-Daemon that keeps stock_prices index up to date. Historical price data is gathered using yahoofinancials library.
+Daemon that keeps stock_prices index up to date. Historical price data is gathered from the market data provider
+(see config.MARKET_DATA_PROVIDER).
 """
 
 import datetime
+import queue
+import threading
 import time
 
 import pytz
 
 from util import config
 from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.fetcher.price_fetcher import PriceFetcher
 from util.logger.logger import Logger
+from util.market_data.market_data_provider import MarketDataProvider
+from util.price_store.price_store import PriceStore
 from util.utils import (
     DEFAULT_LAST_PRICE_DATE,
     get_all_tickers,
     get_last_price_date_for_tickers,
-    yf_get_historical_price_data_for_ticker,
+    get_stock_price_id,
 )
 
 _ONE_HOUR = 3600
 _ONE_DAY = 24 * _ONE_HOUR
+ES_BATCH_SIZE = 1000
+PRICES_QUEUE_SIZE = 64
 
 
 def markets_closed_the_day_before() -> bool:
@@ -56,15 +64,221 @@ def should_update_stock_prices() -> bool:
     return True
 
 
+def get_price_update_requests(ticker_last_price_dates, now_date) -> list:
+    """
+    Fetch requests for tickers whose price history is not up to date.
+    @param ticker_last_price_dates: dict {ticker: last price date "YYYY-MM-DD"}
+    @param now_date: string "YYYY-MM-DD"
+    @return: list of tuples (ticker, start_date, end_date)
+    """
+    requests = []
+    for ticker, last_price_date in ticker_last_price_dates.items():
+        next_date = datetime.datetime.strptime(last_price_date, "%Y-%m-%d")
+        if last_price_date != DEFAULT_LAST_PRICE_DATE:
+            next_date += datetime.timedelta(days=1)
+        next_date = next_date.strftime("%Y-%m-%d")
+
+        if next_date < now_date:
+            requests.append((ticker, next_date, now_date))
+
+    return requests
+
+
+def index_stock_prices(es_dbi, actions) -> set:
+    """
+    Bulk index stock_prices actions.
+    @param es_dbi: ElasticsearchDBI
+    @param actions: list
+    @return: set, _ids of actions not indexed
+    """
+    success, errors = es_dbi.bulk(actions, chunk_size=len(actions), max_retries=3)
+    if success < 0:
+        return {action["_id"] for action in actions}
+    return {item.get("_id", None) for error in errors for item in error.values()}
+
+
+def stock_prices_indexer_task(
+    es_dbi,
+    prices_queue,
+    ticker_last_price_dates,
+    updated_ticker_last_price_dates,
+    indexed_prices,
+) -> None:
+    """
+    Index fetched prices until stop marker (None) is received. Prices of all tickers share the same bulk requests.
+    Last price date (and price store) of a ticker is only updated once all its prices were acknowledged by
+    Elasticsearch; tickers with failed prices are fetched again on next update.
+    @param es_dbi: ElasticsearchDBI
+    @param prices_queue: queue.Queue of tuples (ticker, list of price dicts)
+    @param ticker_last_price_dates: dict {ticker: last price date "YYYY-MM-DD"}
+    @param updated_ticker_last_price_dates: dict, filled with last price date of indexed tickers
+    @param indexed_prices: dict, filled with number of indexed prices of indexed tickers
+    @return: None
+    """
+    actions = []
+    action_tickers = []
+    # tickers with all prices in sent/pending actions, waiting for acknowledgement
+    queued_tickers = {}
+    failed_tickers = set()
+
+    def send_actions():
+        failed_ids = index_stock_prices(es_dbi, actions)
+        failed_tickers.update(
+            ticker
+            for ticker, action in zip(action_tickers, actions)
+            if action["_id"] in failed_ids
+        )
+        actions.clear()
+        action_tickers.clear()
+
+        for queued_ticker, queued_prices in queued_tickers.items():
+            if queued_ticker in failed_tickers:
+                Logger.error(
+                    "Could not index price history for [{}]".format(queued_ticker)
+                )
+                continue
+
+            last_price_date = datetime.datetime.fromtimestamp(
+                queued_prices[-1]["date"]
+            ).strftime("%Y-%m-%d")
+            updated_ticker_last_price_dates[queued_ticker] = last_price_date
+            indexed_prices[queued_ticker] = len(queued_prices)
+            PriceStore.get_instance().add_prices(queued_ticker, queued_prices)
+
+            Logger.info(
+                "Got price history for [{}]: {} -> {}".format(
+                    queued_ticker,
+                    ticker_last_price_dates[queued_ticker],
+                    last_price_date,
+                )
+            )
+        queued_tickers.clear()
+
+    while True:
+        item = prices_queue.get()
+        if item is None:
+            break
+
+        ticker, missing_prices = item
+        for missing_price in missing_prices:
+            actions.append(
+                {
+                    "_id": get_stock_price_id(ticker, missing_price["date"]),
+                    "_index": config.ES_INDEX_STOCK_PRICES,
+                    "_source": missing_price,
+                }
+            )
+            action_tickers.append(ticker)
+
+            # do bulk insert
+            if len(actions) >= ES_BATCH_SIZE:
+                send_actions()
+        queued_tickers[ticker] = missing_prices
+
+    # last batch bulk insert
+    if actions or queued_tickers:
+        send_actions()
+
+
+def put_prices(prices_queue, indexer, item) -> None:
+    """
+    Put item in prices queue; fails if indexer thread stopped instead of waiting forever on a full queue.
+    @param prices_queue: queue.Queue
+    @param indexer: threading.Thread
+    @param item: tuple/None
+    @return: None
+    """
+    while True:
+        if not indexer.is_alive():
+            raise RuntimeError("Stock prices indexer stopped")
+        try:
+            prices_queue.put(item, timeout=1)
+            return
+        except queue.Full:
+            continue
+
+
+def get_price_fetcher() -> PriceFetcher:
+    """
+    Rate limited market data provider price fetcher (see config YF_*).
+    @return: PriceFetcher
+    """
+    provider = MarketDataProvider.get_instance()
+    return PriceFetcher(
+        provider.get_batch_history,
+        workers=config.YF_FETCH_WORKERS,
+        requests_per_second=config.YF_REQUESTS_PER_SECOND,
+        burst=config.YF_BURST,
+        retries=config.YF_FETCH_RETRIES,
+        backoff=config.YF_RETRY_BACKOFF,
+        batch_size=provider.get_batch_size(config.YF_BATCH_SIZE),
+    )
+
+
+def update_stock_prices(
+    es_dbi, price_fetcher, ticker_last_price_dates, end_date
+) -> dict:
+    """
+    Fetch and index prices after last price date up to end date for each ticker. Tickers are fetched concurrently,
+    rate limited (see PriceFetcher), and indexed by an indexer thread.
+    @param es_dbi: ElasticsearchDBI
+    @param price_fetcher: PriceFetcher
+    @param ticker_last_price_dates: dict {ticker: last price date "YYYY-MM-DD"}
+    @param end_date: string "YYYY-MM-DD"
+    @return: tuple (dict {ticker: new last price date "YYYY-MM-DD"}, dict {ticker: indexed prices}) for updated
+    tickers
+    """
+    start_ts = time.time()
+    requests = get_price_update_requests(ticker_last_price_dates, end_date)
+
+    # bounded queue: fetching waits when indexing falls behind
+    prices_queue = queue.Queue(maxsize=PRICES_QUEUE_SIZE)
+    updated_ticker_last_price_dates = {}
+    indexed_prices = {}
+    indexer = threading.Thread(
+        target=stock_prices_indexer_task,
+        args=(
+            es_dbi,
+            prices_queue,
+            ticker_last_price_dates,
+            updated_ticker_last_price_dates,
+            indexed_prices,
+        ),
+        daemon=True,
+    )
+    indexer.start()
+
+    failed = 0
+    for ticker, missing_prices in price_fetcher.fetch(requests):
+        if missing_prices is None:
+            failed += 1
+        elif missing_prices:
+            put_prices(prices_queue, indexer, (ticker, missing_prices))
+    put_prices(prices_queue, indexer, None)
+    indexer.join()
+
+    Logger.info(
+        "Updated prices for {} of {} tickers ({} failed) in {} seconds.".format(
+            len(updated_ticker_last_price_dates),
+            len(requests),
+            failed,
+            round(time.time() - start_ts, 2),
+        )
+    )
+    return updated_ticker_last_price_dates, indexed_prices
+
+
 def stock_prices_updater_task() -> None:
     """
-    Task updates stock prices using yahoofinancials library.
+    Task updates stock prices from market data provider. Runs in process (thread); the standalone price scheduler
+    (webserver/daemons/price_scheduler.py) should be used instead when running multiple workers.
     @return: None
     """
 
     es_dbi = ElasticsearchDBI.get_instance(
         config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
     )
+    price_fetcher = get_price_fetcher()
     ticker_last_price_dates = {}
     last_ticker_fetch_ts = 0
     first_iteration = True
@@ -91,60 +305,14 @@ def stock_prices_updater_task() -> None:
 
         # update price historical data up to
         yf_now_date = datetime.datetime.fromtimestamp(time.time()).strftime("%Y-%m-%d")
-
-        actions = []
-        updated_ticker_last_price_dates = {}
-        for ticker in ticker_last_price_dates:
-            next_date = datetime.datetime.strptime(
-                ticker_last_price_dates[ticker], "%Y-%m-%d"
+        try:
+            updated_ticker_last_price_dates, _ = update_stock_prices(
+                es_dbi, price_fetcher, ticker_last_price_dates, yf_now_date
             )
-            if ticker_last_price_dates[ticker] != DEFAULT_LAST_PRICE_DATE:
-                next_date += datetime.timedelta(days=1)
-            next_date = next_date.strftime("%Y-%m-%d")
-
-            if next_date != yf_now_date:
-                # price history not up to date, get prices
-                missing_prices = yf_get_historical_price_data_for_ticker(
-                    ticker=ticker, start_date=next_date, end_date=yf_now_date
-                )
-
-                if not missing_prices:
-                    # no new price data
-                    continue
-
-                # add es actions and index
-                for missing_price in missing_prices:
-                    actions.append(
-                        {
-                            "_index": config.ES_INDEX_STOCK_PRICES,
-                            "_source": missing_price,
-                        }
-                    )
-
-                    # do bulk insert
-                    if len(actions) >= 1000:
-                        es_dbi.bulk(actions, chunk_size=len(actions), max_retries=3)
-                        actions = []
-
-                # set last date
-                last_price_date = datetime.datetime.fromtimestamp(
-                    missing_prices[-1]["date"]
-                ).strftime("%Y-%m-%d")
-                updated_ticker_last_price_dates[ticker] = last_price_date
-
-                Logger.info(
-                    "Got price history for [{}]: {} -> {}".format(
-                        ticker, ticker_last_price_dates[ticker], last_price_date
-                    )
-                )
-
-        # last batch bulk insert
-        if actions:
-            es_dbi.bulk(actions, chunk_size=len(actions), max_retries=3)
-
-        # update last price dates
-        ticker_last_price_dates.update(updated_ticker_last_price_dates)
+            ticker_last_price_dates.update(updated_ticker_last_price_dates)
+        except Exception as exception:
+            Logger.exception("Price update failed. {}".format(exception))
 
         # wait 24h since iteration start
-        time.sleep(_ONE_DAY - start_ts)
+        time.sleep(max(0, _ONE_DAY - (time.time() - start_ts)))
         first_iteration = False
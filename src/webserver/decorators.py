@@ -75,12 +75,15 @@ def webserver_logger(func):
 
         try:
             if isinstance(response, tuple):
-                data, status_code = response
+                data, status_code = response[:2]
                 response_size = len(json.dumps(data))
             else:
                 if isinstance(response, Response):
                     status_code = response.status_code
-                    response_size = len(json.dumps(response.data))
+                    # streamed response body is not buffered; size unknown
+                    response_size = (
+                        -1 if response.is_streamed else len(response.get_data())
+                    )
                 elif isinstance(response, str):
                     status_code = 200
                     response_size = len(response)
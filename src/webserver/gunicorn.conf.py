@@ -1,11 +1,11 @@
 import multiprocessing
 import os
 
-# set bind address:port
-from threading import Thread
-
-from webserver.daemons.stock_prices_daemon import stock_prices_updater_task
+from util import config
+from util.elasticsearch.elasticsearch_dbi import ElasticsearchDBI
+from util.logger.logger import Logger
 
+# set bind address:port
 ADDRESS = "0.0.0.0"
 PORT = 8080
 bind = f"{ADDRESS}:{PORT}"
@@ -22,14 +22,30 @@ preload_app = True
 
 
 def on_starting(server):
-    # create and start stock prices updater thread - called before the master process is initialized
-    # TODO - daemon bug - runs multiple times and takes too many resources, replace with cron outside ws
-    # stock_prices_updater_thread = Thread(target=stock_prices_updater_task)
-    # stock_prices_updater_thread.setDaemon(True)
-    # stock_prices_updater_thread.start()
+    # stock prices are updated by the standalone price scheduler (python -m webserver.daemons.price_scheduler),
+    # not by web workers
     pass
 
 
+def pre_fork(server, worker):
+    # close master (preloaded app) Elasticsearch connections, so workers do not inherit pooled sockets
+    ElasticsearchDBI.close_instance()
+
+
+def post_fork(server, worker):
+    # one Elasticsearch client / connection pool per worker, created after fork
+    try:
+        ElasticsearchDBI.get_instance(
+            config.ELASTICSEARCH_HOST, config.ELASTICSEARCH_PORT
+        )
+    except Exception as exception:
+        Logger.error(
+            "Could not create Elasticsearch client for worker {}. {}".format(
+                worker.pid, exception
+            )
+        )
+
+
 def worker_init(worker):
     # on SIGINT
     pass
@@ -37,4 +53,4 @@ def worker_init(worker):
 
 def worker_exit(server, worker):
     # on SIGTERM
-    pass
+    ElasticsearchDBI.close_instance()
@@ -0,0 +1,185 @@
+"""
+Analytics computed on daily NAV/price series.
+"""
+
+import numpy
+
+DAYS_PER_YEAR = 365.25
+TRADING_DAYS_PER_YEAR = 252
+
+
+class NavAnalytics:
+    @staticmethod
+    def day_to_date(day) -> str:
+        """
+        Format day since epoch as "YYYY-MM-DD".
+        @param day: int
+        @return: string
+        """
+        return str(numpy.datetime64(int(day), "D"))
+
+    @staticmethod
+    def rolling_window_returns(days, prices, window_years, weights=None) -> tuple:
+        """
+        Returns over all rolling windows of window_years. Each window ends on a trading day and starts on the first
+        trading day at least window_years before it. For a portfolio (relative prices matrix and weights), holdings
+        are bought with allocation weights at each window start: the window return is the weighted sum of holdings
+        returns over the window, not the change of the NAV drifted since the first day.
+        @param days: numpy.ndarray, days since epoch (sorted)
+        @param prices: numpy.ndarray, daily prices/NAV, or daily relative prices matrix (days x holdings)
+        @param window_years: int
+        @param weights: numpy.ndarray, holdings weights (fractions), required for a relative prices matrix
+        @return: tuple (start rows, end rows, returns) numpy.ndarray
+        """
+        if not len(days):
+            return numpy.empty(0, int), numpy.empty(0, int), numpy.empty(0)
+
+        window_days = int(round(DAYS_PER_YEAR * window_years))
+        end_rows = numpy.flatnonzero(days - window_days >= days[0])
+        start_rows = numpy.searchsorted(days, days[end_rows] - window_days, side="left")
+        growth = prices[end_rows] / prices[start_rows]
+        if weights is not None:
+            growth = growth @ weights
+        return start_rows, end_rows, growth - 1
+
+    @staticmethod
+    def rolling_returns(days, prices, window_years, weights=None) -> dict:
+        """
+        Best, worst and median returns over all rolling windows of window_years, computed in one pass.
+        @param days: numpy.ndarray, days since epoch (sorted)
+        @param prices: numpy.ndarray, daily prices/NAV, or daily relative prices matrix (days x holdings)
+        @param window_years: int
+        @param weights: numpy.ndarray, holdings weights (fractions), required for a relative prices matrix
+        @return: dict
+        """
+        rolling_info = {"window_years": window_years, "count": 0}
+        start_rows, end_rows, returns = NavAnalytics.rolling_window_returns(
+            days, prices, window_years, weights=weights
+        )
+        if not len(returns):
+            return rolling_info
+
+        annualized_returns = numpy.power(1 + returns, 1 / window_years) - 1
+
+        def window_info(index) -> dict:
+            return {
+                "start_date": NavAnalytics.day_to_date(days[start_rows[index]]),
+                "end_date": NavAnalytics.day_to_date(days[end_rows[index]]),
+                "return_percentage": round(100 * float(returns[index]), 2),
+                "annualized_return_percentage": round(
+                    100 * float(annualized_returns[index]), 2
+                ),
+            }
+
+        rolling_info.update(
+            count=int(len(returns)),
+            best=window_info(int(numpy.argmax(returns))),
+            worst=window_info(int(numpy.argmin(returns))),
+            median={
+                "return_percentage": round(100 * float(numpy.median(returns)), 2),
+                "annualized_return_percentage": round(
+                    100 * float(numpy.median(annualized_returns)), 2
+                ),
+            },
+            positive_percentage=round(100 * float(numpy.mean(returns > 0)), 2),
+        )
+        return rolling_info
+
+    @staticmethod
+    def ratio(numerator, denominator) -> float:
+        """
+        Rounded ratio; None if undefined (zero denominator).
+        @param numerator: float
+        @param denominator: float
+        @return: float/None
+        """
+        if not denominator or not numpy.isfinite(denominator):
+            return None
+        return round(float(numerator / denominator), 4)
+
+    @staticmethod
+    def risk_metrics(days, nav, risk_free_rate=0.0) -> dict:
+        """
+        Annualized volatility, max drawdown (with peak, trough and recovery dates), Sharpe, Sortino and Calmar ratios.
+        All metrics are derived from the daily returns and running peak of the same NAV series.
+        @param days: numpy.ndarray, days since epoch (sorted)
+        @param nav: numpy.ndarray, daily NAV
+        @param risk_free_rate: float, annual risk free rate (ex. 0.02)
+        @return: dict
+        """
+        if len(nav) < 2:
+            return {}
+
+        returns = nav[1:] / nav[:-1] - 1
+        excess_returns = returns - risk_free_rate / TRADING_DAYS_PER_YEAR
+        annual_excess_return = float(excess_returns.mean()) * TRADING_DAYS_PER_YEAR
+        volatility = float(returns.std(ddof=1)) * numpy.sqrt(TRADING_DAYS_PER_YEAR)
+        downside_deviation = float(
+            numpy.sqrt(numpy.mean(numpy.minimum(excess_returns, 0) ** 2))
+        ) * numpy.sqrt(TRADING_DAYS_PER_YEAR)
+
+        years = (days[-1] - days[0]) / DAYS_PER_YEAR
+        annualized_return = (
+            float((nav[-1] / nav[0]) ** (1 / years) - 1) if years > 0 else 0.0
+        )
+
+        # drawdown relative to running peak
+        drawdowns = nav / numpy.maximum.accumulate(nav) - 1
+        trough_row = int(numpy.argmin(drawdowns))
+        peak_row = int(numpy.argmax(nav[: trough_row + 1]))
+        max_drawdown = float(drawdowns[trough_row])
+        recovery_rows = numpy.flatnonzero(nav[trough_row:] >= nav[peak_row])
+        recovery_date = (
+            NavAnalytics.day_to_date(days[trough_row + recovery_rows[0]])
+            if max_drawdown < 0 and len(recovery_rows)
+            else None
+        )
+
+        return {
+            "annualized_return_percentage": round(100 * annualized_return, 2),
+            "annualized_volatility_percentage": round(100 * volatility, 2),
+            "max_drawdown": {
+                "percentage": round(100 * max_drawdown, 2),
+                "start_date": NavAnalytics.day_to_date(days[peak_row]),
+                "end_date": NavAnalytics.day_to_date(days[trough_row]),
+                "recovery_date": recovery_date,
+            },
+            "sharpe_ratio": NavAnalytics.ratio(annual_excess_return, volatility),
+            "sortino_ratio": NavAnalytics.ratio(
+                annual_excess_return, downside_deviation
+            ),
+            "calmar_ratio": NavAnalytics.ratio(annualized_return, -max_drawdown),
+            "risk_free_rate": risk_free_rate,
+        }
+
+
+class ReturnsAnalytics:
+    @staticmethod
+    def pairwise_covariance(returns) -> tuple:
+        """
+        Covariance and correlation matrices of return columns with pairwise masking: statistics of each pair of
+        columns use only rows on which both columns have a return. Computed with matrix products over the masked
+        return matrix. Pairs with less than 2 common returns are NaN.
+        @param returns: numpy.ndarray, rows x columns, missing returns NaN
+        @return: tuple (covariance, correlation, observations) numpy.ndarray matrices
+        """
+        valid = ~numpy.isnan(returns)
+        masked = numpy.where(valid, returns, 0.0)
+        valid = valid.astype(numpy.float64)
+
+        # [i, j] sums over rows where both i and j are valid
+        observations = valid.T @ valid
+        sums = masked.T @ valid
+        squares = (masked * masked).T @ valid
+        products = masked.T @ masked
+
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            means = sums / observations
+            covariance = (products - sums * means.T) / (observations - 1)
+            variances = (squares - sums * means) / (observations - 1)
+            correlation = covariance / numpy.sqrt(variances * variances.T)
+
+        covariance[observations < 2] = numpy.nan
+        correlation[observations < 2] = numpy.nan
+        numpy.clip(correlation, -1, 1, out=correlation)
+        return covariance, correlation, observations.astype(numpy.int64)
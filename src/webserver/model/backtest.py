@@ -0,0 +1,334 @@
+"""
+Vectorized daily NAV backtest engine.
+"""
+
+from datetime import datetime
+
+import numpy
+
+from util import config
+from util.logger.logger import Logger
+from util.price_store.price_matrix import PriceMatrix
+from util.price_store.price_store import PriceStore
+from webserver.model.analytics import NavAnalytics
+
+
+class BacktestEngine:
+    """
+    Buy and hold backtest computed on an aligned date x ticker close matrix. Allocations are bought on the first day
+    each ticker has a price in the specified range and held until the end of the range; before that, the allocation
+    is held as cash.
+    """
+
+    @staticmethod
+    def compute_relative_prices(tickers, percentages, start_ts, end_ts) -> tuple:
+        """
+        Daily relative prices of holdings (1 on each holding first price day), on days at least one holding has a
+        price.
+        @param tickers: list
+        @param percentages: list, allocation percentage for each ticker
+        @param start_ts: int
+        @param end_ts: int
+        @return: tuple (numpy.ndarray days since epoch, numpy.ndarray relative prices (days x tickers),
+        numpy.ndarray weights)
+        """
+        price_matrix = PriceMatrix.build(tickers, start_ts, end_ts)
+        weights = numpy.asarray(percentages, dtype=numpy.float64) / 100
+        rows = (~numpy.isnan(price_matrix.closes[:, weights > 0])).any(axis=1)
+        return price_matrix.days[rows], price_matrix.relative_prices()[rows], weights
+
+    @staticmethod
+    def backtest(
+        tickers,
+        percentages,
+        start_ts,
+        end_ts,
+        price_matrix=None,
+        include_risk_metrics=False,
+    ) -> dict:
+        """
+        Backtest allocations and return daily NAV, daily returns and cumulative returns.
+        @param tickers: list
+        @param percentages: list, allocation percentage for each ticker
+        @param start_ts: int
+        @param end_ts: int
+        @param price_matrix: PriceMatrix (built from price store if not specified)
+        @param include_risk_metrics: boolean
+        @return: dict
+        """
+        return BacktestEngine.backtest_batch(
+            {None: (tickers, percentages)},
+            start_ts,
+            end_ts,
+            price_matrix=price_matrix,
+            include_risk_metrics=include_risk_metrics,
+        )[None]
+
+    @staticmethod
+    def backtest_batch(
+        portfolios,
+        start_ts,
+        end_ts,
+        price_matrix=None,
+        include_timeseries=True,
+        include_risk_metrics=False,
+    ) -> dict:
+        """
+        Backtest multiple portfolios at once. Price history of each distinct ticker is read once into a shared price
+        matrix and NAVs of all portfolios are computed with a single matrix product.
+        @param portfolios: dict {key: (tickers list, percentages list)}
+        @param start_ts: int
+        @param end_ts: int
+        @param price_matrix: PriceMatrix (built from price store if not specified)
+        @param include_timeseries: boolean, include daily dates, NAV and returns
+        @param include_risk_metrics: boolean, include volatility, drawdown and risk adjusted return ratios
+        @return: dict {key: dict}
+        """
+        if price_matrix is None:
+            price_matrix = PriceMatrix.build(
+                sorted(
+                    {
+                        ticker.upper()
+                        for tickers, _ in portfolios.values()
+                        for ticker in tickers
+                    }
+                ),
+                start_ts,
+                end_ts,
+            )
+
+        columns = {
+            ticker.upper(): column for column, ticker in enumerate(price_matrix.tickers)
+        }
+        weights = numpy.zeros((len(columns), len(portfolios)))
+        for portfolio_column, (tickers, percentages) in enumerate(portfolios.values()):
+            for ticker, percentage in zip(tickers, percentages):
+                weights[columns[ticker.upper()], portfolio_column] += percentage / 100
+
+        relative_prices = price_matrix.relative_prices()
+        navs = relative_prices @ weights
+
+        # days on which at least one portfolio holding has a price
+        has_prices = (
+            (~numpy.isnan(price_matrix.closes)).astype(numpy.float64) @ (weights > 0)
+        ) > 0
+
+        backtests = {}
+        for portfolio_column, (key, (tickers, _)) in enumerate(portfolios.items()):
+            rows = has_prices[:, portfolio_column]
+            backtests[key] = BacktestEngine.get_backtest_info(
+                start_ts=start_ts,
+                end_ts=end_ts,
+                days=price_matrix.days[rows],
+                dates=price_matrix.get_dates(rows),
+                nav=navs[rows, portfolio_column],
+                ticker_relative_prices={
+                    ticker: relative_prices[rows, columns[ticker.upper()]]
+                    for ticker in tickers
+                },
+                include_timeseries=include_timeseries,
+                include_risk_metrics=include_risk_metrics,
+            )
+
+        return backtests
+
+    @staticmethod
+    def backtest_summary_batch(
+        portfolios, start_ts, end_ts, price_store=None, include_risk_metrics=False
+    ) -> dict:
+        """
+        Summary backtest of multiple portfolios: return of each holding from its first to its last price in range
+        and allocation weighted total return. Same result for one portfolio or a batch.
+        @param portfolios: dict {key: (tickers list, percentages list)}
+        @param start_ts: int
+        @param end_ts: int
+        @param price_store: PriceStore (default singleton instance)
+        @param include_risk_metrics: boolean, include volatility, drawdown and risk adjusted return ratios
+        @return: dict {key: dict}
+        """
+        first_last_date_prices = BacktestEngine.get_first_last_date_prices(
+            {ticker for tickers, _ in portfolios.values() for ticker in tickers},
+            start_ts,
+            end_ts,
+            price_store=price_store,
+        )
+
+        backtests = {}
+        for key, (tickers, percentages) in portfolios.items():
+            backtests[key] = BacktestEngine.get_summary_info(
+                start_ts,
+                end_ts,
+                tickers,
+                percentages,
+                {ticker: first_last_date_prices[ticker] for ticker in tickers},
+            )
+
+        if include_risk_metrics:
+            price_matrix = PriceMatrix.build(
+                sorted(
+                    {
+                        ticker.upper()
+                        for tickers, _ in portfolios.values()
+                        for ticker in tickers
+                    }
+                ),
+                start_ts,
+                end_ts,
+                price_store=price_store,
+            )
+            for key, backtest_info in BacktestEngine.backtest_batch(
+                portfolios,
+                start_ts,
+                end_ts,
+                price_matrix=price_matrix,
+                include_timeseries=False,
+                include_risk_metrics=True,
+            ).items():
+                backtests[key]["risk_metrics"] = backtest_info["risk_metrics"]
+
+        return backtests
+
+    @staticmethod
+    def get_first_last_date_prices(tickers, start_ts, end_ts, price_store=None) -> dict:
+        """
+        First price starting from start_ts and last price until end_ts (close) for each ticker.
+        @param tickers: iterable
+        @param start_ts: int
+        @param end_ts: int
+        @param price_store: PriceStore (default singleton instance)
+        @return: dict {string: tuple (dict {date: close}, dict {date: close})/None if no prices in range}
+        """
+        if price_store is None:
+            price_store = PriceStore.get_instance()
+
+        first_last_date_prices = {}
+        for ticker in tickers:
+            ticker_prices = price_store.get_ticker_prices(ticker)
+            start, end = (
+                ticker_prices.get_range_indices(start_ts, end_ts)
+                if ticker_prices is not None
+                else (0, 0)
+            )
+            if start >= end:
+                first_last_date_prices[ticker] = None
+                continue
+
+            first_last_date_prices[ticker] = tuple(
+                {
+                    ticker_prices.get_value("date", index): ticker_prices.get_value(
+                        "close", index
+                    )
+                }
+                for index in [start, end - 1]
+            )
+        return first_last_date_prices
+
+    @staticmethod
+    def get_summary_info(
+        start_ts, end_ts, tickers, percentages, first_last_date_prices
+    ) -> dict:
+        """
+        Format summary backtest result.
+        @param start_ts: int
+        @param end_ts: int
+        @param tickers: list
+        @param percentages: list, allocation percentage for each ticker
+        @param first_last_date_prices: dict {ticker: tuple (dict {date: close}, dict {date: close})/None}
+        @return: dict
+        """
+        backtest_info = {
+            "start_date": datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d"),
+            "end_date": datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d"),
+            "portfolio_data": {},
+        }
+
+        for ticker in tickers:
+            if first_last_date_prices[ticker] is None:
+                Logger.exception(
+                    "No stock prices for ticker {} in the specified range.".format(
+                        ticker
+                    )
+                )
+                ticker_data = {start_ts: 0}
+            else:
+                first_date_price, last_date_price = first_last_date_prices[ticker]
+                ticker_data = {**first_date_price, **last_date_price}
+
+            # compute return for holding
+            first_ts, last_ts = min(ticker_data.keys()), max(ticker_data.keys())
+            first_price, last_price = ticker_data[first_ts], ticker_data[last_ts]
+            ticker_data["return_value_per_share"] = last_price - first_price
+            ticker_data["return_percentage"] = (
+                100 * last_price / first_price - 100 if first_price else 0
+            )
+            backtest_info["portfolio_data"][ticker] = ticker_data
+
+        # compute total return
+        backtest_info["total_return_percentage"] = round(
+            sum(
+                percentage
+                / 100
+                * backtest_info["portfolio_data"][ticker]["return_percentage"]
+                for ticker, percentage in zip(tickers, percentages)
+            ),
+            2,
+        )
+        return backtest_info
+
+    @staticmethod
+    def get_backtest_info(
+        start_ts,
+        end_ts,
+        days,
+        dates,
+        nav,
+        ticker_relative_prices,
+        include_timeseries=True,
+        include_risk_metrics=False,
+    ) -> dict:
+        """
+        Format backtest result.
+        @param start_ts: int
+        @param end_ts: int
+        @param days: numpy.ndarray, days since epoch
+        @param dates: list
+        @param nav: numpy.ndarray, daily NAV
+        @param ticker_relative_prices: dict {ticker: numpy.ndarray}
+        @param include_timeseries: boolean
+        @param include_risk_metrics: boolean
+        @return: dict
+        """
+        backtest_info = {
+            "start_date": datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d"),
+            "end_date": datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d"),
+            "portfolio_data": {},
+            "total_return_percentage": 0,
+        }
+        if include_timeseries:
+            backtest_info.update(
+                dates=dates, nav=[], daily_returns=[], cumulative_returns=[]
+            )
+        if include_risk_metrics:
+            backtest_info["risk_metrics"] = NavAnalytics.risk_metrics(
+                days, nav, config.RISK_FREE_RATE
+            )
+        if not len(nav):
+            return backtest_info
+
+        daily_returns = numpy.zeros(len(nav))
+        daily_returns[1:] = nav[1:] / nav[:-1] - 1
+        cumulative_returns = nav / nav[0] - 1
+
+        for ticker, relative_prices in ticker_relative_prices.items():
+            backtest_info["portfolio_data"][ticker] = {
+                "return_percentage": round(100 * float(relative_prices[-1] - 1), 2),
+            }
+        backtest_info["total_return_percentage"] = round(
+            100 * float(cumulative_returns[-1]), 2
+        )
+        if include_timeseries:
+            backtest_info["nav"] = nav.round(6).tolist()
+            backtest_info["daily_returns"] = daily_returns.round(6).tolist()
+            backtest_info["cumulative_returns"] = cumulative_returns.round(6).tolist()
+
+        return backtest_info
@@ -0,0 +1,134 @@
+"""
+Closed form compound interest with yearly contributions, vectorized over scenarios.
+"""
+
+import itertools
+
+import numpy
+
+
+class CompoundInterestGrid:
+    """
+    Cartesian product of starting amounts, yearly return rates, investment lengths and yearly contributions. Final
+    amounts use the closed form future value of an annuity, evaluated for all scenarios with NumPy broadcasting.
+    """
+
+    def __init__(
+        self,
+        starting_amounts,
+        yearly_return_rates,
+        investment_lengths_in_years,
+        additional_yearly_contributions,
+        additional_at_end_of_year=True,
+    ):
+        """
+        @param starting_amounts: list
+        @param yearly_return_rates: list, yearly return percentages
+        @param investment_lengths_in_years: list
+        @param additional_yearly_contributions: list
+        @param additional_at_end_of_year: boolean, flag for additional contribution (start of end of each year)
+        """
+        self.starting_amounts = numpy.asarray(starting_amounts, dtype=numpy.float64)
+        self.yearly_return_rates = numpy.asarray(
+            yearly_return_rates, dtype=numpy.float64
+        )
+        self.investment_lengths_in_years = numpy.asarray(
+            investment_lengths_in_years, dtype=numpy.int64
+        )
+        self.additional_yearly_contributions = numpy.asarray(
+            additional_yearly_contributions, dtype=numpy.float64
+        )
+        self.additional_at_end_of_year = additional_at_end_of_year
+
+    def __len__(self) -> int:
+        return (
+            len(self.starting_amounts)
+            * len(self.yearly_return_rates)
+            * len(self.investment_lengths_in_years)
+            * len(self.additional_yearly_contributions)
+        )
+
+    def future_values(self, years) -> numpy.ndarray:
+        """
+        Amount after each number of years for all (starting amount, rate, contribution) combinations.
+        @param years: numpy.ndarray, numbers of years
+        @return: numpy.ndarray, starting amounts x rates x years x contributions
+        """
+        starting_amounts = self.starting_amounts[:, None, None, None]
+        rates = self.yearly_return_rates[None, :, None, None] / 100
+        years = numpy.asarray(years, dtype=numpy.float64)[None, None, :, None]
+        contributions = self.additional_yearly_contributions[None, None, None, :]
+
+        growth = numpy.power(1 + rates, years)
+        # annuity factor sum((1 + r) ^ k, k = 0..n-1); n for zero rate
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            annuity_factors = numpy.where(
+                rates == 0, years, (growth - 1) / numpy.where(rates == 0, 1, rates)
+            )
+        if not self.additional_at_end_of_year:
+            annuity_factors = annuity_factors * (1 + rates)
+
+        return starting_amounts * growth + contributions * annuity_factors
+
+    def get_scenarios(self, include_schedule=False) -> list:
+        """
+        Final amount and compound interest of each scenario, in Cartesian product order (starting amount, rate,
+        length, contribution).
+        @param include_schedule: boolean, include amount at the end of each year
+        @return: list
+        """
+        if include_schedule:
+            # years 1..max length; each scenario schedule is a prefix
+            max_years = int(self.investment_lengths_in_years.max())
+            schedules = self.future_values(numpy.arange(1, max_years + 1))
+            final_amounts = schedules[:, :, self.investment_lengths_in_years - 1, :]
+        else:
+            final_amounts = self.future_values(self.investment_lengths_in_years)
+
+        contributions = (
+            self.investment_lengths_in_years[:, None]
+            * self.additional_yearly_contributions[None, :]
+        )
+        compound_interests = final_amounts - (
+            self.starting_amounts[:, None, None, None] + contributions[None]
+        )
+
+        final_amounts_list = final_amounts.reshape(-1).tolist()
+        compound_interests_list = compound_interests.reshape(-1).tolist()
+        contributions_list = contributions.tolist()
+        lengths = self.investment_lengths_in_years.tolist()
+        scenarios = []
+        for index, (
+            (amount_index, starting_amount),
+            (rate_index, yearly_return_rate),
+            (length_index, investment_length_in_years),
+            (contribution_index, additional_yearly_contribution),
+        ) in enumerate(
+            itertools.product(
+                enumerate(self.starting_amounts.tolist()),
+                enumerate(self.yearly_return_rates.tolist()),
+                enumerate(lengths),
+                enumerate(self.additional_yearly_contributions.tolist()),
+            )
+        ):
+            scenario = {
+                "starting_amount": starting_amount,
+                "yearly_return_rate": yearly_return_rate,
+                "investment_length_in_years": investment_length_in_years,
+                "additional_yearly_contribution": additional_yearly_contribution,
+                "additional_contribution": contributions_list[length_index][
+                    contribution_index
+                ],
+                "compound_interest": compound_interests_list[index],
+                "final_amount": final_amounts_list[index],
+            }
+            if include_schedule:
+                scenario["schedule"] = schedules[
+                    amount_index,
+                    rate_index,
+                    :investment_length_in_years,
+                    contribution_index,
+                ].tolist()
+            scenarios.append(scenario)
+
+        return scenarios
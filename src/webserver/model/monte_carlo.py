@@ -0,0 +1,170 @@
+"""
+Vectorized Monte Carlo simulation of investment growth with contributions.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy
+
+from webserver.constants import MONTE_CARLO_BOOTSTRAP
+
+
+class MonteCarloSimulator:
+    """
+    Simulates yearly investment amounts over many paths. Yearly returns are drawn either from a normal distribution
+    (parametric) or by resampling historical yearly returns (bootstrap). Paths are split in shards, each shard having
+    an independent random stream, so shards can be simulated in parallel by worker processes. Worker processes write
+    shard amounts into one shared memory matrix and percentile bands are computed from it by a worker process too, so
+    simulated amounts are never sent back to the calling process.
+    """
+
+    @staticmethod
+    def get_shards(paths, shards, seed=None) -> list:
+        """
+        Split paths in shards with independent random seeds.
+        @param paths: int, total number of paths
+        @param shards: int, max number of shards
+        @param seed: int, random seed (None for random)
+        @return: list of tuples (shard paths, shard seed)
+        """
+        shards = max(1, min(shards, paths))
+        shard_paths = [
+            paths // shards + (1 if shard < paths % shards else 0)
+            for shard in range(shards)
+        ]
+        shard_seeds = numpy.random.SeedSequence(seed).spawn(shards)
+        return list(zip(shard_paths, shard_seeds))
+
+    @staticmethod
+    def simulate_shard(
+        paths,
+        seed,
+        starting_amount,
+        investment_length_in_years,
+        additional_yearly_contribution,
+        additional_at_end_of_year,
+        method,
+        yearly_return_rate=0.0,
+        yearly_volatility=0.0,
+        historical_returns=None,
+        out=None,
+    ) -> numpy.ndarray:
+        """
+        Simulate shard of paths. Runs in worker processes.
+        @param paths: int, number of paths
+        @param seed: numpy.random.SeedSequence
+        @param starting_amount: float, initial deposit
+        @param investment_length_in_years: int
+        @param additional_yearly_contribution: float
+        @param additional_at_end_of_year: boolean, contribution at the end/start of each year
+        @param method: string, parametric or bootstrap
+        @param yearly_return_rate: float, mean yearly return percentage (parametric)
+        @param yearly_volatility: float, yearly return standard deviation percentage (parametric)
+        @param historical_returns: numpy.ndarray, historical yearly returns as fractions (bootstrap)
+        @param out: numpy.ndarray float32, paths x years, written instead of a new array
+        @return: numpy.ndarray float32 amounts, paths x years
+        """
+        generator = numpy.random.default_rng(seed)
+        shape = (paths, investment_length_in_years)
+        if method == MONTE_CARLO_BOOTSTRAP:
+            growth = 1 + generator.choice(historical_returns, size=shape)
+        else:
+            growth = 1 + generator.normal(
+                yearly_return_rate / 100, yearly_volatility / 100, size=shape
+            )
+        # cannot lose more than the invested amount
+        numpy.maximum(growth, 0, out=growth)
+
+        amounts = numpy.empty(shape, dtype=numpy.float32) if out is None else out
+        amount = numpy.full(paths, float(starting_amount))
+        for year in range(investment_length_in_years):
+            if additional_at_end_of_year:
+                amount = amount * growth[:, year] + additional_yearly_contribution
+            else:
+                amount = (amount + additional_yearly_contribution) * growth[:, year]
+            amounts[:, year] = amount
+
+        return amounts
+
+    @staticmethod
+    def simulate_shared_shard(shared_name, shape, row, *shard_args) -> None:
+        """
+        Simulate shard of paths into rows [row, row + paths) of shared amounts matrix. Runs in worker processes.
+        @param shared_name: string, shared memory name of amounts matrix
+        @param shape: tuple, amounts matrix shape (paths x years)
+        @param row: int, first row of shard
+        @param shard_args: simulate_shard arguments
+        @return: None
+        """
+        shared_memory = SharedMemory(name=shared_name)
+        try:
+            amounts = numpy.ndarray(
+                shape, dtype=numpy.float32, buffer=shared_memory.buf
+            )
+            MonteCarloSimulator.simulate_shard(
+                *shard_args, out=amounts[row : row + shard_args[0]]
+            )
+            del amounts
+        finally:
+            shared_memory.close()
+
+    @staticmethod
+    def get_shared_percentile_bands(
+        shared_name, shape, percentiles, total_contributions
+    ) -> dict:
+        """
+        Percentile bands of shared amounts matrix (see get_percentile_bands). Runs in worker processes.
+        @param shared_name: string, shared memory name of amounts matrix
+        @param shape: tuple, amounts matrix shape (paths x years)
+        @param percentiles: list, ex. [5, 50, 95]
+        @param total_contributions: numpy.ndarray, amount invested until end of each year
+        @return: dict
+        """
+        shared_memory = SharedMemory(name=shared_name)
+        try:
+            amounts = numpy.ndarray(
+                shape, dtype=numpy.float32, buffer=shared_memory.buf
+            )
+            percentile_bands = MonteCarloSimulator.get_percentile_bands(
+                amounts, percentiles, total_contributions
+            )
+            del amounts
+        finally:
+            shared_memory.close()
+        return percentile_bands
+
+    @staticmethod
+    def get_percentile_bands(amounts, percentiles, total_contributions) -> dict:
+        """
+        Percentile bands of simulated amounts for each year and final amount statistics.
+        @param amounts: numpy.ndarray, paths x years
+        @param percentiles: list, ex. [5, 50, 95]
+        @param total_contributions: numpy.ndarray, amount invested until end of each year
+        @return: dict
+        """
+        bands = numpy.percentile(amounts, percentiles, axis=0)
+        final_amounts = amounts[:, -1]
+        return {
+            "paths": int(amounts.shape[0]),
+            "yearly_percentiles": [
+                {
+                    "year": year + 1,
+                    "contributions": float(total_contributions[year]),
+                    **{
+                        "p{}".format(percentile): round(float(bands[row, year]), 2)
+                        for row, percentile in enumerate(percentiles)
+                    },
+                }
+                for year in range(amounts.shape[1])
+            ],
+            "final_amount": {
+                "mean": round(float(final_amounts.mean(dtype=numpy.float64)), 2),
+                **{
+                    "p{}".format(percentile): round(float(bands[row, -1]), 2)
+                    for row, percentile in enumerate(percentiles)
+                },
+            },
+            "loss_probability": round(
+                float(numpy.mean(final_amounts < total_contributions[-1])), 4
+            ),
+        }
@@ -4,11 +4,9 @@ Classes for ES minimal portfolio mapping with validation methods.
 
 import json
 import time
-from datetime import datetime
 from typing import List
 
-from util.elasticsearch.es_stock_prices import ESStockPrices
-from util.logger.logger import Logger
+from webserver.model.backtest import BacktestEngine
 
 #####################
 # Custom Exceptions #
@@ -191,88 +189,44 @@ class Portfolio:
         """
         self._modified_timestamp = modified_timestamp
 
-    def backtest(self, start_ts, end_ts) -> dict:
+    def backtest(self, start_ts, end_ts, include_risk_metrics=False) -> dict:
         """
-        Backtest portfolio.
+        Backtest portfolio: return of each holding from its first to its last price in range.
         @param start_ts: int
         @param end_ts: int
+        @param include_risk_metrics: boolean, include volatility, max drawdown, Sharpe, Sortino and Calmar ratios
         @return: dict
         """
-
-        backtest_info = {
-            "start_date": datetime.fromtimestamp(start_ts).strftime("%Y-%m-%d"),
-            "end_date": datetime.fromtimestamp(end_ts).strftime("%Y-%m-%d"),
-            "portfolio_data": {},
-        }
-
-        for allocation in self._allocations:
-            ticker = allocation.get_ticker()
-
-            # get first date and price
-            first_date_price = ESStockPrices.get_ticker_first_date_price(
-                ticker, start_ts
-            )
-            if not first_date_price:
-                Logger.exception(
-                    "No stock prices for ticker {} in the specified range.".format(
-                        ticker
-                    )
-                )
-                first_date_price = {start_ts: 0}
-                last_date_price = first_date_price
-            else:
-                # got first price -> get last date and price
-                last_date_price = ESStockPrices.get_ticker_last_date_price(
-                    ticker, end_ts
-                )
-                if not last_date_price:
-                    Logger.exception(
-                        "Could not get last price for ticker {}.".format(ticker)
-                    )
-                    last_date_price = first_date_price
-
-            backtest_info["portfolio_data"][ticker] = first_date_price
-            backtest_info["portfolio_data"][ticker].update(last_date_price)
-
-        # compute return for each holding
-        for ticker in backtest_info["portfolio_data"]:
-            start_ts, end_ts = min(
-                list(backtest_info["portfolio_data"][ticker].keys())
-            ), max(list(backtest_info["portfolio_data"][ticker].keys()))
-
-            backtest_info["portfolio_data"][ticker]["return_value_per_share"] = (
-                backtest_info["portfolio_data"][ticker][end_ts]
-                - backtest_info["portfolio_data"][ticker][start_ts]
-            )
-
-            backtest_info["portfolio_data"][ticker]["return_percentage"] = (
-                (
-                    100
-                    * backtest_info["portfolio_data"][ticker][end_ts]
-                    / backtest_info["portfolio_data"][ticker][start_ts]
+        return BacktestEngine.backtest_summary_batch(
+            {
+                None: (
+                    [allocation.get_ticker() for allocation in self._allocations],
+                    [allocation.get_percentage() for allocation in self._allocations],
                 )
-                - 100
-                if backtest_info["portfolio_data"][ticker][start_ts]
-                else 0
-            )
+            },
+            start_ts=start_ts,
+            end_ts=end_ts,
+            include_risk_metrics=include_risk_metrics,
+        )[None]
 
-        # compute total return
-        backtest_info["total_return_percentage"] = round(
-            sum(
-                [
-                    allocation.get_percentage()
-                    / 100
-                    * backtest_info["portfolio_data"][allocation.get_ticker()][
-                        "return_percentage"
-                    ]
-                    for allocation in self._allocations
-                ]
-            ),
-            2,
+    def backtest_timeseries(self, start_ts, end_ts, include_risk_metrics=False) -> dict:
+        """
+        Backtest portfolio day by day. Result contains daily NAV, daily and cumulative returns.
+        @param start_ts: int
+        @param end_ts: int
+        @param include_risk_metrics: boolean
+        @return: dict
+        """
+        return BacktestEngine.backtest(
+            tickers=[allocation.get_ticker() for allocation in self._allocations],
+            percentages=[
+                allocation.get_percentage() for allocation in self._allocations
+            ],
+            start_ts=start_ts,
+            end_ts=end_ts,
+            include_risk_metrics=include_risk_metrics,
         )
 
-        return backtest_info
-
     def validate_portfolio(self) -> None:
         """
         Validate portfolio data fields.
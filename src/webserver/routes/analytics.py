@@ -0,0 +1,112 @@
+"""
+API Route class.
+"""
+
+import time
+
+from flask_restplus import Resource
+
+from webserver import decorators
+from webserver.constants import TIME_RANGES
+from webserver.core.analytics import AnalyticsAPI
+from webserver.flask_rest import FlaskRestPlusApi
+from webserver.responses import response, response_400
+from webserver.routes.authentication import token_required
+from webserver.routes.utils import api_param_query, get_request_parameter
+
+api = FlaskRestPlusApi.get_instance()
+
+DEFAULT_ROLLING_WINDOWS = "1,3,5"
+
+
+def parse_windows(windows) -> list:
+    """
+    Parse comma separated window lengths (years).
+    @param windows: string
+    @return: list/None
+    """
+    try:
+        parsed = sorted({int(window) for window in windows.split(",")})
+    except ValueError:
+        return None
+    if not parsed or parsed[0] <= 0:
+        return None
+    return parsed
+
+
+class RouteRollingReturns(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Rolling window returns (best, worst, median) for current user portfolio or ticker."
+    )
+    @api.doc(
+        params={
+            "portfolio_id": api_param_query(required=False, description="Portfolio id"),
+            "ticker": api_param_query(required=False, description="Stock ticker"),
+            "windows": api_param_query(
+                required=False,
+                description="Comma separated rolling window lengths in years",
+                default=DEFAULT_ROLLING_WINDOWS,
+            ),
+            "start_ts": api_param_query(required=False, description="Start timestamp"),
+            "start": api_param_query(
+                required=False,
+                description="Time range start",
+                enum=list(TIME_RANGES.keys()),
+                default="ALL",
+            ),
+            "end_ts": api_param_query(
+                required=False, description="End ts", default=int(time.time())
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "Portfolio id or ticker must be specified. | Invalid windows <>.",
+            401: "Cannot analyze other users' portfolios",
+            404: "User not found. | Portfolio not found | No price history for specified time range.",
+        }
+    )
+    @api.doc(security="apiKey")
+    @token_required
+    def get(current_user) -> response:
+        portfolio_id = get_request_parameter(
+            name="portfolio_id", expected_type=str, required=False
+        )
+        ticker = get_request_parameter(name="ticker", expected_type=str, required=False)
+
+        windows_param = (
+            get_request_parameter(name="windows", expected_type=str, required=False)
+            or DEFAULT_ROLLING_WINDOWS
+        )
+        windows = parse_windows(windows_param)
+        if not windows:
+            return response_400("Invalid windows {}.".format(windows_param))
+
+        start_ts = get_request_parameter("start_ts", required=False, expected_type=int)
+        start = (
+            get_request_parameter(name="start", expected_type=str, required=False)
+            or "ALL"
+        )
+        if start_ts is None:
+            if start not in TIME_RANGES:
+                return response_400("Invalid time range")
+            start_ts = TIME_RANGES[start]
+
+        end_ts = get_request_parameter(name="end_ts", expected_type=int, required=False)
+        if end_ts is None:
+            end_ts = int(time.time())
+
+        return response(
+            *AnalyticsAPI.get_rolling_returns(
+                current_user.public_id,
+                portfolio_id=portfolio_id,
+                ticker=ticker,
+                windows=windows,
+                start_ts=start_ts,
+                end_ts=end_ts,
+            )
+        )
@@ -5,6 +5,11 @@ API Route class.
 from flask_restplus import Resource
 
 from webserver import decorators
+from webserver.constants import (
+    MONTE_CARLO_DEFAULT_PATHS,
+    MONTE_CARLO_METHODS,
+    MONTE_CARLO_PARAMETRIC,
+)
 from webserver.core.investment_calculator import InvestmentCalculatorAPI
 from webserver.flask_rest import FlaskRestPlusApi
 from webserver.responses import response, response_400
@@ -86,3 +91,208 @@ class RouteInvestmentCalculatorCompoundInterest(Resource):
                 additional_at_end_of_year=additional_at_end_of_year,
             )
         )
+
+
+class RouteInvestmentCalculatorCompoundInterestGrid(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Compute compound interest for all combinations (Cartesian product) of parameters."
+    )
+    @api.doc(
+        params={
+            "starting_amounts": api_param_query(
+                required=True,
+                description="Starting amounts in USD. Json list; format [<number>]",
+            ),
+            "yearly_return_rates": api_param_query(
+                required=True,
+                description="Yearly returns (percentage). Json list; format [<number>]",
+            ),
+            "investment_lengths_in_years": api_param_query(
+                required=True,
+                description="Investment lengths. Json list; format [<int>]",
+            ),
+            "additional_yearly_contributions": api_param_query(
+                required=False,
+                description="Additional contributions. Json list; format [<number>]",
+                default="[0]",
+            ),
+            "additional_at_end_of_year": api_param_query(
+                required=False,
+                description="Compound at the end of the year flag.",
+                type="boolean",
+                default=True,
+            ),
+            "schedule": api_param_query(
+                required=False,
+                description="Include amount at the end of each year",
+                type="boolean",
+                default=False,
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "Param <> is required | Too many scenarios. Max <> per request.",
+        }
+    )
+    def get() -> response:
+        grid_params = {}
+        for name in [
+            "starting_amounts",
+            "yearly_return_rates",
+            "investment_lengths_in_years",
+        ]:
+            grid_params[name], msg = get_request_parameter(
+                name, expected_type=list, required=True
+            )
+            if grid_params[name] is None:
+                return response_400(msg)
+
+        additional_yearly_contributions = get_request_parameter(
+            "additional_yearly_contributions", expected_type=list, required=False
+        )
+        if additional_yearly_contributions is None:
+            additional_yearly_contributions = [0]
+
+        additional_at_end_of_year = get_request_parameter(
+            "additional_at_end_of_year", expected_type=bool, required=False
+        )
+        if additional_at_end_of_year is None:
+            additional_at_end_of_year = True
+
+        return response(
+            *InvestmentCalculatorAPI.compute_compound_interest_grid(
+                **grid_params,
+                additional_yearly_contributions=additional_yearly_contributions,
+                additional_at_end_of_year=additional_at_end_of_year,
+                include_schedule=bool(
+                    get_request_parameter(
+                        "schedule", expected_type=bool, required=False
+                    )
+                ),
+            )
+        )
+
+
+class RouteInvestmentCalculatorMonteCarlo(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Monte Carlo simulation of investment final amount. Returns percentile bands for each year."
+    )
+    @api.doc(
+        params={
+            "starting_amount": api_param_query(
+                required=True, description="Starting amount in USD", type="integer"
+            ),
+            "investment_length_in_years": api_param_query(
+                required=True, description="Investment length: int", type="integer"
+            ),
+            "additional_yearly_contribution": api_param_query(
+                required=False,
+                description="Additional contribution",
+                type="integer",
+                default=0,
+            ),
+            "additional_at_end_of_year": api_param_query(
+                required=False,
+                description="Compound at the end of the year flag.",
+                type="boolean",
+                default=True,
+            ),
+            "method": api_param_query(
+                required=False,
+                description="Yearly returns drawn from normal distribution (parametric) or resampled from ticker "
+                "historical yearly returns (bootstrap)",
+                enum=MONTE_CARLO_METHODS,
+                default=MONTE_CARLO_PARAMETRIC,
+            ),
+            "yearly_return_rate": api_param_query(
+                required=False,
+                description="Mean yearly return (percentage): float. Parametric method only",
+            ),
+            "yearly_volatility": api_param_query(
+                required=False,
+                description="Yearly return standard deviation (percentage): float. Parametric method only",
+            ),
+            "ticker": api_param_query(
+                required=False,
+                description="Company ticker. Bootstrap method only",
+            ),
+            "paths": api_param_query(
+                required=False,
+                description="Number of simulated paths",
+                type="integer",
+                default=MONTE_CARLO_DEFAULT_PATHS,
+            ),
+            "seed": api_param_query(
+                required=False,
+                description="Random seed for reproducible results",
+                type="integer",
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "Param <> is required | Invalid simulation method <>.",
+            404: "Not enough price history for ticker <>.",
+        }
+    )
+    def get() -> response:
+        starting_amount, msg = get_request_parameter(
+            "starting_amount", expected_type=int, required=True
+        )
+        if starting_amount is None:
+            return response_400(msg)
+
+        investment_length_in_years, msg = get_request_parameter(
+            "investment_length_in_years", expected_type=int, required=True
+        )
+        if investment_length_in_years is None:
+            return response_400(msg)
+
+        additional_yearly_contribution = get_request_parameter(
+            "additional_yearly_contribution", expected_type=int, required=False
+        )
+        if additional_yearly_contribution is None:
+            additional_yearly_contribution = 0
+
+        additional_at_end_of_year = get_request_parameter(
+            "additional_at_end_of_year", expected_type=bool, required=False
+        )
+        if additional_at_end_of_year is None:
+            additional_at_end_of_year = True
+
+        paths = get_request_parameter("paths", expected_type=int, required=False)
+        if paths is None:
+            paths = MONTE_CARLO_DEFAULT_PATHS
+
+        return response(
+            *InvestmentCalculatorAPI.simulate_compound_interest(
+                starting_amount=starting_amount,
+                investment_length_in_years=investment_length_in_years,
+                additional_yearly_contribution=additional_yearly_contribution,
+                additional_at_end_of_year=additional_at_end_of_year,
+                method=get_request_parameter(
+                    "method", expected_type=str, required=False
+                )
+                or MONTE_CARLO_PARAMETRIC,
+                yearly_return_rate=get_request_parameter(
+                    "yearly_return_rate", expected_type=float, required=False
+                ),
+                yearly_volatility=get_request_parameter(
+                    "yearly_volatility", expected_type=float, required=False
+                ),
+                ticker=get_request_parameter(
+                    "ticker", expected_type=str, required=False
+                ),
+                paths=paths,
+                seed=get_request_parameter("seed", expected_type=int, required=False),
+            )
+        )
@@ -0,0 +1,30 @@
+"""
+API Route class.
+"""
+
+from flask_restplus import Resource
+
+from webserver import decorators
+from webserver.core.monitoring import MonitoringAPI
+from webserver.flask_rest import FlaskRestPlusApi
+from webserver.responses import response
+from webserver.routes.authentication import token_required
+
+api = FlaskRestPlusApi.get_instance()
+
+
+class RouteElasticsearchPool(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Get Elasticsearch connection pool utilization (connections in use, idle, created, requests)."
+    )
+    @api.doc(responses={200: "OK", 401: "Unauthorized operation."})
+    @api.doc(security="apiKey")
+    @token_required
+    def get(current_user) -> response:
+        if not current_user.admin:
+            return response(401, {}, "Unauthorized operation.")
+
+        return response(*MonitoringAPI.get_elasticsearch_pool_stats())
@@ -7,15 +7,20 @@ import time
 from flask_restplus import Resource
 
 from webserver import decorators
-from webserver.constants import TIME_RANGES
+from webserver.constants import BACKTEST_MODE_SUMMARY, BACKTEST_MODES, TIME_RANGES
 from webserver.core.portfolio_management import PortfolioManagementAPI
 from webserver.flask_rest import FlaskRestPlusApi
 from webserver.responses import response, response_400
 from webserver.routes.authentication import token_required
 from webserver.routes.utils import (
+    add_cache_headers,
     api_param_form,
     api_param_query,
+    get_cache_control,
+    get_etag,
     get_request_parameter,
+    is_not_modified,
+    response_not_modified,
 )
 
 api = FlaskRestPlusApi.get_instance()
@@ -193,12 +198,25 @@ class RouteBacktest(Resource):
             "end_ts": api_param_query(
                 required=False, description="End ts", default=int(time.time())
             ),
+            "mode": api_param_query(
+                required=False,
+                description="Backtest mode: summary (first/last price returns) or timeseries (daily NAV)",
+                enum=BACKTEST_MODES,
+                default=BACKTEST_MODE_SUMMARY,
+            ),
+            "risk_metrics": api_param_query(
+                required=False,
+                description="Include annualized volatility, max drawdown, Sharpe, Sortino and Calmar ratios",
+                type="boolean",
+                default=False,
+            ),
         }
     )
     @api.doc(
         responses={
             200: "OK",
-            400: "Param <> is required.",
+            304: "Not modified",
+            400: "Param <> is required. | Invalid backtest mode <>.",
             401: "Cannot backtest other users' portfolios",
             404: "User not found. | Portfolio not found",
         }
@@ -226,11 +244,168 @@ class RouteBacktest(Resource):
         if end_ts is None:
             end_ts = int(time.time())
 
+        mode = (
+            get_request_parameter(name="mode", expected_type=str, required=False)
+            or BACKTEST_MODE_SUMMARY
+        )
+        risk_metrics = bool(
+            get_request_parameter(
+                name="risk_metrics", expected_type=bool, required=False
+            )
+        )
+
+        status, version, msg = PortfolioManagementAPI.get_backtest_version(
+            user_id=current_user.public_id,
+            portfolio_id=portfolio_id,
+            start_ts=start_ts,
+            ends_ts=end_ts,
+            mode=mode,
+            risk_metrics=risk_metrics,
+        )
+        if status != 200:
+            return response(status, version, msg)
+
+        # portfolio allocations can change at any time: always revalidate (ETag includes allocations)
+        etag = get_etag("backtest", version["version"])
+        cache_control = get_cache_control(private=True)
+        if is_not_modified(etag):
+            return response_not_modified(etag, cache_control)
+
+        return add_cache_headers(
+            response(
+                *PortfolioManagementAPI.backtest_portfolio(
+                    user_id=current_user.public_id,
+                    portfolio_id=portfolio_id,
+                    start_ts=start_ts,
+                    ends_ts=end_ts,
+                    mode=mode,
+                    risk_metrics=risk_metrics,
+                    portfolio=version["portfolio"],
+                )
+            ),
+            etag,
+            cache_control,
+        )
+
+
+class RouteBacktestBatch(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Backtest multiple current user portfolios and/or inline allocations at once."
+    )
+    @api.doc(
+        params={
+            "portfolio_ids": api_param_form(
+                required=False,
+                description='Portfolio ids. Json list; format ["<portfolio_id>"]',
+            ),
+            "portfolios": api_param_form(
+                required=False,
+                description="Inline portfolio allocations. Json list of lists of dicts; "
+                'format [[{"ticker": <ticker>, "percentage": <int>}]]',
+            ),
+            "start_ts": api_param_form(required=False, description="Start timestamp"),
+            "start": api_param_form(
+                required=False,
+                description="Time range start",
+                enum=[
+                    "LAST_WEEK",
+                    "LAST_MONTH",
+                    "MTD",
+                    "LAST_YEAR",
+                    "YTD",
+                    "LAST_5_YEARS",
+                    "ALL",
+                ],
+                default="LAST_5_YEARS",
+            ),
+            "end_ts": api_param_form(
+                required=False, description="End ts", default=int(time.time())
+            ),
+            "mode": api_param_form(
+                required=False,
+                description="Backtest mode: summary (first/last price returns) or timeseries (daily NAV)",
+                enum=BACKTEST_MODES,
+                default=BACKTEST_MODE_SUMMARY,
+            ),
+            "risk_metrics": api_param_form(
+                required=False,
+                description="Include annualized volatility, max drawdown, Sharpe, Sortino and Calmar ratios",
+                type="boolean",
+                default=False,
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "No portfolios to backtest. | Too many portfolios. Max <> per request.",
+            500: "Could not get portfolios.",
+        }
+    )
+    @api.doc(security="apiKey")
+    @token_required
+    def post(current_user) -> response:
+        portfolio_ids = get_request_parameter(
+            name="portfolio_ids", expected_type=list, required=False
+        )
+        allocations_list = get_request_parameter(
+            name="portfolios", expected_type=list, required=False
+        )
+        if not portfolio_ids and not allocations_list:
+            return response_400("Param portfolio_ids or portfolios is required")
+
+        start_ts = get_request_parameter("start_ts", required=False, expected_type=int)
+        start = (
+            get_request_parameter(name="start", expected_type=str, required=False)
+            or "LAST_5_YEARS"
+        )
+        if start_ts is None:
+            if start not in TIME_RANGES:
+                return response_400("Invalid time range")
+            start_ts = TIME_RANGES[start]
+
+        end_ts = get_request_parameter(name="end_ts", expected_type=int, required=False)
+        if end_ts is None:
+            end_ts = int(time.time())
+
+        mode = (
+            get_request_parameter(name="mode", expected_type=str, required=False)
+            or BACKTEST_MODE_SUMMARY
+        )
+        risk_metrics = bool(
+            get_request_parameter(
+                name="risk_metrics", expected_type=bool, required=False
+            )
+        )
+
         return response(
-            *PortfolioManagementAPI.backtest_portfolio(
+            *PortfolioManagementAPI.backtest_portfolios(
                 user_id=current_user.public_id,
-                portfolio_id=portfolio_id,
+                portfolio_ids=[
+                    str(portfolio_id) for portfolio_id in portfolio_ids or []
+                ],
+                allocations_list=allocations_list,
                 start_ts=start_ts,
                 ends_ts=end_ts,
+                mode=mode,
+                risk_metrics=risk_metrics,
             )
         )
+
+
+class RouteBacktestCache(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(description="Get backtest cache statistics (hits, misses, size).")
+    @api.doc(responses={200: "OK", 401: "Unauthorized operation."})
+    @api.doc(security="apiKey")
+    @token_required
+    def get(current_user) -> response:
+        if not current_user.admin:
+            return response(401, {}, "Unauthorized operation.")
+
+        return response(*PortfolioManagementAPI.get_backtest_cache_stats())
@@ -4,18 +4,31 @@ API Route class.
 
 import time
 
+from flask import Response, stream_with_context
 from flask_restplus import Resource
 
 from webserver import decorators
-from webserver.constants import TIME_RANGES
+from webserver.constants import (
+    PRICE_FORMAT_COLUMNAR,
+    PRICE_FORMAT_JSON,
+    PRICE_FORMAT_MSGPACK,
+    PRICE_FORMAT_NDJSON,
+    PRICE_FORMATS,
+    TIME_RANGES,
+)
 from webserver.core.stock_prices_management import StockPricesManagementAPI
 from webserver.flask_rest import FlaskRestPlusApi
 from webserver.responses import response, response_400
 from webserver.routes.authentication import token_required
 from webserver.routes.utils import (
+    add_cache_headers,
     api_param_form,
     api_param_query,
+    get_cache_control,
+    get_etag,
     get_request_parameter,
+    is_not_modified,
+    response_not_modified,
 )
 
 api = FlaskRestPlusApi.get_instance()
@@ -52,11 +65,20 @@ class RouteStockPrices(Resource):
                 description="Time range end timestamp",
                 default=int(time.time()),
             ),
+            "format": api_param_query(
+                required=False,
+                description="Response format: json, json-stream (chunked json), ndjson (streamed, one price per line), "
+                "columnar (one array per field) or msgpack (binary columnar, int64/float64 little endian columns)",
+                enum=PRICE_FORMATS,
+                default=PRICE_FORMAT_JSON,
+            ),
         }
     )
     @api.doc(
         responses={
             200: "OK",
+            304: "Not modified",
+            400: "Invalid format <>",
             404: "No price history for ticker",
         }
     )
@@ -78,11 +100,34 @@ class RouteStockPrices(Resource):
             start_ts = TIME_RANGES[start]
 
         end_ts = get_request_parameter(name="end_ts", expected_type=int, required=False)
+        if end_ts is None:
+            end_ts = int(time.time())
 
-        return response(
-            *StockPricesManagementAPI.get_price_history_for_ticker(
-                ticker, start_ts=start_ts, end_ts=end_ts
-            )
+        output_format = (
+            get_request_parameter(name="format", expected_type=str, required=False)
+            or PRICE_FORMAT_JSON
+        )
+        if output_format not in PRICE_FORMATS:
+            return response_400("Invalid format {}".format(output_format))
+
+        # answer conditional requests from price store memory
+        status, version, _ = StockPricesManagementAPI.get_price_history_version(
+            ticker, start_ts=start_ts, end_ts=end_ts
+        )
+        if status != 200:
+            return price_history_response(ticker, start_ts, end_ts, output_format)
+
+        etag = get_etag(
+            "stock-prices", ticker.upper(), output_format, version["version"]
+        )
+        cache_control = get_cache_control(historical=version["historical"])
+        if is_not_modified(etag):
+            return response_not_modified(etag, cache_control)
+
+        return add_cache_headers(
+            price_history_response(ticker, start_ts, end_ts, output_format),
+            etag,
+            cache_control,
         )
 
     @staticmethod
@@ -138,3 +183,121 @@ class RouteStockPrices(Resource):
         return response(
             *StockPricesManagementAPI.delete_price_history_for_stock(ticker=ticker)
         )
+
+
+class RouteStockPricesCorrelation(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(
+        description="Correlation and covariance matrices of daily log returns for several tickers"
+    )
+    @api.doc(
+        params={
+            "tickers": api_param_query(
+                required=True, description="Comma separated company tickers"
+            ),
+            "start": api_param_query(
+                required=False,
+                description="Time range start",
+                enum=[
+                    "LAST_MONTH",
+                    "MTD",
+                    "LAST_YEAR",
+                    "YTD",
+                    "LAST_5_YEARS",
+                    "ALL",
+                ],
+                default="LAST_YEAR",
+            ),
+            "start_ts": api_param_query(
+                required=False, description="Time range start timestamp", default=None
+            ),
+            "end_ts": api_param_query(
+                required=False,
+                description="Time range end timestamp",
+                default=int(time.time()),
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "No tickers specified. | Too many tickers. Max <> per request.",
+            404: "No price history for specified tickers and time range.",
+        }
+    )
+    def get() -> response:
+        tickers, msg = get_request_parameter(
+            name="tickers", expected_type=str, required=True
+        )
+        if not tickers:
+            return response_400(msg)
+
+        start_ts = get_request_parameter("start_ts", required=False, expected_type=int)
+        start = (
+            get_request_parameter(name="start", expected_type=str, required=False)
+            or "LAST_YEAR"
+        )
+        if start_ts is None:
+            if start not in TIME_RANGES:
+                return response_400("Invalid time range")
+            start_ts = TIME_RANGES[start]
+
+        end_ts = get_request_parameter(name="end_ts", expected_type=int, required=False)
+        if end_ts is None:
+            end_ts = int(time.time())
+
+        return response(
+            *StockPricesManagementAPI.get_returns_correlation(
+                [ticker.strip() for ticker in tickers.split(",") if ticker.strip()],
+                start_ts=start_ts,
+                end_ts=end_ts,
+            )
+        )
+
+
+def price_history_response(ticker, start_ts, end_ts, output_format) -> object:
+    """
+    Stock price history route response in specified format.
+    @param ticker: string
+    @param start_ts: int
+    @param end_ts: int
+    @param output_format: string
+    @return: tuple/Response
+    """
+    if output_format == PRICE_FORMAT_JSON:
+        return response(
+            *StockPricesManagementAPI.get_price_history_for_ticker(
+                ticker, start_ts=start_ts, end_ts=end_ts
+            )
+        )
+
+    if output_format in [PRICE_FORMAT_COLUMNAR, PRICE_FORMAT_MSGPACK]:
+        status, data, msg = (
+            StockPricesManagementAPI.get_price_history_columns_for_ticker(
+                ticker,
+                start_ts=start_ts,
+                end_ts=end_ts,
+                output_format=output_format,
+            )
+        )
+        if status != 200 or output_format == PRICE_FORMAT_COLUMNAR:
+            return response(status, data, msg)
+        return Response(data, status=status, mimetype="application/x-msgpack")
+
+    status, chunks, msg = StockPricesManagementAPI.stream_price_history_for_ticker(
+        ticker, start_ts=start_ts, end_ts=end_ts, output_format=output_format
+    )
+    if status != 200:
+        return response(status, chunks, msg)
+
+    return Response(
+        stream_with_context(chunks),
+        status=status,
+        mimetype=(
+            "application/x-ndjson"
+            if output_format == PRICE_FORMAT_NDJSON
+            else "application/json"
+        ),
+    )
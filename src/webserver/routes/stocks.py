@@ -5,6 +5,7 @@ API Route class.
 from flask_restplus import Resource
 
 from webserver import decorators
+from webserver.constants import SUGGEST_DEFAULT_SIZE
 from webserver.core.stocks_management import StocksManagementAPI
 from webserver.flask_rest import FlaskRestPlusApi
 from webserver.responses import response, response_400
@@ -38,9 +39,34 @@ class RouteStocks(Resource):
                 default=False,
                 enum=[True, False],
             ),
+            "fields": api_param_query(
+                required=False,
+                description="Comma separated stock fields to return, ex. names,sector (default all)",
+            ),
+            "size": api_param_query(
+                required=False,
+                description="Page size. Results are paginated if size or search_after is specified",
+                type="integer",
+            ),
+            "search_after": api_param_query(
+                required=False,
+                description="Cursor for next page (next from previous page response)",
+            ),
+            "include_total": api_param_query(
+                required=False,
+                description="Count all matching stocks (paginated results)",
+                type="boolean",
+                default=False,
+            ),
+        }
+    )
+    @api.doc(
+        responses={
+            200: "OK",
+            400: "Size must be between 1 and <>",
+            404: "No stocks found for specified filter.",
         }
     )
-    @api.doc(responses={200: "OK", 404: "No stocks found for specified filter."})
     def get() -> response:
         ticker = get_request_parameter(name="ticker", expected_type=str, required=False)
         company_name = get_request_parameter(
@@ -60,6 +86,14 @@ class RouteStocks(Resource):
         tickers_only = get_request_parameter(
             name="tickers_only", expected_type=bool, required=False
         )
+        fields = get_request_parameter(name="fields", expected_type=str, required=False)
+        size = get_request_parameter(name="size", expected_type=int, required=False)
+        search_after = get_request_parameter(
+            name="search_after", expected_type=str, required=False
+        )
+        include_total = get_request_parameter(
+            name="include_total", expected_type=bool, required=False
+        )
 
         return response(
             *StocksManagementAPI.get_stocks(
@@ -71,6 +105,14 @@ class RouteStocks(Resource):
                 exchange=exchange,
                 legal_type=legal_type,
                 ticker_only=tickers_only,
+                fields=(
+                    [field.strip() for field in fields.split(",") if field.strip()]
+                    if fields
+                    else None
+                ),
+                size=size,
+                search_after=search_after,
+                include_total=bool(include_total),
             )
         )
 
@@ -166,3 +208,38 @@ class RouteStocks(Resource):
             return response_400(msg)
 
         return response(*StocksManagementAPI.delete_stock(ticker=ticker))
+
+
+class RouteStocksSuggest(Resource):
+    method_decorators = [decorators.webserver_logger]
+
+    @staticmethod
+    @api.doc(description="Autocomplete stocks by ticker, company name or tag prefix")
+    @api.doc(
+        params={
+            "prefix": api_param_query(
+                required=True, description="Ticker, company name or tag prefix"
+            ),
+            "size": api_param_query(
+                required=False,
+                description="Max number of suggestions",
+                type="integer",
+                default=SUGGEST_DEFAULT_SIZE,
+            ),
+        }
+    )
+    @api.doc(
+        responses={200: "OK", 400: "Param <> is required | Prefix must not be empty."}
+    )
+    def get() -> response:
+        prefix, msg = get_request_parameter(
+            name="prefix", expected_type=str, required=True
+        )
+        if not prefix:
+            return response_400(msg)
+
+        size = get_request_parameter(name="size", expected_type=int, required=False)
+        if size is None:
+            size = SUGGEST_DEFAULT_SIZE
+
+        return response(*StocksManagementAPI.suggest_stocks(prefix, size=size))
@@ -1,6 +1,10 @@
+import hashlib
 import json
 
-from flask import request
+from flask import Response, request
+from werkzeug.http import quote_etag
+
+from util import config
 
 #####################
 # Swagger doc utils #
@@ -98,3 +102,80 @@ def get_request_parameter(name, expected_type, required=False):
 
     param, msg = validate_param_type(param, expected_type)
     return (param, msg) if required else param
+
+
+###############
+# Cache utils #
+###############
+
+
+def get_etag(*parts) -> str:
+    """
+    Strong ETag from JSON serializable parts.
+    @param parts: objects
+    @return: string
+    """
+    return hashlib.blake2b(
+        json.dumps(parts, sort_keys=True, separators=(",", ":")).encode(),
+        digest_size=16,
+    ).hexdigest()
+
+
+def get_cache_control(historical=False, private=False) -> str:
+    """
+    Cache-Control header value. Historical data no longer changes and is cached for config.HISTORICAL_CACHE_MAX_AGE
+    seconds; other data must be revalidated with its ETag.
+    @param historical: boolean
+    @param private: boolean, response must not be stored by shared caches (user data)
+    @return: string
+    """
+    return "{}, {}".format(
+        "private" if private else "public",
+        (
+            "max-age={}, immutable".format(config.HISTORICAL_CACHE_MAX_AGE)
+            if historical
+            else "no-cache"
+        ),
+    )
+
+
+def is_not_modified(etag) -> bool:
+    """
+    Check if request If-None-Match header matches etag.
+    @param etag: string
+    @return: boolean
+    """
+    return request.if_none_match.contains_weak(etag)
+
+
+def response_not_modified(etag, cache_control) -> Response:
+    """
+    Empty 304 response.
+    @param etag: string
+    @param cache_control: string
+    @return: Response
+    """
+    not_modified = Response(status=304)
+    not_modified.set_etag(etag)
+    not_modified.headers["Cache-Control"] = cache_control
+    return not_modified
+
+
+def add_cache_headers(result, etag, cache_control) -> object:
+    """
+    Add ETag and Cache-Control headers to successful route result.
+    @param result: tuple (data, status)/Response
+    @param etag: string
+    @param cache_control: string
+    @return: tuple (data, status, headers)/Response
+    """
+    if isinstance(result, Response):
+        if result.status_code == 200:
+            result.set_etag(etag)
+            result.headers["Cache-Control"] = cache_control
+        return result
+
+    data, status = result
+    if status != 200:
+        return result
+    return data, status, {"ETag": quote_etag(etag), "Cache-Control": cache_control}
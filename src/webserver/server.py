@@ -1,11 +1,23 @@
 from webserver.flask_rest import FlaskApp, FlaskRestPlusApi
+from webserver.routes.analytics import RouteRollingReturns
 from webserver.routes.authentication import RouteLogin
 from webserver.routes.investment_calculator import (
     RouteInvestmentCalculatorCompoundInterest,
+    RouteInvestmentCalculatorCompoundInterestGrid,
+    RouteInvestmentCalculatorMonteCarlo,
 )
-from webserver.routes.portfolio import RouteBacktest, RoutePortfolio
-from webserver.routes.stock_prices import RouteStockPrices
-from webserver.routes.stocks import RouteStocks
+from webserver.routes.monitoring import RouteElasticsearchPool
+from webserver.routes.portfolio import (
+    RouteBacktest,
+    RouteBacktestBatch,
+    RouteBacktestCache,
+    RoutePortfolio,
+)
+from webserver.routes.stock_prices import (
+    RouteStockPrices,
+    RouteStockPricesCorrelation,
+)
+from webserver.routes.stocks import RouteStocks, RouteStocksSuggest
 
 # create flask app
 from webserver.routes.users import RouteUsers
@@ -29,9 +41,15 @@ flask_api.ns("users", security="apiKey", authorizations=authorizations).add_reso
 flask_api.ns("stocks", security="apiKey", authorizations=authorizations).add_resource(
     RouteStocks, "/stocks"
 )
+flask_api.ns("stocks", security="apiKey", authorizations=authorizations).add_resource(
+    RouteStocksSuggest, "/stocks/suggest"
+)
 flask_api.ns(
     "stock-prices", security="apiKey", authorizations=authorizations
 ).add_resource(RouteStockPrices, "/stock-prices")
+flask_api.ns(
+    "stock-prices", security="apiKey", authorizations=authorizations
+).add_resource(RouteStockPricesCorrelation, "/stock-prices/correlation")
 
 flask_api.ns(
     "portfolio", security="apiKey", authorizations=authorizations
@@ -39,8 +57,30 @@ flask_api.ns(
 flask_api.ns(
     "portfolio", security="apiKey", authorizations=authorizations
 ).add_resource(RouteBacktest, "/portfolio/backtest")
+flask_api.ns(
+    "portfolio", security="apiKey", authorizations=authorizations
+).add_resource(RouteBacktestCache, "/portfolio/backtest/cache")
+flask_api.ns(
+    "portfolio", security="apiKey", authorizations=authorizations
+).add_resource(RouteBacktestBatch, "/portfolio/backtest/batch")
+
+flask_api.ns(
+    "analytics", security="apiKey", authorizations=authorizations
+).add_resource(RouteRollingReturns, "/analytics/rolling-returns")
 
 flask_api.ns("investment-calculator").add_resource(
     RouteInvestmentCalculatorCompoundInterest,
     "/investment-calculator/compound-interest",
 )
+flask_api.ns("investment-calculator").add_resource(
+    RouteInvestmentCalculatorCompoundInterestGrid,
+    "/investment-calculator/compound-interest/grid",
+)
+flask_api.ns("investment-calculator").add_resource(
+    RouteInvestmentCalculatorMonteCarlo,
+    "/investment-calculator/monte-carlo",
+)
+
+flask_api.ns(
+    "monitoring", security="apiKey", authorizations=authorizations
+).add_resource(RouteElasticsearchPool, "/monitoring/elasticsearch/pool")
@@ -5,9 +5,7 @@ monkey.patch_all()
 
 import logging
 import os
-from threading import Thread
 
-from webserver.daemons.stock_prices_daemon import stock_prices_updater_task
 from webserver.model.db import db
 from webserver.server import flask_app
 
@@ -22,12 +20,7 @@ db.init_app(flask_app)
 db.create_all()
 
 if __name__ == "__main__":
-    # create and start stock prices updater thread - only when run without gunicorn; thread started with gunicorn from
-    # gunicorn.conf.py
-    # TODO - daemon bug - runs multiple times and takes too many resources, replace with cron outside ws
-    # stock_prices_updater_thread = Thread(target=stock_prices_updater_task)
-    # stock_prices_updater_thread.setDaemon(True)
-    # stock_prices_updater_thread.start()
+    # stock prices are updated by the standalone price scheduler (python -m webserver.daemons.price_scheduler)
 
     # run app - only when run without gunicorn
     flask_app.run(